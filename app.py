@@ -6,16 +6,24 @@ from io import BytesIO
 
 from auth.auth import require_login, logout_button
 from config.settings import PAGE_TITLE, SPRX_RATE, EST_PAID_PER_INFUSION, INSIGHT_ADMIN_EMAILS, INSIGHT_BIZDEV_DOCTORS, VIEWER_USERS
-from data.claims import load_claims
-from data.gout import load_gout
+from data.claims import claims_version, load_claims
+from data.dates import date_position, date_slice
+from data.cube import claims_cube, window
+from data.gout import gout_version, load_gout
 from data.doctors import load_doctors
 from data.filters import apply_user_scope, apply_claims_scope
 from data.phi import make_phi_safe
+from data.unfilled import classify_unfilled, dedup_unfilled, priorities_in
+from data.metrics import METRICS, monthly_metrics
+from data.frozen import monthly_aggregate
+from data.prefix import prefix_sums
 from data.geocode import geocode_zips
 from data.npi_lookup import lookup_doctor_locations
-from data.insight import load_insight, filter_insight_by_doctors
+from data.insight import insight_version, load_insight, filter_insight_by_doctors
 from data.patient_tracker import load_patient_tracker, filter_tracker_by_doctors
+from data.providers import load_crosswalk
 
+from utils.datasets import Datasets
 from utils.ui import safe_top_n_slider
 
 st.set_page_config(page_title=PAGE_TITLE, layout="wide")
@@ -26,16 +34,81 @@ st.set_page_config(page_title=PAGE_TITLE, layout="wide")
 user = require_login()
 logout_button()
 
+_role = user["role"]
+_email = user["email"]
+
 # =========================
-# LOAD DATA
+# DATASETS
+# Loaded on first use, so each page only pays for the data it shows
+# (see utils/datasets.py).  Page-specific datasets are defined in the pages.
 # =========================
-df_all = load_claims()
-daily_gout = load_gout()
-doctors_raw = load_doctors()
-doctors = apply_user_scope(doctors_raw, user)
+data = Datasets()
+data.define("claims")(load_claims)
+data.define("gout")(load_gout)
+data.define("doctors_raw")(load_doctors)
+data.define("insight")(load_insight)
+data.define("tracker")(load_patient_tracker)
+
+
+@data.define("providers", "claims", "insight", "tracker", "doctors_raw")
+def _providers(claims, insight, tracker, doctors_raw):
+    # Provider ids shared by every source; scope filters match on these
+    return load_crosswalk({"claims": claims, "insight": insight, "tracker": tracker, "doctors": doctors_raw})
+
+
+# Scope filters match on the crosswalk's provider ids.  Each role's datasets
+# name "providers" only where they read it, so admins (who see everything)
+# never build the crosswalk for claims or doctors.
+if _role == "admin":
+    @data.define("claims_scoped", "claims")
+    def _claims_scoped(claims):
+        return apply_claims_scope(claims, user, None)
+
+    @data.define("scope")
+    def _scope():
+        # Identifies the user's slice of the data, for caches derived from it
+        return (_role, _email, user.get("bizdev_name"), ())
+else:
+    @data.define("claims_scoped", "claims", "providers")
+    def _claims_scoped(claims, providers):
+        return apply_claims_scope(claims, user, providers)
+
+    @data.define("scope", "providers")
+    def _scope(providers):
+        # Identifies the user's slice of the data, for caches derived from it
+        return (_role, _email, user.get("bizdev_name"), providers.key)
+
+if _role == "viewer":
+    @data.define("doctors", "doctors_raw", "providers")
+    def _doctors(doctors_raw, providers):
+        return apply_user_scope(doctors_raw, user, providers)
+else:
+    @data.define("doctors", "doctors_raw")
+    def _doctors(doctors_raw):
+        return apply_user_scope(doctors_raw, user, None)
 
-df_scoped = apply_claims_scope(df_all, user)
-df = df_scoped.copy()
+
+@data.define("cube", "claims_scoped", "scope")
+def _cube(claims_scoped, scope):
+    return claims_cube(claims_scoped, (claims_version(), scope))
+
+
+@data.define("cube_prefix", "cube", "scope")
+def _cube_prefix(cube, scope):
+    # Daily prefix sums for cumulative charts (see data/prefix.py)
+    return prefix_sums(
+        cube, ["Actual Revenue", "Potential Revenue (Raw)"], (claims_version(), scope),
+        by=["Biz Dev Name", "Inventory_Type"],
+    )
+
+
+def _claims_or_stop() -> pd.DataFrame:
+    """The user's claims; stops the page if none of them are dated."""
+    claims = data["claims_scoped"]
+    if pd.isna(claims["Date"].min()):
+        st.warning("No data available.")
+        st.stop()
+    return claims
 
 # =========================
 # HEADER
@@ -48,28 +121,32 @@ st.caption(f"Logged in as: {user['name']} ({user['role']}) – {user['email']}")
 # Admins: only those in INSIGHT_ADMIN_EMAILS
 # BizDev: only if they have a doctors list assigned AND at least one matches Insight
 # Viewer: only if at least one of their doctors matches Insight
+# Matching goes through the provider crosswalk, which is cached across runs
+# and memoizes the matches per doctor list, so the check is a lookup.
 #
 # Doctor list is always re-resolved from current settings (not session state)
 # so changes take effect immediately without requiring a logout.
 # =========================
-_insight_all = load_insight()
-_tracker_all = load_patient_tracker()
-_role = user["role"]
-_email = user["email"]
-
 if _role == "admin":
     _show_insight = _email in (e.lower() for e in INSIGHT_ADMIN_EMAILS)
     _insight_doctor_list = []  # admins see all
 elif _role == "bizdev":
     _insight_doctor_list = INSIGHT_BIZDEV_DOCTORS.get(_email, [])
-    _show_insight = bool(_insight_doctor_list) and not filter_insight_by_doctors(_insight_all, _insight_doctor_list).empty
 elif _role == "viewer":
     _insight_doctor_list = VIEWER_USERS.get(_email, {}).get("doctors", [])
-    _show_insight = bool(_insight_doctor_list) and not filter_insight_by_doctors(_insight_all, _insight_doctor_list).empty
 else:
     _insight_doctor_list = []
     _show_insight = False
 
+if _role in ("viewer", "bizdev"):
+    @data.define("insight_scoped", "insight", "providers")
+    def _insight_scoped(insight, providers):
+        return filter_insight_by_doctors(insight, _insight_doctor_list, providers)
+
+    _show_insight = bool(_insight_doctor_list) and not data["insight_scoped"].empty
+else:
+    data.define("insight_scoped", "insight")(lambda insight: insight)
+
 # =========================
 # SIDEBAR – page selector + shared filters
 # =========================
@@ -90,16 +167,7 @@ page = st.sidebar.radio(
 st.sidebar.divider()
 st.sidebar.header("Filters")
 
-# Date range (shared by both pages)
-min_date = df["Date"].min()
-max_date = df["Date"].max()
-
-if pd.isna(min_date) or pd.isna(max_date):
-    st.warning("No data available.")
-    st.stop()
-
-min_dt = min_date.to_pydatetime()
-max_dt = max_date.to_pydatetime()
+# Date range (shared by all pages)
 today = pd.Timestamp.today().normalize()
 
 date_preset = st.sidebar.selectbox(
@@ -117,6 +185,10 @@ elif date_preset == "Last Quarter":
 elif date_preset == "Last Year":
     start_dt, end_dt = today - pd.DateOffset(months=12), today
 else:
+    # Only a custom range needs the claims' date bounds
+    _claim_dates = _claims_or_stop()["Date"]
+    min_dt = _claim_dates.min().to_pydatetime()
+    max_dt = _claim_dates.max().to_pydatetime()
     default_start = max_dt - pd.Timedelta(days=360)
     start_dt, end_dt = st.sidebar.slider(
         "Custom Date Range",
@@ -129,33 +201,25 @@ else:
 
 date_range_label = f"Date Range: {start_dt.date()} to {end_dt.date()}"
 
-# Date-filter claims
-df = df[(df["Date"] >= start_dt) & (df["Date"] <= end_dt)]
-
 cutoff_30d = today - pd.Timedelta(days=30)
 
-# Potential revenue: only scripts within 30-day window (still recoverable)
-df["Potential Revenue (Included)"] = 0.0
-df.loc[
-    (df["Total Price Paid"] == 0)
-    & (df["WAC Price"] > 0)
-    & (df["Date"] >= cutoff_30d),
-    "Potential Revenue (Included)",
-] = df["Potential Revenue (Raw)"]
-
-# Unable-to-fill revenue: unfilled scripts older than 30 days (assumed lost)
-df["Unable to Fill Revenue"] = 0.0
-df.loc[
-    (df["Total Price Paid"] == 0)
-    & (df["WAC Price"] > 0)
-    & (df["Date"] < cutoff_30d),
-    "Unable to Fill Revenue",
-] = df["Potential Revenue (Raw)"]
-
-# Date-filter gout
-daily_gout = daily_gout.loc[
-    (daily_gout.index >= start_dt) & (daily_gout.index <= end_dt)
-].copy()
+
+@data.define("claims_window", "claims_scoped")
+def _claims_window(claims_scoped):
+    # Date-filter claims (kept sorted by Date, see data.dates.date_slice)
+    df = date_slice(claims_scoped, start_dt, end_dt).copy()
+    recent_from = date_position(df, cutoff_30d)  # first row within 30 days
+
+    # Unpaid scripts with a WAC price: potential revenue within the 30-day
+    # window (still recoverable), unable-to-fill revenue before it (assumed lost)
+    recoverable = df["Potential Revenue (Raw)"].where(
+        (df["Total Price Paid"] == 0) & (df["WAC Price"] > 0), 0.0
+    )
+    df["Potential Revenue (Included)"] = recoverable
+    df["Unable to Fill Revenue"] = recoverable
+    df.iloc[:recent_from, df.columns.get_loc("Potential Revenue (Included)")] = 0.0
+    df.iloc[recent_from:, df.columns.get_loc("Unable to Fill Revenue")] = 0.0
+    return df
 
 # ============================================================
 #  340B DASHBOARD PAGE
@@ -164,6 +228,9 @@ if page == "340b HUMC Dashboard":
 
     st.markdown("## 340B Revenue & BizDev Dashboard")
 
+    df_scoped = _claims_or_stop()
+    df = data["claims_window"]
+
     # --- 340B-specific sidebar controls ---
     bizdev_options = ["All"] + sorted(df["Biz Dev Name"].dropna().unique().tolist())
     selected_bizdev = st.sidebar.selectbox("Filter by Biz Dev", bizdev_options)
@@ -184,54 +251,82 @@ if page == "340b HUMC Dashboard":
 
     phi_safe_df = make_phi_safe(df.copy())
 
-    # --- NPI lookups & doctor enrichment ---
-    npi_col = next((c for c in doctors_raw.columns if "npi" in c.lower()), None)
-    doctor_locs = pd.DataFrame()
-    if npi_col:
-        doctor_locs = lookup_doctor_locations(doctors_raw[npi_col])
-
-    scripts_by_npi = pd.DataFrame(columns=["npi", "scripts", "revenue"])
-    if npi_col and "Prescriber NPI" in df_filtered.columns:
-        claims_npi = df_filtered.copy()
-        claims_npi["_npi"] = claims_npi["Prescriber NPI"].dropna().astype(float).astype(int).astype(str)
-        claims_npi["_rev"] = pd.to_numeric(
-            claims_npi["Total Price Paid"].astype(str).str.replace(r"[\$,]", "", regex=True),
-            errors="coerce",
-        ).fillna(0)
-        scripts_by_npi = (
-            claims_npi.groupby("_npi", as_index=False)
-            .agg(scripts=("Rx Number", "count"), revenue=("_rev", "sum"))
-            .rename(columns={"_npi": "npi"})
-        )
-
-    doctors_enriched = doctors_raw.copy()
-    if npi_col and not scripts_by_npi.empty:
-        doctors_enriched["_npi_str"] = doctors_enriched[npi_col].dropna().astype(float).astype(int).astype(str)
-        doctors_enriched = doctors_enriched.merge(scripts_by_npi, left_on="_npi_str", right_on="npi", how="left")
-        doctors_enriched["scripts"] = doctors_enriched["scripts"].fillna(0).astype(int)
-        doctors_enriched["revenue"] = doctors_enriched["revenue"].fillna(0)
-        doctors_enriched["status"] = doctors_enriched["scripts"].apply(lambda x: "Active" if x > 0 else "No Scripts")
-        doctors_enriched.drop(columns=["npi"], inplace=True, errors="ignore")
-        doctors_enriched.rename(columns={"_npi_str": "npi"}, inplace=True)
-    else:
-        doctors_enriched["npi"] = doctors_enriched.get(npi_col, "")
-        doctors_enriched["scripts"] = 0
-        doctors_enriched["revenue"] = 0.0
-        doctors_enriched["status"] = "No Scripts"
-
-    if not doctor_locs.empty and "npi" in doctors_enriched.columns:
-        npi_locs = doctor_locs[["npi", "city", "state"]].rename(columns={"city": "npi_city", "state": "npi_state"})
-        doctors_enriched = doctors_enriched.merge(npi_locs, on="npi", how="left")
-        doctors_enriched["npi_location"] = (
-            doctors_enriched["npi_city"].fillna("") + ", " + doctors_enriched["npi_state"].fillna("")
-        ).str.strip(", ")
-        doctors_enriched.drop(columns=["npi_city", "npi_state"], inplace=True)
-    else:
-        doctors_enriched["npi_location"] = ""
+    # Page aggregates come from the pre-aggregated cube, not the claim rows
+    cells = window(
+        data["cube"], start_dt, end_dt, cutoff_30d,
+        None if selected_bizdev == "All" else selected_bizdev,
+    )
 
-    geo_claims = geocode_zips(df_filtered["Prescriber Zip Code"]).dropna(subset=["lat", "lon"])
-    patients_by_zip = pd.DataFrame()
-    if not geo_claims.empty:
+    # --- Doctor / map datasets, computed when sections 8-10 read them ---
+    data.provide("claims_filtered", df_filtered)
+
+    @data.define("npi_col", "doctors_raw")
+    def _npi_col(doctors_raw):
+        return next((c for c in doctors_raw.columns if "npi" in c.lower()), None)
+
+    @data.define("doctor_locs", "doctors_raw", "npi_col")
+    def _doctor_locs(doctors_raw, npi_col):
+        return lookup_doctor_locations(doctors_raw[npi_col]) if npi_col else pd.DataFrame()
+
+    @data.define("scripts", "claims_filtered", "npi_col", "providers")
+    def _scripts(df_filtered, npi_col, providers):
+        """(scripts_by_npi, scripts_by_provider) for the filtered claims."""
+        scripts_by_npi = pd.DataFrame(columns=["npi", "scripts", "revenue"])
+        scripts_by_provider = pd.DataFrame(columns=["_provider", "scripts", "revenue"])
+        if npi_col and "Prescriber NPI" in df_filtered.columns:
+            claims_npi = df_filtered.copy()
+            claims_npi["_npi"] = claims_npi["Prescriber NPI"].dropna().astype(float).astype(int).astype(str)
+            claims_npi["_rev"] = pd.to_numeric(
+                claims_npi["Total Price Paid"].astype(str).str.replace(r"[\$,]", "", regex=True),
+                errors="coerce",
+            ).fillna(0)
+            scripts_by_npi = (
+                claims_npi.groupby("_npi", as_index=False)
+                .agg(scripts=("Rx Number", "count"), revenue=("_rev", "sum"))
+                .rename(columns={"_npi": "npi"})
+            )
+            # Doctors are matched to their claims by provider id (NPI or name)
+            claims_npi["_provider"] = providers.ids(claims_npi, "claims")
+            scripts_by_provider = claims_npi.groupby("_provider", as_index=False).agg(
+                scripts=("Rx Number", "count"), revenue=("_rev", "sum")
+            )
+        return scripts_by_npi, scripts_by_provider
+
+    @data.define("doctors_enriched", "doctors_raw", "npi_col", "scripts", "doctor_locs", "providers")
+    def _doctors_enriched(doctors_raw, npi_col, scripts, doctor_locs, providers):
+        scripts_by_npi, scripts_by_provider = scripts
+        doctors_enriched = doctors_raw.copy()
+        if npi_col and not scripts_by_npi.empty:
+            doctors_enriched["_npi_str"] = doctors_enriched[npi_col].dropna().astype(float).astype(int).astype(str)
+            doctors_enriched["_provider"] = providers.ids(doctors_enriched, "doctors")
+            doctors_enriched = doctors_enriched.merge(scripts_by_provider, on="_provider", how="left")
+            doctors_enriched["scripts"] = doctors_enriched["scripts"].fillna(0).astype(int)
+            doctors_enriched["revenue"] = doctors_enriched["revenue"].fillna(0)
+            doctors_enriched["status"] = doctors_enriched["scripts"].apply(lambda x: "Active" if x > 0 else "No Scripts")
+            doctors_enriched.drop(columns=["npi", "_provider"], inplace=True, errors="ignore")
+            doctors_enriched.rename(columns={"_npi_str": "npi"}, inplace=True)
+        else:
+            doctors_enriched["npi"] = doctors_enriched.get(npi_col, "")
+            doctors_enriched["scripts"] = 0
+            doctors_enriched["revenue"] = 0.0
+            doctors_enriched["status"] = "No Scripts"
+
+        if not doctor_locs.empty and "npi" in doctors_enriched.columns:
+            npi_locs = doctor_locs[["npi", "city", "state"]].rename(columns={"city": "npi_city", "state": "npi_state"})
+            doctors_enriched = doctors_enriched.merge(npi_locs, on="npi", how="left")
+            doctors_enriched["npi_location"] = (
+                doctors_enriched["npi_city"].fillna("") + ", " + doctors_enriched["npi_state"].fillna("")
+            ).str.strip(", ")
+            doctors_enriched.drop(columns=["npi_city", "npi_state"], inplace=True)
+        else:
+            doctors_enriched["npi_location"] = ""
+        return doctors_enriched
+
+    @data.define("patients_by_zip", "claims_filtered")
+    def _patients_by_zip(df_filtered):
+        geo_claims = geocode_zips(df_filtered["Prescriber Zip Code"]).dropna(subset=["lat", "lon"])
+        if geo_claims.empty:
+            return pd.DataFrame()
         zip5 = df_filtered["Prescriber Zip Code"].dropna().astype(str).str[:5]
         patient_counts = (
             df_filtered.assign(zip5=zip5)
@@ -239,26 +334,25 @@ if page == "340b HUMC Dashboard":
             .agg(patients=("Patient Full Name", "nunique"), claims=("Rx Number", "count"), city=("Prescriber City", "first"), state=("Prescriber State", "first"))
         )
         geo_unique = geo_claims.drop_duplicates("zip5")
-        patients_by_zip = patient_counts.merge(geo_unique[["zip5", "lat", "lon"]], on="zip5", how="inner")
+        return patient_counts.merge(geo_unique[["zip5", "lat", "lon"]], on="zip5", how="inner")
 
     CARTO_LIGHT = "https://basemaps.cartocdn.com/gl/voyager-gl-style/style.json"
 
     # =========================================================
     # 1. KPIs (with Fill Rate)
     # =========================================================
-    actual_340b = df_filtered.loc[df_filtered["Inventory_Type"] == "340B", "Actual Revenue"].sum()
-    potential_340b_inc = df_filtered.loc[df_filtered["Inventory_Type"] == "340B", "Potential Revenue (Included)"].sum()
+    cells_340b = cells[cells["Inventory_Type"] == "340B"]
+    actual_340b = cells_340b["Actual Revenue"].sum()
+    potential_340b_inc = cells_340b["Potential Revenue (Included)"].sum()
     potential_340b = actual_340b + potential_340b_inc
-    unable_to_fill_wac = df_filtered["Unable to Fill Revenue"].sum()
-    num_scripts = int(df_filtered["Infusions"].sum())
+    unable_to_fill_wac = cells["Unable to Fill Revenue"].sum()
+    num_scripts = int(cells["Infusions"].sum())
 
-    total_claims_n = len(df_filtered)
-    paid_claims_n = int((df_filtered["Total Price Paid"] > 0).sum())
+    total_claims_n = int(cells["Rows"].sum())
+    paid_claims_n = int(cells["Filled"].sum())
     fill_rate_pct = paid_claims_n / max(total_claims_n, 1) * 100
     unfilled_claims_n = total_claims_n - paid_claims_n
-    unable_to_fill_n = int(
-        ((df_filtered["Total Price Paid"] == 0) & (df_filtered["Date"] < cutoff_30d)).sum()
-    )
+    unable_to_fill_n = int(cells["Unable to Fill Scripts"].sum())
 
     k1, k2, k3, k4, k5 = st.columns(5)
     k1.metric("340B Revenue (Actual)", f"${actual_340b:,.0f}")
@@ -287,30 +381,6 @@ if page == "340b HUMC Dashboard":
         "additional contract-pharmacy files will be added."
     )
 
-    # --- Actionability buckets ---
-    ACTIONABLE_PRIORITIES = {
-        "New Fill", "Pending Clinical Notes", "Pending Rx Clarification",
-        "* Insurance Info Needed", "Pending Labs", "MD request sent for more info",
-        "Pending Med", "Pending Hardcopy", "Pending Hardcopy + Med",
-        "Pending Telehealth", "Pending Telehealth + Hardcopy + Med",
-        "Pending communication w. PT", "LVM", "MD Sent Clarified Rx",
-        "Pharmacist Check", "Pending 340B Review",
-        "Pending Formulary Medication Change", "Need More Recent Labs/Notes",
-        "MDO Initiate PA", "Electronic PA sent to MDO",
-        "Scheduling", "Scheduling - Initial Assessment",
-    }
-    WAITING_PRIORITIES = {
-        "PA Under Review", "Peer-to-Peer", "Pending Foundation Assistance",
-        "Pending Financial Assistance or PAP", "Sent NJ PAAD Application",
-        "Bridge",
-    }
-    LOST_PRIORITIES = {
-        "PA Denied", "PT Refused", "MDO Canceled", "Switched Therapies",
-        "Therapy Not Appropriate", "Plan Exclusion", "High Copay",
-        "Retail Med", "* Maintenance to be put on hold",
-    }
-    TRANSFER_PRIORITIES = {"Transfer", "Approved - Transfer"}
-
     # Action guidance per Rx Priority
     ACTION_GUIDANCE = {
         "New Fill": "Ready to dispense — follow up with pharmacy to expedite. Confirm patient pickup/delivery.",
@@ -337,33 +407,16 @@ if page == "340b HUMC Dashboard":
         "Pending Telehealth + Hardcopy + Med": "Multiple steps: telehealth visit + hardcopy Rx + medication. Coordinate all three.",
     }
 
-    def _classify(row):
-        pri = row.get("Rx Priority", "")
-        msg = str(row.get("Primary Claim Message", ""))
-        if "M/I PHARMACY NUMBER" in msg.upper():
-            return "Transfer Out (Rare Not In-Network)"
-        if pri in ACTIONABLE_PRIORITIES:
-            return "Actionable NOW"
-        if pri in WAITING_PRIORITIES:
-            return "Waiting on External"
-        if pri in LOST_PRIORITIES:
-            return "Likely Lost"
-        if pri in TRANSFER_PRIORITIES:
-            return "Transfer Out (Rare Not In-Network)"
-        return "Other"
-
     unfilled_cutoff = today - pd.Timedelta(days=30)
-    unfilled = df_scoped[
-        (df_scoped["Date"] >= unfilled_cutoff)
-        & (df_scoped["Total Price Paid"] == 0)
-    ].copy()
+    unfilled = date_slice(df_scoped, unfilled_cutoff)
+    unfilled = unfilled[unfilled["Total Price Paid"] == 0].copy()
 
     if unfilled.empty:
         st.info("No open unfilled scripts in the last 30 days.")
     else:
         unfilled["Days Open"] = (today - unfilled["Date"]).dt.days
         unfilled["Rx Priority"] = unfilled["Rx Priority"].fillna("Unknown")
-        unfilled["Bucket"] = unfilled.apply(_classify, axis=1)
+        unfilled["Bucket"] = classify_unfilled(unfilled)
 
         # M/I PHARMACY NUMBER alert
         mi_pharmacy = unfilled[
@@ -386,14 +439,11 @@ if page == "340b HUMC Dashboard":
         u4.metric("Unique Patients", f"{unfilled['Patient Full Name'].nunique():,}")
         u5.metric("Unique Prescribers", f"{unfilled['Prescriber Full Name'].nunique():,}")
 
-        # Bucket chart
+        # Bucket chart (Bucket is categorical in display order)
         bucket_summary = (
-            unfilled.groupby("Bucket", as_index=False)
+            unfilled.groupby("Bucket", as_index=False, observed=True)
             .agg(Scripts=("Rx Number", "count"), WAC=("WAC Price", "sum"))
         )
-        bucket_order = ["Actionable NOW", "Transfer Out (Rare Not In-Network)", "Waiting on External", "Likely Lost", "Other"]
-        bucket_summary["_sort"] = bucket_summary["Bucket"].apply(lambda b: bucket_order.index(b) if b in bucket_order else 99)
-        bucket_summary = bucket_summary.sort_values("_sort").drop(columns="_sort")
 
         BUCKET_COLORS = {
             "Actionable NOW": "#e74c3c",
@@ -423,7 +473,7 @@ if page == "340b HUMC Dashboard":
         if not actionable.empty:
             with st.expander(f"**What to do: {len(actionable)} Actionable Scripts** — click for step-by-step guidance", expanded=True):
                 actionable_sorted = actionable.sort_values("Days Open", ascending=False)
-                for pri, grp in actionable_sorted.groupby("Rx Priority", sort=False):
+                for pri, grp in actionable_sorted.groupby("Rx Priority", sort=False, observed=True):
                     guidance = ACTION_GUIDANCE.get(pri, "Follow up with pharmacy or prescriber's office.")
                     st.markdown(f"#### {pri}  ({len(grp)} scripts, ${grp['WAC Price'].sum():,.0f} WAC)")
                     st.info(f"**Next step:** {guidance}")
@@ -436,14 +486,20 @@ if page == "340b HUMC Dashboard":
         # Priority breakdown
         if "Rx Priority" in unfilled.columns:
             by_priority = (
-                unfilled.groupby(["Bucket", "Rx Priority"], as_index=False)
+                unfilled.groupby(["Bucket", "Rx Priority"], as_index=False, observed=True)
                 .agg(Scripts=("Rx Number", "count"), WAC_Total=("WAC Price", "sum"))
                 .sort_values(["Bucket", "Scripts"], ascending=[True, False])
             )
             by_priority["WAC_Total"] = by_priority["WAC_Total"].map("${:,.0f}".format)
-            show_priority_detail = st.checkbox("Show breakdown by Rx Priority", value=False)
-            if show_priority_detail:
-                st.dataframe(by_priority, use_container_width=True, height=min(400, 40 + 35 * len(by_priority)))
+
+            # Toggling reruns only this fragment, not the whole page
+            @st.fragment
+            def _priority_breakdown(by_priority):
+                show_priority_detail = st.checkbox("Show breakdown by Rx Priority", value=False)
+                if show_priority_detail:
+                    st.dataframe(by_priority, use_container_width=True, height=min(400, 40 + 35 * len(by_priority)))
+
+            _priority_breakdown(by_priority)
 
         # Full detail table
         unfilled_display_cols = [
@@ -476,10 +532,10 @@ if page == "340b HUMC Dashboard":
     st.subheader("Biz Dev Scorecard")
 
     bizdev_scorecard = (
-        df_filtered.groupby("Biz Dev Name", as_index=False)
+        cells.groupby("Biz Dev Name", as_index=False, observed=True)
         .agg(
-            Scripts=("Rx Number", "count"),
-            Filled=("Total Price Paid", lambda x: (x > 0).sum()),
+            Scripts=("Scripts", "sum"),
+            Filled=("Filled", "sum"),
             Revenue=("Actual Revenue", "sum"),
             Unfilled_WAC=("Potential Revenue (Included)", "sum"),
         )
@@ -496,7 +552,7 @@ if page == "340b HUMC Dashboard":
     st.dataframe(bsc_disp, use_container_width=True, height=min(400, 40 + 35 * len(bsc_disp)))
 
     by_rep = (
-        df_filtered.groupby("Biz Dev Name", as_index=False)[["Actual Revenue", "Potential Revenue (Included)"]].sum()
+        cells.groupby("Biz Dev Name", as_index=False, observed=True)[["Actual Revenue", "Potential Revenue (Included)"]].sum()
     )
     by_rep["Total"] = by_rep["Actual Revenue"] + by_rep["Potential Revenue (Included)"]
     by_rep = by_rep.sort_values("Total", ascending=False).head(top_n_bizdev)
@@ -521,13 +577,15 @@ if page == "340b HUMC Dashboard":
     # =========================================================
     st.subheader("Cumulative 340B Revenue Over Time")
 
-    daily = (
-        df_filtered.groupby("Date", as_index=False)
-        .agg({"Actual Revenue": "sum", "Potential Revenue (Included)": "sum"})
-        .sort_values("Date")
-    )
-    daily["Cumulative Actual"] = daily["Actual Revenue"].cumsum()
-    daily["Cumulative Potential"] = daily["Potential Revenue (Included)"].cumsum()
+    # Running totals are slices of the daily prefix sums, not a cumsum
+    prefix = data["cube_prefix"]
+    where = None if selected_bizdev == "All" else {"Biz Dev Name": selected_bizdev}
+    daily = prefix.series(["Actual Revenue", "Potential Revenue (Raw)"], start_dt, end_dt, where)
+    recent = daily["Date"] >= cutoff_30d
+    before_cutoff = prefix.total("Potential Revenue (Raw)", start_dt, cutoff_30d - pd.Timedelta(1), where)
+    daily["Cumulative Actual"] = daily["Cumulative Actual Revenue"]
+    daily["Potential Revenue (Included)"] = daily["Potential Revenue (Raw)"].where(recent, 0.0)
+    daily["Cumulative Potential"] = (daily["Cumulative Potential Revenue (Raw)"] - before_cutoff).where(recent, 0.0)
 
     fig = go.Figure()
     fig.add_bar(x=daily["Date"], y=daily["Actual Revenue"], name="Actual Revenue (Paid)")
@@ -548,8 +606,16 @@ if page == "340b HUMC Dashboard":
     # =========================================================
     st.subheader("340B – Monthly Cash Collected (Actual)")
 
-    df_340b = df_filtered[df_filtered["Inventory_Type"] == "340B"].copy()
-    monthly_340b = df_340b.groupby("Month", as_index=False)["Actual Revenue"].sum().sort_values("Month")
+    # Closed months come from the frozen store (see data/frozen.py)
+    monthly_340b = monthly_aggregate(
+        "340b_cash", data["cube"],
+        lambda c: c[c["Inventory_Type"] == "340B"]
+        .groupby(["Month", "Biz Dev Name"], as_index=False, observed=True)["Actual Revenue"].sum(),
+        claims_version(), data["scope"], start_dt, end_dt, today=today,
+    )
+    if selected_bizdev != "All":
+        monthly_340b = monthly_340b[monthly_340b["Biz Dev Name"] == selected_bizdev]
+    monthly_340b = monthly_340b.groupby("Month", as_index=False, observed=True)["Actual Revenue"].sum()
 
     fig = go.Figure()
     fig.add_bar(x=monthly_340b["Month"], y=monthly_340b["Actual Revenue"], name="340B Cash")
@@ -563,7 +629,7 @@ if page == "340b HUMC Dashboard":
     # =========================================================
     st.subheader("Revenue by Medication")
 
-    by_med = df_filtered.groupby("Dispensed Drug", as_index=False).agg({"Actual Revenue": "sum", "Potential Revenue (Included)": "sum"})
+    by_med = cells.groupby("Dispensed Drug", as_index=False, observed=True).agg({"Actual Revenue": "sum", "Potential Revenue (Included)": "sum"})
     by_med["Total"] = by_med["Actual Revenue"] + by_med["Potential Revenue (Included)"]
     by_med = by_med.sort_values("Total", ascending=False).head(top_n_med)
 
@@ -593,12 +659,12 @@ if page == "340b HUMC Dashboard":
     # =========================================================
     st.subheader("Revenue by Physician")
 
-    by_phys = df_filtered.groupby("Prescriber Full Name", as_index=False).agg(
+    by_phys = cells.groupby("Prescriber Full Name", as_index=False, observed=True).agg(
         **{
             "Actual Revenue": ("Actual Revenue", "sum"),
             "Potential Revenue (Included)": ("Potential Revenue (Included)", "sum"),
-            "Scripts": ("Rx Number", "count"),
-            "Filled": ("Total Price Paid", lambda x: (x > 0).sum()),
+            "Scripts": ("Scripts", "sum"),
+            "Filled": ("Filled", "sum"),
         }
     )
     by_phys["Total"] = by_phys["Actual Revenue"] + by_phys["Potential Revenue (Included)"]
@@ -632,7 +698,9 @@ if page == "340b HUMC Dashboard":
     # =========================================================
     st.subheader("Doctors Onboarded")
 
+    doctors = data["doctors"]
     if "doctor_name" in doctors.columns:
+        doctors_enriched = data["doctors_enriched"]
         active_docs = int((doctors_enriched["status"] == "Active").sum())
         inactive_docs = int((doctors_enriched["status"] == "No Scripts").sum())
         total_docs = doctors["doctor_name"].nunique()
@@ -676,7 +744,9 @@ if page == "340b HUMC Dashboard":
     MAP_CONTROLS = "**Scroll** = zoom  |  **Click + drag** = pan  |  **Ctrl + drag** = rotate & tilt  |  **Hover** for details"
     st.caption(MAP_CONTROLS)
 
+    doctor_locs = data["doctor_locs"]
     if not doctor_locs.empty:
+        scripts_by_npi = data["scripts"][0]
         doc_with_scripts = doctor_locs.copy()
         if not scripts_by_npi.empty:
             doc_with_scripts = doc_with_scripts.merge(scripts_by_npi, on="npi", how="left")
@@ -717,6 +787,7 @@ if page == "340b HUMC Dashboard":
     st.subheader("Patient Service Areas")
     st.caption(MAP_CONTROLS)
 
+    patients_by_zip = data["patients_by_zip"]
     if not patients_by_zip.empty:
         p_mid_lat, p_mid_lon = 40.7440, -74.0324  # Hoboken, NJ
         patient_deck = pdk.Deck(
@@ -764,28 +835,25 @@ elif page == "Analysis":
 
     st.markdown("## Financial Analysis — Month-by-Month Breakdown")
 
-    # --- Build monthly summary from date-filtered dataset ---
-    fa_df = df.copy()
-    fa_paid = fa_df[fa_df["Total Price Paid"] > 0]
-    fa_unpaid = fa_df[fa_df["Total Price Paid"] == 0]
-
-    fa_months = sorted(fa_df["Month"].unique())
-    fa_rows = []
-    for m in fa_months:
-        tp = fa_paid.loc[fa_paid["Month"] == m, "Total Price Paid"].sum()
-        b340 = fa_paid.loc[fa_paid["Month"] == m, "340B Value"].sum() if "340B Value" in fa_paid.columns else 0
-        spread = tp - b340
-        wac = fa_unpaid.loc[fa_unpaid["Month"] == m, "WAC Value"].sum() if "WAC Value" in fa_unpaid.columns else 0
-        fa_rows.append({"Month": m, "Total Price Paid": tp, "340B Value": b340, "Spread": spread, "WAC (Unfilled)": wac})
+    df_scoped = _claims_or_stop()
 
-    fa_summary = pd.DataFrame(fa_rows)
+    # --- Build monthly summary from date-filtered dataset ---
+    # One grouped pass gives the months and the 340B / non-340B split
+    # Closed months come from the frozen store (see data/frozen.py)
+    fa_by_type = monthly_aggregate(
+        "analysis", df_scoped, lambda rows: monthly_metrics(rows, by=["Inventory_Type"]),
+        claims_version(), data["scope"], start_dt, end_dt, today=today,
+    )
+    fa_summary = fa_by_type.groupby("Month", as_index=False, observed=True)[METRICS].sum()
 
     # Totals row
-    fa_totals = fa_summary[["Total Price Paid", "340B Value", "Spread", "WAC (Unfilled)"]].sum()
+    fa_totals = fa_summary[METRICS].sum()
 
     # Split 340B vs non-340B for clarity
-    fa_paid_340b = fa_paid[fa_paid.get("Inventory_Type", "340B") == "340B"] if "Inventory_Type" in fa_paid.columns else fa_paid
-    fa_340b_revenue = fa_paid_340b["Total Price Paid"].sum()
+    if "Inventory_Type" in fa_by_type.columns:
+        fa_340b_revenue = fa_by_type.loc[fa_by_type["Inventory_Type"] == "340B", "Total Price Paid"].sum()
+    else:
+        fa_340b_revenue = fa_totals["Total Price Paid"]
     fa_non340b_revenue = fa_totals["Total Price Paid"] - fa_340b_revenue
 
     # KPIs
@@ -851,15 +919,10 @@ elif page == "Analysis":
         "Sorted by WAC value to highlight biggest revenue recovery opportunities."
     )
 
-    # Dedup unfilled — use df_scoped (all dates) for 3-month lookback
-    fa_unfilled_src = df_scoped[df_scoped["Total Price Paid"] == 0].copy()
-    fa_unpaid_dedup = (
-        fa_unfilled_src
-        .sort_values("WAC Value" if "WAC Value" in fa_unfilled_src.columns else "WAC Price", ascending=False)
-        .drop_duplicates(subset=["Patient Full Name", "Dispensed Drug", "Month"], keep="first")
-    )
-
-    dupes_removed = len(fa_unfilled_src) - len(fa_unpaid_dedup)
+    # Dedup unfilled — use df_scoped (all dates) for 3-month lookback.  The
+    # highest-WAC entry (then the latest, then the highest Rx / fill number)
+    # of each patient + drug + month is kept; see data/dedup.py
+    fa_unpaid_dedup, dupes_removed = dedup_unfilled(df_scoped, claims_version(), data["scope"])
     if dupes_removed > 0:
         st.info(f"Removed **{dupes_removed}** duplicate entries (same patient + drug + month).")
 
@@ -880,9 +943,9 @@ elif page == "Analysis":
         uk2.metric("Total WAC at Risk", f"${total_unfilled_wac:,.0f}")
 
         # Build pivot: scripts + WAC by reason by month
-        pivot_scripts = fa_recent.groupby(["Rx Priority", "Month"]).size().unstack(fill_value=0)
+        pivot_scripts = fa_recent.groupby(["Rx Priority", "Month"], observed=True).size().unstack(fill_value=0)
         wac_col = "WAC Value" if "WAC Value" in fa_recent.columns else "WAC Price"
-        pivot_wac = fa_recent.groupby(["Rx Priority", "Month"])[wac_col].sum().unstack(fill_value=0)
+        pivot_wac = fa_recent.groupby(["Rx Priority", "Month"], observed=True)[wac_col].sum().unstack(fill_value=0)
 
         # Build display dataframe
         reason_rows = []
@@ -948,7 +1011,7 @@ elif page == "Analysis":
             )
 
         # Transfers vs actionable
-        transfer_reasons = {"Transfer", "Approved - Transfer"}
+        transfer_reasons = priorities_in("Transfer Out (Rare Not In-Network)")
         transfer_scripts = int(reason_df[reason_df["Rx Priority"].isin(transfer_reasons)]["Total Scripts"].sum())
         transfer_wac = reason_df[reason_df["Rx Priority"].isin(transfer_reasons)]["Total WAC"].sum()
         pa_scripts = int(reason_df[reason_df["Rx Priority"].str.contains("PA |PA$", regex=True, na=False)]["Total Scripts"].sum())
@@ -999,14 +1062,23 @@ elif page == "Gout Program":
 
     st.markdown("## Gout Infusion Program")
 
+    # Gout data is indexed by date
+    daily_gout = date_slice(data["gout"], start_dt, end_dt, column=None).copy()
     if daily_gout.empty:
         st.info("No gout program data available for the selected date range.")
         st.stop()
 
-    gout_cash_actual = daily_gout["Paid"].sum()
-    gout_unpaid_inf = daily_gout.loc[daily_gout["Paid"] == 0, "Infusions"].sum()
+    # KPI totals and the projected running total come from daily prefix sums
+    gout_all = data["gout"]
+    unpaid_inf = gout_all["Infusions"].where(gout_all["Paid"] == 0, 0)
+    gout_prefix = prefix_sums(
+        gout_all.assign(**{"Unpaid Infusions": unpaid_inf, "Projected Daily Cash": unpaid_inf * EST_PAID_PER_INFUSION}),
+        ["Paid", "Infusions", "Unpaid Infusions", "Projected Daily Cash"], gout_version(), column=None,
+    )
+    gout_cash_actual = gout_prefix.total("Paid", start_dt, end_dt)
+    gout_unpaid_inf = gout_prefix.total("Unpaid Infusions", start_dt, end_dt)
     gout_cash_projected = gout_cash_actual + gout_unpaid_inf * EST_PAID_PER_INFUSION
-    total_inf = daily_gout["Infusions"].sum()
+    total_inf = gout_prefix.total("Infusions", start_dt, end_dt)
     paid_inf = total_inf - gout_unpaid_inf
     rev_per_inf = gout_cash_actual / max(paid_inf, 1)
 
@@ -1020,12 +1092,11 @@ elif page == "Gout Program":
 
     # Cumulative chart
     st.subheader("Cash Collected vs Projected")
-    gout_df = daily_gout.copy().sort_index()
+    gout_df = daily_gout
     gout_df["Daily Paid"] = gout_df["Paid"]
-    gout_df["Projected Daily Cash"] = 0.0
-    gout_df.loc[gout_df["Daily Paid"] == 0, "Projected Daily Cash"] = gout_df["Infusions"] * EST_PAID_PER_INFUSION
     last_actual_cash = gout_df["Cumulative Cash"].iloc[-1] if not gout_df.empty else 0
-    gout_df["Projected Cash From Actual"] = last_actual_cash + gout_df["Projected Daily Cash"].cumsum()
+    projected = gout_prefix.series(["Projected Daily Cash"], start_dt, end_dt)
+    gout_df["Projected Cash From Actual"] = last_actual_cash + projected["Cumulative Projected Daily Cash"].to_numpy()
     gout_df["Projected Cash Masked"] = gout_df["Projected Cash From Actual"].where(gout_df["Daily Paid"] == 0)
 
     fig = go.Figure()
@@ -1044,11 +1115,12 @@ elif page == "Gout Program":
 
     # Monthly cash
     st.subheader("Monthly Cash Collected")
-    gout_monthly = (
-        daily_gout.copy()
-        .assign(Month=lambda x: x.index.to_period("M").astype(str))
-        .groupby("Month", as_index=False)["Cumulative Cash"]
-        .max()
+    # Closed months come from the frozen store (see data/frozen.py)
+    gout_monthly = monthly_aggregate(
+        "gout_cash", data["gout"],
+        lambda rows: rows.assign(Month=rows.index.to_period("M").astype(str))
+        .groupby("Month", as_index=False)["Cumulative Cash"].max(),
+        gout_version(), (), start_dt, end_dt, column=None, today=today,
     )
     gout_monthly["Monthly Cash"] = gout_monthly["Cumulative Cash"].diff().fillna(gout_monthly["Cumulative Cash"])
 
@@ -1065,7 +1137,8 @@ elif page == "340b Insight Dashboard":
 
     st.markdown("## Insight Specialty Pharmacy — CCRX Report")
 
-    # _insight_all already loaded at startup (cached); reuse it here
+    _insight_all = data["insight"]
+    _tracker_all = data["tracker"]
     if _insight_all.empty:
         st.error(
             "Insight report data is not available. "
@@ -1073,24 +1146,24 @@ elif page == "340b Insight Dashboard":
         )
         st.stop()
 
-    # ── Scope data to user's doctor list (viewer / bizdev with doctors) or show all (admin) ──
+    # ── Scoped to user's doctor list (viewer / bizdev with doctors) or all (admin) ──
+    insight_df = data["insight_scoped"]
     if _role in ("viewer", "bizdev"):
-        insight_df = filter_insight_by_doctors(_insight_all, _insight_doctor_list)
         st.caption(f"Showing data for your {len(_insight_doctor_list)} assigned doctor(s).")
-    else:
-        insight_df = _insight_all
 
     # ── Chronological month order ──
     month_order = sorted(insight_df["Month"].dropna().unique().tolist())
 
     # ── Aggregate by Doctor + Month (each row in source = 1 script/claim) ──
-    summary = (
-        insight_df.groupby(["Doctor", "Month"], as_index=False)
-        .agg(
+    # Closed months come from the frozen store (see data/frozen.py)
+    summary = monthly_aggregate(
+        "insight", insight_df,
+        lambda rows: rows.groupby(["Doctor", "Month"], as_index=False).agg(
             Scripts=("Doctor", "count"),
             Revenue=("Revenue", "sum"),
             Drug_Cost=("Drug Cost", "sum"),
-        )
+        ),
+        insight_version(), data["scope"], today=today,
     )
     # Net Profit computed here — source column is unreliable (mostly $0)
     summary["Net_Profit"] = summary["Revenue"] - summary["Drug_Cost"]
@@ -1178,47 +1251,53 @@ elif page == "340b Insight Dashboard":
     # ── Claim-Level Detail Table ──
     st.subheader("Claim Detail")
 
-    i_col1, i_col2, i_col3 = st.columns([2, 2, 3])
-    doctor_opts = ["All"] + sorted(insight_df["Doctor"].unique().tolist())
-    sel_doctor = i_col1.selectbox("Doctor", doctor_opts, key="insight_doc_filter")
-    month_opts = ["All"] + month_order
-    sel_month = i_col2.selectbox("Month", month_opts, key="insight_month_filter")
-    drug_opts = ["All"] + sorted(insight_df["Drug"].dropna().unique().tolist())
-    sel_drug = i_col3.selectbox("Drug", drug_opts, key="insight_drug_filter")
-
-    detail_df = insight_df.copy()
-    if sel_doctor != "All":
-        detail_df = detail_df[detail_df["Doctor"] == sel_doctor]
-    if sel_month != "All":
-        detail_df = detail_df[detail_df["Month"] == sel_month]
-    if sel_drug != "All":
-        detail_df = detail_df[detail_df["Drug"] == sel_drug]
-
-    st.caption(f"{len(detail_df):,} claims")
-    st.dataframe(
-        detail_df[["Date", "Doctor", "Drug", "Inventory", "Qty",
-                   "Revenue", "Drug Cost", "Net Profit",
-                   "Primary Remit", "Secondary Remit", "Patient Paid"]]
-        .sort_values("Date", ascending=False),
-        use_container_width=True,
-        hide_index=True,
-        column_config={
-            "Date": st.column_config.DateColumn("Date", format="MM/DD/YYYY"),
-            "Revenue":       st.column_config.NumberColumn("Revenue",    format="$%.2f"),
-            "Drug Cost":     st.column_config.NumberColumn("Drug Cost",  format="$%.2f"),
-            "Net Profit":    st.column_config.NumberColumn("Net Profit", format="$%.2f"),
-            "Primary Remit": st.column_config.NumberColumn("Primary",    format="$%.2f"),
-            "Secondary Remit": st.column_config.NumberColumn("Secondary", format="$%.2f"),
-            "Patient Paid":  st.column_config.NumberColumn("Pt Paid",    format="$%.2f"),
-        },
-    )
+    # The filters rerun only this fragment; insight_df and month_order come
+    # from the full page run.
+    @st.fragment
+    def _claim_detail(insight_df, month_order):
+        i_col1, i_col2, i_col3 = st.columns([2, 2, 3])
+        doctor_opts = ["All"] + sorted(insight_df["Doctor"].unique().tolist())
+        sel_doctor = i_col1.selectbox("Doctor", doctor_opts, key="insight_doc_filter")
+        month_opts = ["All"] + month_order
+        sel_month = i_col2.selectbox("Month", month_opts, key="insight_month_filter")
+        drug_opts = ["All"] + sorted(insight_df["Drug"].dropna().unique().tolist())
+        sel_drug = i_col3.selectbox("Drug", drug_opts, key="insight_drug_filter")
+
+        detail_df = insight_df.copy()
+        if sel_doctor != "All":
+            detail_df = detail_df[detail_df["Doctor"] == sel_doctor]
+        if sel_month != "All":
+            detail_df = detail_df[detail_df["Month"] == sel_month]
+        if sel_drug != "All":
+            detail_df = detail_df[detail_df["Drug"] == sel_drug]
+
+        st.caption(f"{len(detail_df):,} claims")
+        st.dataframe(
+            detail_df[["Date", "Doctor", "Drug", "Inventory", "Qty",
+                       "Revenue", "Drug Cost", "Net Profit",
+                       "Primary Remit", "Secondary Remit", "Patient Paid"]]
+            .sort_values("Date", ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Date": st.column_config.DateColumn("Date", format="MM/DD/YYYY"),
+                "Revenue":       st.column_config.NumberColumn("Revenue",    format="$%.2f"),
+                "Drug Cost":     st.column_config.NumberColumn("Drug Cost",  format="$%.2f"),
+                "Net Profit":    st.column_config.NumberColumn("Net Profit", format="$%.2f"),
+                "Primary Remit": st.column_config.NumberColumn("Primary",    format="$%.2f"),
+                "Secondary Remit": st.column_config.NumberColumn("Secondary", format="$%.2f"),
+                "Patient Paid":  st.column_config.NumberColumn("Pt Paid",    format="$%.2f"),
+            },
+        )
 
-    st.download_button(
-        "Download Insight Report (CSV)",
-        data=detail_df.to_csv(index=False).encode(),
-        file_name="insight_ccrx_report.csv",
-        mime="text/csv",
-    )
+        st.download_button(
+            "Download Insight Report (CSV)",
+            data=detail_df.to_csv(index=False).encode(),
+            file_name="insight_ccrx_report.csv",
+            mime="text/csv",
+        )
+
+    _claim_detail(insight_df, month_order)
 
     # ============================================================
     #  PATIENT TRACKER
@@ -1231,51 +1310,59 @@ elif page == "340b Insight Dashboard":
     else:
         # Scope to user's doctors
         if _role in ("viewer", "bizdev"):
-            tracker_df = filter_tracker_by_doctors(_tracker_all, _insight_doctor_list)
+            tracker_df = filter_tracker_by_doctors(_tracker_all, _insight_doctor_list, data["providers"])
         else:
             tracker_df = _tracker_all.copy()
 
         if tracker_df.empty:
             st.info("No patient tracker records found for your assigned doctors.")
         else:
-            # ── Filters row ──
-            t_col1, t_col2 = st.columns([2, 3])
-
-            status_opts = ["All"] + sorted(
-                [s for s in tracker_df["Status"].unique() if s], key=str.lower
-            )
-            selected_status = t_col1.selectbox("Status", status_opts, key="tracker_status")
-
-            search = t_col2.text_input("Search (initials / medication / notes)", key="tracker_search")
-
-            # Apply filters
-            tdf = tracker_df.copy()
-            if selected_status != "All":
-                tdf = tdf[tdf["Status"] == selected_status]
-            if search:
-                mask = (
-                    tdf["Patient Name"].str.contains(search, case=False, na=False)
-                    | tdf["Medication"].str.contains(search, case=False, na=False)
-                    | tdf["Insight Team Notes"].str.contains(search, case=False, na=False)
+            # Searched text per record, built once per page run so a keystroke
+            # in the search box is a single substring scan
+            search_text = (
+                tracker_df["Patient Name"].fillna("")
+                + "\x1f" + tracker_df["Medication"].fillna("")
+                + "\x1f" + tracker_df["Insight Team Notes"].fillna("")
+            ).str.lower()
+
+            # The status filter and search box rerun only this fragment
+            @st.fragment
+            def _tracker_table(tracker_df, search_text):
+                # ── Filters row ──
+                t_col1, t_col2 = st.columns([2, 3])
+
+                status_opts = ["All"] + sorted(
+                    [s for s in tracker_df["Status"].unique() if s], key=str.lower
+                )
+                selected_status = t_col1.selectbox("Status", status_opts, key="tracker_status")
+
+                search = t_col2.text_input("Search (initials / medication / notes)", key="tracker_search")
+
+                # Apply filters
+                tdf = tracker_df
+                if selected_status != "All":
+                    tdf = tdf[tdf["Status"] == selected_status]
+                if search:
+                    tdf = tdf[search_text.loc[tdf.index].str.contains(search.lower(), regex=False)]
+
+                st.caption(f"{len(tdf):,} patient record(s)")
+
+                # ── Display columns ──
+                display_cols = [
+                    "Date", "Patient Name", "Medication", "Status",
+                    "Provider", "Insurance Type", "Tracking Number", "Insight Team Notes",
+                ]
+                display_cols = [c for c in display_cols if c in tdf.columns]
+
+                st.dataframe(
+                    tdf[display_cols].sort_values("Date", ascending=False, na_position="last"),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Date": st.column_config.DateColumn("Date", format="MM/DD/YYYY"),
+                        "Insight Team Notes": st.column_config.TextColumn("Notes", width="large"),
+                        "Insurance Type": st.column_config.TextColumn("Insurance", width="medium"),
+                    },
                 )
-                tdf = tdf[mask]
-
-            st.caption(f"{len(tdf):,} patient record(s)")
-
-            # ── Display columns ──
-            display_cols = [
-                "Date", "Patient Name", "Medication", "Status",
-                "Provider", "Insurance Type", "Tracking Number", "Insight Team Notes",
-            ]
-            display_cols = [c for c in display_cols if c in tdf.columns]
 
-            st.dataframe(
-                tdf[display_cols].sort_values("Date", ascending=False, na_position="last"),
-                use_container_width=True,
-                hide_index=True,
-                column_config={
-                    "Date": st.column_config.DateColumn("Date", format="MM/DD/YYYY"),
-                    "Insight Team Notes": st.column_config.TextColumn("Notes", width="large"),
-                    "Insurance Type": st.column_config.TextColumn("Insurance", width="medium"),
-                },
-            )
+            _tracker_table(tracker_df, search_text)
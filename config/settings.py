@@ -15,6 +15,21 @@ DATA_DIR = BASE_DIR / "data_files"
 
 CLAIMS_FILE = DATA_DIR / "claims_with_pricing_v3.csv"
 GOUT_FILE = DATA_DIR / "340 B.xlsx"
+# zip5 -> lat/lon/city/state index; build with `python -m data.zipgeo`
+ZIP_INDEX_FILE = Path(os.environ.get("ZIP_INDEX_FILE", str(DATA_DIR / "zip_centroids.npy")))
+
+# Contract-pharmacy claim exports feeding the 340B HUMC dashboard.
+# Key = value of the "Source" column.  "file" is the CSV export; "columns"
+# maps that export's own headers onto the claims_with_pricing_v3 names that
+# load_claims expects (leave empty when the headers already match).
+# Sources whose file is missing are skipped.
+CLAIM_SOURCES: dict = {
+    "Rare": {"file": CLAIMS_FILE, "columns": {}},
+    # "Example Pharmacy": {
+    #     "file": DATA_DIR / "example_pharmacy_claims.csv",
+    #     "columns": {"Fill Date": "Created On", "Rx #": "Rx Number", "Refill #": "Fill Number"},
+    # },
+}
 
 PATIENT_TRACKER_FILE = Path(
     os.environ.get("PATIENT_TRACKER_FILE", str(DATA_DIR / "im2_tracker.csv"))
@@ -29,7 +44,16 @@ INSIGHT_FILE = Path(
     )
 )
 
+# Backend for the .xlsx loaders (see data/xlsx.py): "calamine", "openpyxl",
+# or "auto" = calamine when python-calamine is installed.
+XLSX_ENGINE = os.environ.get("XLSX_ENGINE", "auto").lower()
+
 START_DATE = pd.Timestamp("2025-01-01")
+
+# Claims files larger than this are streamed in chunks of CLAIMS_CHUNK_ROWS
+# rows, dropping rows before START_DATE chunk by chunk.
+CLAIMS_STREAM_THRESHOLD_MB = float(os.environ.get("CLAIMS_STREAM_THRESHOLD_MB", "256"))
+CLAIMS_CHUNK_ROWS = int(os.environ.get("CLAIMS_CHUNK_ROWS", "200000"))
 SPRX_RATE = 0.30
 EST_PAID_PER_INFUSION = 37_500
 
@@ -39,6 +63,78 @@ DOCTORS_SHEET_CSV = os.environ.get(
     "1JyxkS1T_GrkNm2O4EsgOhAqnWWjTA805VwFFZ3K2kUA"
     "/export?format=csv",
 )
+# Local copy of the doctors sheet the dashboard reads (see data/doctors.py);
+# re-fetched in the background once it is older than DOCTORS_REFRESH_SECONDS.
+DOCTORS_CACHE_FILE = Path(
+    os.environ.get("DOCTORS_CACHE_FILE", str(DATA_DIR / "doctors_sheet.csv"))
+)
+DOCTORS_REFRESH_SECONDS = int(os.environ.get("DOCTORS_REFRESH_SECONDS", "300"))
+
+# CMS NPI Registry used to enrich doctors with practice locations
+# (data/npi_lookup.py).  Point NPI_REGISTRY_URL at a local fake in tests.
+NPI_REGISTRY_URL = os.environ.get("NPI_REGISTRY_URL", "https://npiregistry.cms.hhs.gov/api/")
+NPI_WORKERS = int(os.environ.get("NPI_WORKERS", "4"))
+NPI_REQUESTS_PER_SECOND = float(os.environ.get("NPI_REQUESTS_PER_SECOND", "5"))
+NPI_RETRIES = int(os.environ.get("NPI_RETRIES", "3"))
+# Local store of registry answers (data/npi_store.py).  Records are refreshed
+# after NPI_REFRESH_DAYS; "no such NPI" answers are retried after NPI_MISS_TTL_DAYS.
+NPI_STORE_FILE = Path(os.environ.get("NPI_STORE_FILE", str(DATA_DIR / "npi_cache.sqlite")))
+NPI_REFRESH_DAYS = float(os.environ.get("NPI_REFRESH_DAYS", "90"))
+NPI_MISS_TTL_DAYS = float(os.environ.get("NPI_MISS_TTL_DAYS", "7"))
+
+# Provider id crosswalk (canonical id -> NPI, aliases, source rows) written by
+# data/providers.py whenever a source's prescriber names change.
+PROVIDER_CROSSWALK_FILE = Path(
+    os.environ.get("PROVIDER_CROSSWALK_FILE", str(DATA_DIR / "provider_crosswalk.parquet"))
+)
+
+# A month's aggregates are frozen (see data/frozen.py) once this many days
+# have passed since it ended; later months are recomputed on every run.
+CLOSED_MONTH_GRACE_DAYS = int(os.environ.get("CLOSED_MONTH_GRACE_DAYS", "10"))
+
+# ---------- Unfilled script buckets (data/unfilled.py) ----------
+
+# Buckets in display order; rows no rule matches go to UNFILLED_DEFAULT_BUCKET.
+UNFILLED_BUCKETS = [
+    "Actionable NOW",
+    "Transfer Out (Rare Not In-Network)",
+    "Waiting on External",
+    "Likely Lost",
+    "Other",
+]
+UNFILLED_DEFAULT_BUCKET = "Other"
+
+# Primary Claim Message patterns (case-insensitive regex) -> bucket.
+# These win over the Rx Priority table; the first matching pattern applies.
+UNFILLED_MESSAGE_BUCKETS: dict = {
+    r"M/I PHARMACY NUMBER": "Transfer Out (Rare Not In-Network)",
+}
+
+# Rx Priority -> bucket
+UNFILLED_PRIORITY_BUCKETS: dict = {
+    **dict.fromkeys([
+        "New Fill", "Pending Clinical Notes", "Pending Rx Clarification",
+        "* Insurance Info Needed", "Pending Labs", "MD request sent for more info",
+        "Pending Med", "Pending Hardcopy", "Pending Hardcopy + Med",
+        "Pending Telehealth", "Pending Telehealth + Hardcopy + Med",
+        "Pending communication w. PT", "LVM", "MD Sent Clarified Rx",
+        "Pharmacist Check", "Pending 340B Review",
+        "Pending Formulary Medication Change", "Need More Recent Labs/Notes",
+        "MDO Initiate PA", "Electronic PA sent to MDO",
+        "Scheduling", "Scheduling - Initial Assessment",
+    ], "Actionable NOW"),
+    **dict.fromkeys([
+        "PA Under Review", "Peer-to-Peer", "Pending Foundation Assistance",
+        "Pending Financial Assistance or PAP", "Sent NJ PAAD Application",
+        "Bridge",
+    ], "Waiting on External"),
+    **dict.fromkeys([
+        "PA Denied", "PT Refused", "MDO Canceled", "Switched Therapies",
+        "Therapy Not Appropriate", "Plan Exclusion", "High Copay",
+        "Retail Med", "* Maintenance to be put on hold",
+    ], "Likely Lost"),
+    **dict.fromkeys(["Transfer", "Approved - Transfer"], "Transfer Out (Rare Not In-Network)"),
+}
 
 PAGE_TITLE = "CFO Revenue & BizDev Dashboard"
 
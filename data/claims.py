@@ -1,14 +1,69 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
 import pandas as pd
 import streamlit as st
-from config.settings import CLAIMS_FILE, START_DATE
+from config.settings import (
+    CLAIMS_FILE, CLAIM_SOURCES, START_DATE, CLAIMS_STREAM_THRESHOLD_MB, CLAIMS_CHUNK_ROWS,
+)
+from data.dates import parse_dates, sort_by_date
 from data.phi import make_phi_safe
+from data.ingest import ingest
+from data.schema import apply_schema, concat_categorical, infer_numeric, memory_report
 
-@st.cache_data
-def load_claims():
-    df = pd.read_csv(CLAIMS_FILE)
+# Bump whenever normalize_claims or CLAIMS_SCHEMA change so existing
+# snapshots are rebuilt.
+SNAPSHOT_VERSION = 2
+_SNAPSHOT_TAG = "normalized"
+# A claim row is identified by its Rx and fill; refills share the Rx Number.
+CLAIM_KEY = ["Rx Number", "Fill Number"]
+
+# Declared dtypes of the normalized claims frame (see data.schema).
+# Low-cardinality text is categorical; the additive money measures the
+# dashboard sums stay float64 so totals don't pick up float32 rounding.
+CLAIMS_SCHEMA = {
+    "Rx Number": "Int32",
+    "Fill Number": "Int16",
+    "Refills Remaining": "Int16",
+    "Day Supply": "Int16",
+    "Prescriber NPI": "Int64",
+    "Month": "month",
+    "Origin": "category",
+    "New or Refill": "category",
+    "Dispensed Drug": "category",
+    "Dispensed Inventory": "category",
+    "Biz Dev Name": "category",
+    "Prescriber Facility + Territory": "category",
+    "Prescriber Full Name": "category",
+    "Prescriber Classification": "category",
+    "Prescriber Specialization": "category",
+    "Prescriber City": "category",
+    "Prescriber State": "category",
+    "Prescriber Zip Code": "category",
+    "Primary Third Party Plan": "category",
+    "PCN": "category",
+    "Primary Plan Type": "category",
+    "Primary Claim Status": "category",
+    "Primary Reject Code": "category",
+    "Transfer Out Pharmacy": "category",
+    "Transfer Out Reason": "category",
+    "Rx Priority": "category",
+    "Inventory_Type": "category",
+    "340B Price": "float32?",
+    "Spread": "float32?",
+    "Pkg_Size": "float32?",
+    "Packages": "float32?",
+}
+
+
+def _clean_claims(df: pd.DataFrame, columns: dict | None = None) -> pd.DataFrame:
     df.columns = df.columns.str.strip().str.replace(r"\s+", " ", regex=True)
+    if columns:
+        df = df.rename(columns=columns)
 
-    df["Date"] = pd.to_datetime(df["Created On"], errors="coerce")
+    df["Date"] = parse_dates(df["Created On"])[0]
     df = df[df["Date"] >= START_DATE]
     df["Month"] = df["Date"].dt.to_period("M").astype(str)
 
@@ -23,6 +78,9 @@ def load_claims():
         df["Biz Dev Name"] = "Unknown"
     df["Biz Dev Name"] = df["Biz Dev Name"].fillna("Unknown").astype(str).str.strip()
 
+    if "Rx Priority" in df.columns:
+        df["Rx Priority"] = df["Rx Priority"].fillna("Unknown")
+
     for col in ["Total Price Paid", "WAC Price", "340B Value", "WAC Value"]:
         if col in df.columns:
             df[col] = (
@@ -54,3 +112,111 @@ def load_claims():
     df.loc[df["Total Price Paid"] == 0, "Potential Revenue (Raw)"] = df["WAC Price"]
 
     return df
+
+
+# Text columns _clean_claims derives itself; never re-inferred as numbers.
+_DERIVED_TEXT = {"Dispensed Drug", "Biz Dev Name", "Month", "Inventory_Type"}
+
+
+def normalize_claims(df: pd.DataFrame, columns: dict | None = None) -> pd.DataFrame:
+    """Apply the dashboard's cleaning rules and CLAIMS_SCHEMA to a raw export.
+
+    *columns* renames the export's headers onto the names used here (see
+    CLAIM_SOURCES).
+    """
+    return apply_schema(_clean_claims(df, columns), CLAIMS_SCHEMA)
+
+
+def stream_claims(
+    path=CLAIMS_FILE, chunk_rows: int = CLAIMS_CHUNK_ROWS, columns: dict | None = None
+) -> pd.DataFrame:
+    """Normalize a claims CSV chunk by chunk.
+
+    Each chunk is read as text, cleaned and cut at START_DATE before the next
+    one is read, so peak memory is one raw chunk plus the rows kept so far.
+    Numeric types and CLAIMS_SCHEMA are applied once over the kept rows, which
+    gives the same frame as normalize_claims on the whole file.
+    """
+    df = pd.concat(
+        _clean_claims(chunk, columns)
+        for chunk in pd.read_csv(path, dtype=str, chunksize=chunk_rows)
+    )
+    return apply_schema(infer_numeric(df, skip=_DERIVED_TEXT), CLAIMS_SCHEMA)
+
+
+def read_claims(path=CLAIMS_FILE, columns: dict | None = None) -> pd.DataFrame:
+    """Read and normalize a claims CSV, streaming it if it is large."""
+    if os.path.getsize(path) > CLAIMS_STREAM_THRESHOLD_MB * 2**20:
+        return stream_claims(path, columns=columns)
+    return normalize_claims(pd.read_csv(path), columns)
+
+
+def ingest_claims(source: str):
+    """Sync the persisted store of one CLAIM_SOURCES entry; return (df, stats).
+
+    Each source has its own snapshot next to its CSV, so one pharmacy's new
+    export never invalidates another's.  Only rows that are new or changed
+    since the last ingest (by CLAIM_KEY and raw row hash) are re-normalized;
+    see data.ingest.
+    """
+    spec = CLAIM_SOURCES[source]
+    columns = spec.get("columns") or {}
+    key = {
+        "version": SNAPSHOT_VERSION,
+        "start_date": str(START_DATE.date()),
+        "columns": columns,
+    }
+    df, stats = ingest(
+        spec["file"], partial(normalize_claims, columns=columns), CLAIM_KEY, _SNAPSHOT_TAG, key,
+        read=partial(read_claims, columns=columns), chunk_rows=CLAIMS_CHUNK_ROWS, columns=columns,
+    )
+    df["Source"] = pd.Series(source, index=df.index, dtype="category")
+    return df, stats
+
+
+def available_sources() -> list:
+    """Names of the CLAIM_SOURCES entries whose file is present."""
+    return [name for name, spec in CLAIM_SOURCES.items() if Path(spec["file"]).exists()]
+
+
+def claims_version() -> tuple:
+    """Size and mtime of each available claim file plus SNAPSHOT_VERSION.
+
+    Cheap to compute on every rerun; use it to key caches derived from
+    load_claims.
+    """
+    version = [SNAPSHOT_VERSION]
+    for name in available_sources():
+        stat = os.stat(CLAIM_SOURCES[name]["file"])
+        version.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(version)
+
+
+@st.cache_data
+def load_claims():
+    """Return normalized claims from every available claim source.
+
+    Sources are ingested in parallel from their own snapshots and tagged with
+    a "Source" column.  Each snapshot is keyed on its CSV's size, mtime and
+    content hash; when a CSV changes only its new or changed rows are
+    normalized (see ingest_claims).  Rows are sorted by Date so date windows
+    can be sliced (see data.dates.date_slice).
+    """
+    sources = available_sources()
+    if not sources:
+        raise FileNotFoundError(f"No claim source files found (expected {CLAIMS_FILE})")
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        frames = list(pool.map(lambda name: ingest_claims(name)[0], sources))
+    return sort_by_date(frames[0] if len(frames) == 1 else concat_categorical(frames))
+
+
+if __name__ == "__main__":
+    cleaned = _clean_claims(pd.read_csv(CLAIMS_FILE))
+    report = memory_report(cleaned, apply_schema(cleaned.copy(), CLAIMS_SCHEMA))
+    print(report.to_string())
+    total_before, total_after = report["bytes_before"].sum(), report["bytes_after"].sum()
+    print(
+        f"\nTotal: {total_before / 1e6:,.2f} MB -> {total_after / 1e6:,.2f} MB "
+        f"({1 - total_after / max(total_before, 1):.0%} saved)"
+    )
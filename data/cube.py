@@ -0,0 +1,86 @@
+"""
+Pre-aggregated claims cube for the 340B HUMC dashboard.
+
+Every section of the page is a sum over some grouping of the claims, so the
+scoped claims are rolled up once into one row per
+
+    Date x Biz Dev Name x Prescriber Full Name x Dispensed Drug
+         x Inventory_Type x Status (Paid / Unpaid / Other)
+
+with additive measures.  A rerun then only slices the cube by date range and
+Biz Dev and sums cells, so its cost follows the number of distinct cells,
+not the number of claims.
+
+The 30-day potential / unable-to-fill split depends on today's date, so the
+cube keeps the unpaid WAC ("Potential Revenue (Raw)" of unpaid scripts with a
+WAC price) per day and window() splits it at the cutoff.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+DIMENSIONS = [
+    "Date", "Month", "Biz Dev Name", "Prescriber Full Name",
+    "Dispensed Drug", "Inventory_Type", "Status",
+]
+MEASURES = [
+    "Rows", "Scripts", "Infusions", "Actual Revenue", "Potential Revenue (Raw)",
+    "WAC Price", "WAC Value", "340B Value",
+]
+_STATUS = ["Paid", "Unpaid", "Other"]
+
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Roll claims up to one row per DIMENSIONS cell with MEASURES summed."""
+    paid = df["Total Price Paid"]
+    status = np.select([paid > 0, paid == 0], [0, 1], default=2)
+    recoverable = (paid == 0) & (df["WAC Price"] > 0)
+    cells = pd.DataFrame({
+        **{dim: df[dim] for dim in DIMENSIONS if dim != "Status"},
+        "Status": pd.Categorical.from_codes(status, _STATUS),
+        "Rows": 1,
+        # ("Rx Number", "count") on the page skips missing Rx Numbers
+        "Scripts": df["Rx Number"].notna().astype(int),
+        "Infusions": df["Infusions"],
+        "Actual Revenue": df["Actual Revenue"],
+        "Potential Revenue (Raw)": df["Potential Revenue (Raw)"].where(recoverable, 0.0),
+        "WAC Price": df["WAC Price"],
+        "WAC Value": df["WAC Value"],
+        "340B Value": df["340B Value"],
+    })
+    return cells.groupby(DIMENSIONS, as_index=False, observed=True, dropna=False)[MEASURES].sum()
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _claims_cube(key: tuple, _df: pd.DataFrame) -> pd.DataFrame:
+    # key is only the cache key: it identifies the claims and the user scope
+    return build_cube(_df)
+
+
+def claims_cube(df: pd.DataFrame, key: tuple) -> pd.DataFrame:
+    """build_cube(df), cached on *key*, which must change whenever *df* does
+    (e.g. the claims version plus the user whose scope *df* is)."""
+    return _claims_cube(key, df)
+
+
+def window(cube: pd.DataFrame, start, end, cutoff, bizdev: str | None = None) -> pd.DataFrame:
+    """Cells dated *start*..*end* (and of *bizdev*, unless None), with the
+    page's derived measures added:
+
+      Filled                        – rows with Total Price Paid > 0
+      Potential Revenue (Included)  – recoverable WAC dated on/after *cutoff*
+      Unable to Fill Revenue        – recoverable WAC dated before *cutoff*
+      Unable to Fill Scripts        – unpaid rows dated before *cutoff*
+    """
+    cells = cube[(cube["Date"] >= start) & (cube["Date"] <= end)]
+    if bizdev is not None:
+        cells = cells[cells["Biz Dev Name"] == bizdev]
+    cells = cells.copy()
+    recent = (cells["Date"] >= cutoff).to_numpy()
+    unpaid = (cells["Status"] == "Unpaid").to_numpy()
+    cells["Filled"] = cells["Rows"].where(cells["Status"] == "Paid", 0)
+    cells["Potential Revenue (Included)"] = cells["Potential Revenue (Raw)"].where(recent, 0.0)
+    cells["Unable to Fill Revenue"] = cells["Potential Revenue (Raw)"].where(~recent, 0.0)
+    cells["Unable to Fill Scripts"] = cells["Rows"].where(unpaid & ~recent, 0)
+    return cells
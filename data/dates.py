@@ -0,0 +1,134 @@
+"""
+Vectorized parsing of date columns that mix several hand-typed layouts.
+
+Each value is classified by a regular expression, and every class is parsed
+in one batched pd.to_datetime call with an explicit format:
+
+  single – 5/13/2025, 5/13/25, 03-17-2026, 2025-05-13
+  range  – "5/15/2025-5/31/2025"   -> the end date
+  list   – "7/1/2025 7/15 7/29"    -> the last date, in the first one's year
+
+US dates (and so ranges and lists) take two- or four-digit years.
+
+Anything else (Excel datetimes, timestamps, other spellings) goes through a
+single format="mixed" call.  ``python -m data.dates`` lists the values in the
+dashboard's sources that could not be parsed.
+
+The loaders keep their frames sorted by date (sort_by_date) so date windows
+are taken with date_slice: two binary searches and a positional slice
+instead of a comparison over every row.
+"""
+
+import numpy as np
+import pandas as pd
+
+_US_DAY = r"\d{1,2}/\d{1,2}"
+_YEAR = r"(\d{4}|\d{2})"
+
+# Single-date layouts, tried in order: regex -> strptime format
+_SINGLE_FORMATS = {
+    rf"{_US_DAY}/\d{{4}}": "%m/%d/%Y",
+    rf"{_US_DAY}/\d{{2}}": "%m/%d/%y",
+    r"\d{1,2}-\d{1,2}-\d{4}": "%m-%d-%Y",
+    r"\d{4}-\d{1,2}-\d{1,2}": "%Y-%m-%d",
+}
+_RANGE = rf"^.+-\s*({_US_DAY})/{_YEAR}$"
+_LIST = rf"^{_US_DAY}/{_YEAR}(?:\s+{_US_DAY})*\s+({_US_DAY})$"
+_BLANK = {"", "nan", "NaT", "None"}
+
+
+def parse_dates(values: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Parse a column of mixed-layout dates.
+
+    Returns (dates, unparsed): a datetime Series aligned with *values* (NaT
+    where a value is blank or could not be parsed) and the non-blank original
+    values that could not be parsed.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values, values.iloc[0:0]
+
+    text = values.astype(str).str.strip()
+    blank = values.isna() | text.isin(_BLANK)
+    todo = ~blank
+    parts = []
+
+    def take(hit, strings, fmt):
+        nonlocal todo
+        if hit.any():
+            parts.append(pd.to_datetime(strings[hit], format=fmt, errors="coerce"))
+            todo &= ~hit
+
+    def take_us(hit, day, year):
+        # *day* is "m/d"; *year* has two or four digits
+        short = year.str.len() == 2
+        take(hit & short, day + "/" + year, "%m/%d/%y")
+        take(hit & ~short, day + "/" + year, "%m/%d/%Y")
+
+    for pattern, fmt in _SINGLE_FORMATS.items():
+        take(todo & text.str.fullmatch(pattern, na=False), text, fmt)
+
+    end = text.str.extract(_RANGE)
+    take_us(todo & end[0].notna(), end[0], end[1])
+
+    listed = text.str.extract(_LIST)
+    take_us(todo & listed[1].notna(), listed[1], listed[0])
+
+    take(todo, text, "mixed")
+
+    if parts:
+        dates = pd.concat(parts).reindex(values.index)
+    else:
+        dates = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    return dates, values[~blank & dates.isna()]
+
+
+def sort_by_date(df: pd.DataFrame, column: str = "Date") -> pd.DataFrame:
+    """*df* in ascending *column* order (stable, NaT last), as date_slice needs."""
+    return df.sort_values(column, kind="stable", na_position="last")
+
+
+def _dates(df: pd.DataFrame, column: str | None) -> np.ndarray:
+    return (df.index if column is None else df[column]).to_numpy()
+
+
+def date_position(df: pd.DataFrame, when, column: str | None = "Date", side: str = "left") -> int:
+    """Position of the first row of date-sorted *df* dated on/after *when*
+    (side="left") or after it (side="right").  column=None uses the index."""
+    return int(np.searchsorted(_dates(df, column), pd.Timestamp(when).to_datetime64(), side=side))
+
+
+def date_slice(df: pd.DataFrame, start=None, end=None, column: str | None = "Date") -> pd.DataFrame:
+    """Rows of date-sorted *df* dated *start*..*end* (inclusive; None = open).
+
+    Undated (NaT) rows, which sort last, are never included.
+    """
+    lo = 0 if start is None else date_position(df, start, column)
+    if end is None:
+        # NumPy orders NaT after every date, so this finds the dated prefix
+        hi = int(np.searchsorted(_dates(df, column), np.datetime64("NaT")))
+    else:
+        hi = date_position(df, end, column, side="right")
+    return df.iloc[lo:max(lo, hi)]
+
+
+if __name__ == "__main__":
+    from config.settings import CLAIMS_FILE, GOUT_FILE, INSIGHT_FILE
+    from data import gout, insight
+    from data.xlsx import read_sheet
+
+    columns = [
+        ("claims", "Created On",
+         lambda: pd.read_csv(CLAIMS_FILE, dtype=str).rename(columns=str.strip)),
+        ("gout", "Service Date",
+         lambda: read_sheet(GOUT_FILE, gout._SHEET, gout._COLUMNS, required=["Patient"])),
+        ("gout", "Paid Date",
+         lambda: read_sheet(GOUT_FILE, gout._SHEET, gout._COLUMNS, required=["Patient"])),
+        ("insight", "Date Filled",
+         lambda: read_sheet(INSIGHT_FILE, insight._SHEET, insight._COLUMNS,
+                            required=[insight._PRESCRIBER])),
+    ]
+    for name, col, read in columns:
+        dates, unparsed = parse_dates(read()[col])
+        print(f"{name} / {col}: {dates.notna().sum():,} parsed, {len(unparsed):,} unparsed")
+        for value, count in unparsed.astype(str).value_counts().items():
+            print(f"    {value!r} x{count}")
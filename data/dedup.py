@@ -0,0 +1,89 @@
+"""
+Deduplication index for unfilled scripts.
+
+An unfilled script is often entered several times for the same patient,
+drug and month; reports count each (Patient Full Name, Dispensed Drug,
+Month) group once, represented by its highest-WAC row (then the latest,
+then the highest Rx / Fill Number).
+
+DedupIndex keeps, per group hash, the fingerprints of the group's rows and
+the fingerprint of its representative.  update() hashes the current rows,
+diffs them against the previous set and re-ranks only the groups that
+gained or lost a row, so a claims refresh costs a hash pass plus a sort of
+the changed groups instead of a sort of every unfilled claim.  select()
+picks the representatives out of a frame with one isin.
+
+Only pandas and numpy are imported, so the CLI scripts can use it too.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEDUP_KEY = ["Patient Full Name", "Dispensed Drug", "Month"]
+# Representative = first row in this order, all descending
+DEDUP_RANK = ["WAC Value", "Date", "Rx Number", "Fill Number"]
+
+
+def _hash(df: pd.DataFrame, columns: list) -> np.ndarray:
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+class DedupIndex:
+    """Incrementally maintained representatives of the DEDUP_KEY groups of
+    a frame of unfilled claims.  *rank* lists the ordering columns (those
+    missing from the frame are skipped)."""
+
+    def __init__(self, rank: list = DEDUP_RANK):
+        self.rank = rank
+        self.members = None         # fingerprint -> group, rank values, count
+        self.best = pd.Series(dtype="uint64")  # group -> representative fingerprint
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    @property
+    def duplicates(self) -> int:
+        """Rows beyond the first of each group in the last update."""
+        return self.rows - len(self.best)
+
+    def _fingerprints(self, df: pd.DataFrame) -> tuple[np.ndarray, list]:
+        rank = [c for c in self.rank if c in df.columns]
+        identity = DEDUP_KEY + rank + (["Source"] if "Source" in df.columns else [])
+        return _hash(df, identity), rank
+
+    def update(self, df: pd.DataFrame) -> "DedupIndex":
+        """Bring the index in line with *df*, the current unfilled claims."""
+        fps, rank = self._fingerprints(df)
+        current = df[rank].assign(group=_hash(df, DEDUP_KEY)).set_axis(pd.Index(fps, name="fp"))
+        counts = current.index.value_counts()
+        current = current[~current.index.duplicated()]
+        current["count"] = counts.reindex(current.index).to_numpy()
+
+        with self._lock:
+            if self.members is None or list(self.members.columns) != list(current.columns):
+                affected = pd.Index(current["group"].unique())
+                best = pd.Series(dtype="uint64")
+            else:
+                added = current.index.difference(self.members.index)
+                removed = self.members.index.difference(current.index)
+                affected = pd.Index(np.concatenate([
+                    current.loc[added, "group"].to_numpy(),
+                    self.members.loc[removed, "group"].to_numpy(),
+                ])).unique()
+                best = self.best.drop(affected, errors="ignore")
+
+            # Re-rank only the groups whose rows changed
+            changed = current[current["group"].isin(affected)]
+            ranked = changed.sort_values(rank, ascending=False, kind="stable") if rank else changed
+            winners = ranked[~ranked["group"].duplicated()]
+            best = pd.concat([best, pd.Series(winners.index.to_numpy(), index=winners["group"].to_numpy())])
+
+            self.members, self.best, self.rows = current, best, len(df)
+        return self
+
+    def select(self, df: pd.DataFrame) -> pd.DataFrame:
+        """The representative rows of *df* (the frame of the last update)."""
+        fps, _ = self._fingerprints(df)
+        keep = np.isin(fps, self.best.to_numpy()) & ~pd.Index(fps).duplicated()
+        return df[keep]
@@ -1,12 +1,125 @@
+"""
+Loader for the doctors Google Sheet, served from a local copy.
+
+The sheet's CSV export is mirrored to DOCTORS_CACHE_FILE.  load_doctors
+always reads that copy, so a page load never waits on Google; once the copy
+is older than DOCTORS_REFRESH_SECONDS a background thread re-fetches it with
+a conditional request (If-None-Match / If-Modified-Since) and, if the sheet
+changed, swaps the new file in atomically.  Only the very first load, before
+any copy exists, fetches synchronously.
+
+DOCTORS_SHEET_CSV may also be a file:// URL or a plain path (offline tests).
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
 import pandas as pd
 import streamlit as st
-from config.settings import DOCTORS_SHEET_CSV
+from config.settings import DOCTORS_CACHE_FILE, DOCTORS_REFRESH_SECONDS, DOCTORS_SHEET_CSV
 
-@st.cache_data(ttl=300)
-def load_doctors():
-    df = pd.read_csv(DOCTORS_SHEET_CSV)
+_META_FILE = DOCTORS_CACHE_FILE.with_name(DOCTORS_CACHE_FILE.name + ".meta.json")
+_refresh_lock = threading.Lock()
+
+
+def _sheet_url() -> str:
+    if "://" in DOCTORS_SHEET_CSV:
+        return DOCTORS_SHEET_CSV
+    return Path(DOCTORS_SHEET_CSV).resolve().as_uri()
+
+
+def _read_meta() -> dict:
+    try:
+        return json.loads(_META_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def refresh_doctors() -> bool:
+    """Fetch the sheet into the local copy; True if the copy changed.
+
+    Sends the stored ETag / Last-Modified so an unchanged sheet costs a 304.
+    A response that doesn't parse as CSV (e.g. a Google sign-in page) is
+    rejected and the current copy is kept.
+    """
+    meta = _read_meta()
+    request = urllib.request.Request(_sheet_url())
+    if meta.get("etag"):
+        request.add_header("If-None-Match", meta["etag"])
+    if meta.get("last_modified"):
+        request.add_header("If-Modified-Since", meta["last_modified"])
+
+    try:
+        with urllib.request.urlopen(request, timeout=30) as resp:
+            data, headers = resp.read(), resp.headers
+    except urllib.error.HTTPError as err:
+        if err.code != 304:
+            raise
+        data, headers = None, err.headers
+
+    digest = hashlib.sha256(data).hexdigest() if data is not None else meta.get("sha256")
+    changed = data is not None and (
+        digest != meta.get("sha256") or not DOCTORS_CACHE_FILE.exists()
+    )
+    if changed:
+        pd.read_csv(io.BytesIO(data), nrows=5)
+        DOCTORS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(DOCTORS_CACHE_FILE, data)
+
+    meta = {
+        "etag": headers.get("ETag") or meta.get("etag"),
+        "last_modified": headers.get("Last-Modified") or meta.get("last_modified"),
+        "sha256": digest,
+        "checked_at": time.time(),
+    }
+    _write_atomic(_META_FILE, json.dumps(meta, indent=2).encode())
+    return changed
+
+
+def _refresh_in_background():
+    if not _refresh_lock.acquire(blocking=False):
+        return  # a refresh is already running
+
+    def run():
+        try:
+            refresh_doctors()
+        except Exception:
+            pass  # keep serving the local copy; retried on a later load
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=run, name="doctors-refresh", daemon=True).start()
+
+
+@st.cache_data
+def _read_doctors(mtime_ns: int) -> pd.DataFrame:
+    # mtime_ns is only the cache key: a swapped-in copy gets a new one
+    df = pd.read_csv(DOCTORS_CACHE_FILE)
     df.columns = (
         df.columns.str.lower().str.strip().str.replace(" ", "_")
     )
     return df
 
+
+def load_doctors():
+    """Return the doctors sheet from the local copy, refreshing it in the background."""
+    if not DOCTORS_CACHE_FILE.exists():
+        with _refresh_lock:
+            if not DOCTORS_CACHE_FILE.exists():
+                refresh_doctors()
+    elif time.time() - _read_meta().get("checked_at", 0) > DOCTORS_REFRESH_SECONDS:
+        _refresh_in_background()
+    return _read_doctors(DOCTORS_CACHE_FILE.stat().st_mtime_ns)
@@ -1,5 +1,16 @@
-def apply_user_scope(df, user):
-    """Filter the doctors dataframe based on user role."""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config.settings import BIZDEV_USERS, VIEWER_USERS
+
+
+def apply_user_scope(df, user, providers):
+    """Filter the doctors dataframe based on user role.
+
+    *providers* is the data.providers crosswalk the doctors sheet was
+    resolved into; viewers' doctor lists are matched by provider id.
+    """
     role = user["role"]
 
     if role == "admin":
@@ -10,10 +21,7 @@ def apply_user_scope(df, user):
         return df[df["bizdev"].str.lower() == bizdev_name.lower()]
 
     if role == "viewer":
-        doctor_names = [d.lower() for d in user.get("doctors", [])]
-        if "doctor_name" in df.columns:
-            return df[df["doctor_name"].str.lower().isin(doctor_names)]
-        return df.iloc[0:0]
+        return df[providers.mask(df, "doctors", user.get("doctors", []))]
 
     if role == "investor":
         return (
@@ -25,29 +33,62 @@ def apply_user_scope(df, user):
     return df.iloc[0:0]
 
 
-def apply_claims_scope(df, user):
+def _bizdev_mask(df, bizdev_name, doctors, providers):
+    mask = df["Biz Dev Name"].str.lower() == bizdev_name.lower()
+    # Also include claims from explicitly assigned doctors (credit override)
+    return mask.to_numpy(dtype=bool) | providers.mask(df, "claims", doctors)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _claims_scope_rows(key: tuple, bizdev_users: dict, viewer_users: dict, _df, _providers) -> dict:
+    # key identifies _df and _providers; the user dicts are hashed as they are
+    rows = {}
+    for email, info in viewer_users.items():
+        rows[email.lower()] = np.flatnonzero(_providers.mask(_df, "claims", info.get("doctors", [])))
+    # Login checks BizDevs first, so their scope wins for an email in both
+    for email, info in bizdev_users.items():
+        mask = _bizdev_mask(_df, info["bizdev_name"], info.get("doctors", []), _providers)
+        rows[email.lower()] = np.flatnonzero(mask)
+    return rows
+
+
+def claims_scope_rows(df, providers) -> dict:
+    """{user email: positions of the claims rows in scope} for every BizDev
+    and viewer in the settings.
+
+    Built once per claims data / crosswalk / user settings and reused by
+    every session, so applying a scope is a single take.
+    """
+    bizdev = pd.util.hash_pandas_object(df["Biz Dev Name"]).sum()
+    key = (len(df), int(bizdev), providers.key)
+    return _claims_scope_rows(key, BIZDEV_USERS, VIEWER_USERS, df, providers)
+
+
+def apply_claims_scope(df, user, providers):
     """Filter the claims dataframe based on user role.
 
     Admins see all claims.  BizDev users see only claims from their doctors
     (matched via the 'Biz Dev Name' column).  Viewers see only claims from
-    their assigned doctors (matched via 'Prescriber Full Name').
+    their assigned doctors, matched by provider id through the *providers*
+    crosswalk, so any spelling of a doctor's name (or their NPI) counts.
+
+    Users configured in the settings get their precomputed row set (see
+    claims_scope_rows); anyone else is matched on the spot.
     """
     role = user["role"]
 
     if role == "admin":
         return df
 
+    if role in ("bizdev", "viewer"):
+        rows = claims_scope_rows(df, providers).get(user.get("email", "").lower())
+        if rows is not None:
+            return df.take(rows)
+
     if role == "bizdev":
-        bizdev_name = user.get("bizdev_name", "")
-        mask = df["Biz Dev Name"].str.lower() == bizdev_name.lower()
-        # Also include claims from explicitly assigned doctors (credit override)
-        extra_doctors = [d.lower() for d in user.get("doctors", [])]
-        if extra_doctors and "Prescriber Full Name" in df.columns:
-            mask |= df["Prescriber Full Name"].str.lower().isin(extra_doctors)
-        return df[mask]
+        return df[_bizdev_mask(df, user.get("bizdev_name", ""), user.get("doctors", []), providers)]
 
     if role == "viewer":
-        doctor_names = [d.lower() for d in user.get("doctors", [])]
-        return df[df["Prescriber Full Name"].str.lower().isin(doctor_names)]
+        return df[providers.mask(df, "claims", user.get("doctors", []))]
 
     return df.iloc[0:0]
@@ -0,0 +1,115 @@
+"""
+Per-month aggregates frozen once a month is closed.
+
+Claims, Insight fills and gout payments keep arriving for a while after a
+month ends, then stop changing.  monthly_aggregate therefore splits a
+date-sorted frame by calendar month:
+
+  * a month is closed once CLOSED_MONTH_GRACE_DAYS have passed since its
+    last day; its aggregate is computed once and kept in a process-wide
+    store (per view and user scope);
+  * open months, and months the selected date range only partly covers,
+    are recomputed from their rows on every run (found by binary search,
+    see data.dates).
+
+Each frozen month records a digest of its rows (row count and the sum of
+the row hashes), computed once per data version.  A late-arriving or
+edited row in a closed month changes that month's digest, and the month is
+recomputed and re-frozen on the next run.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config.settings import CLOSED_MONTH_GRACE_DAYS
+from data.dates import date_position, date_slice
+
+
+def open_from(today=None, grace_days: int = CLOSED_MONTH_GRACE_DAYS) -> pd.Timestamp:
+    """First day of the earliest month that is not closed yet."""
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+    return (today - pd.Timedelta(days=grace_days)).to_period("M").start_time
+
+
+def _dates(df: pd.DataFrame, column: str | None) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(df.index if column is None else df[column])
+
+
+@st.cache_resource(show_spinner=False)
+def _frozen() -> dict:
+    # (view name, scope) -> {month: (digest, aggregate)}
+    return {}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _digests(name: str, version, scope, column: str | None, _df: pd.DataFrame) -> dict:
+    # name, version and scope are only the cache key: views over the same
+    # claims version and scope may pass different frames
+    dated = date_slice(_df, column=column)
+    if dated.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(dated, index=column is None).to_numpy()
+    dates = _dates(dated, column)
+    months = pd.period_range(dates[0], dates[-1], freq="M")
+    starts = np.array([date_position(dated, m.start_time, column) for m in months])
+    sums = np.add.reduceat(hashes, starts) if len(hashes) else hashes
+    counts = np.diff(np.append(starts, len(dated)))
+    return {
+        str(m): (int(n), int(h) if n else 0)
+        for m, n, h in zip(months, counts, sums)
+    }
+
+
+def monthly_aggregate(
+    name: str,
+    df: pd.DataFrame,
+    compute,
+    version,
+    scope=(),
+    start=None,
+    end=None,
+    column: str | None = "Date",
+    today=None,
+) -> pd.DataFrame:
+    """compute() over the rows of date-sorted *df* dated *start*..*end*,
+    with the result for each closed month fully inside the range taken from
+    the frozen store.
+
+    *compute* maps rows to an aggregate with a "Month" ('YYYY-MM') column
+    and must be additive over months (its result for several months is the
+    concatenation of its results per month).  *name* identifies the view;
+    *version* and *scope* identify *df* (e.g. claims_version() and the
+    user's scope).  *column* is the date column, None for a DatetimeIndex.
+    """
+    rows = date_slice(df, start, end, column)
+    if rows.empty:
+        return compute(rows)
+
+    dates = _dates(rows, column)
+    closed_before = open_from(today)
+    digests = _digests(name, version, scope, column, df)
+    store = _frozen().setdefault((name, scope), {})
+
+    parts, live = [], []
+    for month in pd.period_range(dates[0], dates[-1], freq="M"):
+        key = str(month)
+        frozen = (
+            month.end_time < closed_before
+            and (start is None or pd.Timestamp(start) <= month.start_time)
+            # Dates are whole days: an end at midnight of the last day covers it
+            and (end is None or pd.Timestamp(end).normalize() >= month.end_time.normalize())
+            and key in digests
+        )
+        if not frozen:
+            live.append(date_slice(rows, month.start_time, month.end_time, column))
+            continue
+        entry = store.get(key)
+        if entry is None or entry[0] != digests[key]:
+            entry = (digests[key], compute(date_slice(df, month.start_time, month.end_time, column)))
+            store[key] = entry
+        parts.append(entry[1])
+
+    if live:
+        parts.append(compute(pd.concat(live)))
+    return pd.concat(parts, ignore_index=True).sort_values("Month", kind="stable", ignore_index=True)
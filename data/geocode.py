@@ -1,6 +1,6 @@
 import pandas as pd
-import pgeocode
-import streamlit as st
+
+from data import zipgeo
 
 # Known facility coordinates (doctors sheet only has facility names)
 FACILITY_COORDS = {
@@ -8,19 +8,9 @@ FACILITY_COORDS = {
     "insight":   {"lat": 40.7357, "lon": -74.0298, "label": "Insight (Jersey City, NJ)"},
 }
 
-@st.cache_data
 def geocode_zips(zip_series: pd.Series) -> pd.DataFrame:
-    """Convert a Series of zip codes to lat/lon using pgeocode (offline)."""
-    nomi = pgeocode.Nominatim("us")
-    zips_5 = zip_series.dropna().astype(str).str[:5]
-    unique_zips = zips_5.unique().tolist()
-    geo = nomi.query_postal_code(unique_zips)
-    lookup = dict(zip(geo["postal_code"], zip(geo["latitude"], geo["longitude"])))
-
-    df = pd.DataFrame({"zip5": zips_5})
-    df["lat"] = df["zip5"].map(lambda z: lookup.get(z, (None, None))[0])
-    df["lon"] = df["zip5"].map(lambda z: lookup.get(z, (None, None))[1])
-    return df
+    """Convert a Series of zip codes to lat/lon with the bundled zip index (offline)."""
+    return zipgeo.lookup(zip_series.dropna())[["zip5", "lat", "lon"]]
 
 
 def get_facility_points() -> pd.DataFrame:
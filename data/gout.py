@@ -1,11 +1,20 @@
 import pandas as pd
 import streamlit as st
 from config.settings import GOUT_FILE, SPRX_RATE
+from data.dates import parse_dates
+from data.xlsx import cached_sheet, read_sheet, sheet_fingerprint
 
-@st.cache_data
-def load_gout():
-    df = pd.read_excel(GOUT_FILE, sheet_name="340 B")
-    df.columns = df.columns.str.strip()
+_SHEET = "340 B"
+# Only the columns load_gout uses are read from the sheet.
+_COLUMNS = ["Service Date", "Paid Date", "Patient", "Reimbursement", "Number of Infusions"]
+_OPTIONAL_COLUMNS = ["SPRX Paid"]
+# Bump when _build_gout's output changes so cached results are rebuilt.
+# SPRX Earned is derived from SPRX_RATE, so a new rate also rebuilds it.
+_SNAPSHOT_KEY = {"version": 2, "sprx_rate": SPRX_RATE}
+
+def _build_gout():
+    # Rows without a patient (summary/blank rows) are skipped while streaming
+    df = read_sheet(GOUT_FILE, _SHEET, _COLUMNS, required=["Patient"], optional=_OPTIONAL_COLUMNS)
 
     df = df.rename(columns={
         "Service Date": "Date",
@@ -19,35 +28,12 @@ def load_gout():
     # Drop summary/blank rows (no patient name)
     df = df[df["Patient"].notna()].copy()
 
-    # Parse date ranges and multi-date strings, fall back to Paid Date
-    def parse_date(val):
-        s = str(val).strip()
-        if s in ("nan", "NaT", ""):
-            return pd.NaT
-        result = pd.to_datetime(s, errors="coerce")
-        if pd.notna(result):
-            return result
-        # Range like "5/15/2025-5/31/2025" → take end date
-        if "/" in s and "-" in s:
-            end = s.rsplit("-", 1)[-1].strip()
-            result = pd.to_datetime(end, errors="coerce")
-            if pd.notna(result):
-                return result
-        # Space-separated like "7/1/2025 7/15 7/29" → infer year from first, use last
-        if " " in s:
-            parts = s.split()
-            first_dt = pd.to_datetime(parts[0], errors="coerce")
-            if pd.notna(first_dt) and str(first_dt.year) in parts[0]:
-                result = pd.to_datetime(f"{parts[-1]}/{first_dt.year}", errors="coerce")
-                if pd.notna(result):
-                    return result
-        return pd.NaT
-
-    df["Date"] = df["Date"].apply(parse_date)
-    # Fall back to Paid Date where Service Date couldn't be parsed
+    # Service dates mix plain dates, ranges and lists (see data.dates);
+    # fall back to Paid Date where they can't be parsed
+    df["Date"] = parse_dates(df["Date"])[0]
     if "Paid Date" in df.columns:
         fallback = df["Date"].isna()
-        df.loc[fallback, "Date"] = pd.to_datetime(df.loc[fallback, "Paid Date"], errors="coerce")
+        df.loc[fallback, "Date"] = parse_dates(df.loc[fallback, "Paid Date"])[0]
 
     for col in ["Paid", "SPRX Paid"]:
         df[col] = (
@@ -67,3 +53,15 @@ def load_gout():
 
     return daily
 
+@st.cache_data
+def _load_gout(fingerprint: dict):
+    # fingerprint is only the cache key: a new one means the sheet changed
+    return cached_sheet(GOUT_FILE, _SHEET, "daily", _build_gout, _SNAPSHOT_KEY, fingerprint)
+
+def load_gout():
+    """Daily gout program totals, re-parsed only when the "340 B" sheet changes."""
+    return _load_gout(sheet_fingerprint(GOUT_FILE, _SHEET))
+
+def gout_version() -> dict:
+    """Fingerprint of the gout sheet, to key caches derived from load_gout."""
+    return sheet_fingerprint(GOUT_FILE, _SHEET)
@@ -0,0 +1,203 @@
+"""
+Incremental ingestion of a CSV feed into a persisted, normalized store.
+
+The store is the loader's Parquet snapshot (see data.snapshot) plus a
+row-hash index with one entry per raw row of the last ingested file:
+its key, a hash of its raw text and its position in the store (-1 if the
+normalize step dropped it, e.g. rows before START_DATE).
+
+On ingest the feed is tokenized as plain strings (no type inference) and each
+row is hashed.  Only rows whose key is new or whose hash changed go through
+the loader's normalize function; unchanged rows are copied from the previous
+store and rows whose key left the feed are dropped.  The result is always
+the same frame a full rebuild of the current file would produce.
+
+Anything the incremental path cannot reconcile (no previous store, duplicate
+keys, added/removed columns, a dtype the delta cannot be cast to) falls back
+to a full rebuild.
+
+Run ``python -m data.ingest`` after replacing the claims file to refresh the
+store ahead of the next dashboard start.
+"""
+
+from io import StringIO
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from data.snapshot import fingerprint, read_previous, read_snapshot, write_snapshot
+
+_INDEX_TAG = "rowhash"
+
+
+def _clean_header(columns: pd.Index) -> pd.Index:
+    return columns.str.strip().str.replace(r"\s+", " ", regex=True)
+
+
+def _row_keys(raw: pd.DataFrame, key_cols: list) -> pd.Series:
+    keys = raw[key_cols[0]].str.strip()
+    for col in key_cols[1:]:
+        keys = keys + "|" + raw[col].str.strip()
+    return keys
+
+
+def _parse_rows(raw: pd.DataFrame, text_cols: set) -> pd.DataFrame:
+    """Re-parse string-typed raw rows the way pd.read_csv parses the file.
+
+    Columns that were text in the previous store stay text, so values like
+    zero-padded codes are not re-inferred as numbers from a small delta.
+    """
+    parsed = pd.read_csv(
+        StringIO(raw.to_csv(index=False)),
+        dtype={c: str for c in raw.columns if c in text_cols},
+    )
+    parsed.index = raw.index
+    return parsed
+
+
+def _is_text(s: pd.Series) -> bool:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return pd.api.types.is_string_dtype(s.cat.categories)
+    return pd.api.types.is_string_dtype(s)
+
+
+def _align_dtypes(delta: pd.DataFrame, store: pd.DataFrame):
+    """Cast *delta* and *store* to common dtypes.
+
+    Categorical columns get the union of both category sets.  Returns
+    (delta, store), or None if the schemas can't be reconciled.
+    """
+    if list(delta.columns) != list(store.columns):
+        return None
+    dtypes = store.dtypes.to_dict()
+    for col, dtype in dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            extra = pd.Index(delta[col].dropna().unique().tolist(), dtype=dtype.categories.dtype)
+            dtypes[col] = pd.CategoricalDtype(dtype.categories.union(extra), ordered=dtype.ordered)
+    cat_dtypes = {c: d for c, d in dtypes.items() if isinstance(d, pd.CategoricalDtype)}
+    try:
+        return delta.astype(dtypes), store.astype(cat_dtypes)
+    except (TypeError, ValueError):
+        return None
+
+
+def _cat_columns(df: pd.DataFrame) -> list:
+    return [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+
+
+def _build_index(keys: pd.Series, hashes, kept_index: pd.Index) -> pd.DataFrame:
+    pos = pd.Series(range(len(kept_index)), index=kept_index)
+    return pd.DataFrame({
+        "key": keys.to_numpy(),
+        "row_hash": hashes,
+        "pos": pos.reindex(keys.index, fill_value=-1).to_numpy(),
+    })
+
+
+def _scan(source: Path, key_cols: list, chunk_rows: int | None, columns: dict | None):
+    """Yield (raw, keys, row_hashes) per chunk of the feed, read as plain text."""
+    reader = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+    for raw in [reader] if chunk_rows is None else reader:
+        raw.columns = _clean_header(raw.columns)
+        if columns:
+            raw = raw.rename(columns=columns)
+        yield raw, _row_keys(raw, key_cols), pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+
+def ingest(
+    source: Path,
+    normalize: Callable[[pd.DataFrame], pd.DataFrame],
+    key_cols: list,
+    tag: str,
+    key: dict | None = None,
+    read: Callable[[Path], pd.DataFrame] | None = None,
+    chunk_rows: int | None = None,
+    columns: dict | None = None,
+) -> tuple[pd.DataFrame, dict]:
+    """Bring the normalized store for *source* up to date and return it.
+
+    *read* does a full rebuild (default: normalize the whole file); with
+    *chunk_rows* the change scan reads the feed in chunks, so only keys,
+    hashes and changed rows are held in memory.  *columns* renames the feed's
+    headers (as *normalize* does) so *key_cols* use the normalized names.
+
+    Returns (df, stats) where stats reports the mode used ("snapshot",
+    "incremental" or "full") and the new / changed / removed row counts.
+    """
+    source = Path(source)
+    index_tag = f"{tag}-{_INDEX_TAG}"
+
+    current = read_snapshot(source, tag, key)
+    if current is not None:
+        return current, {"mode": "snapshot", "rows": len(current)}
+
+    source_fp = fingerprint(source)
+    prev = read_previous(source, tag, key)
+    prev_index = read_previous(source, index_tag, key)
+    consistent = (
+        prev is not None
+        and prev_index is not None
+        and prev[1].get("sha256") == prev_index[1].get("sha256")
+        and len(prev_index[0]) > 0
+        and prev_index[0]["key"].is_unique
+    )
+    if consistent:
+        store, index = prev[0], prev_index[0]
+        prev_keys = pd.Index(index["key"])
+        prev_hashes, prev_pos = index["row_hash"].to_numpy(), index["pos"].to_numpy()
+
+    key_parts, hash_parts, changed_parts, kept_pos, kept_at = [], [], [], [], []
+    n_new = 0
+    for raw, keys, hashes in _scan(source, key_cols, chunk_rows, columns):
+        key_parts.append(keys)
+        hash_parts.append(hashes)
+        if not consistent:
+            continue
+        loc = prev_keys.get_indexer(keys)
+        n_new += int((loc < 0).sum())
+        unchanged = (loc >= 0) & (prev_hashes[loc] == hashes)
+        changed_parts.append(raw[~unchanged])
+        pos = prev_pos[loc[unchanged]]
+        kept_pos.append(pos[pos >= 0])
+        kept_at.append(raw.index[unchanged][pos >= 0])
+    keys, hashes = pd.concat(key_parts), np.concatenate(hash_parts)
+
+    df = None
+    stats = {"mode": "full"}
+    if consistent and not keys.duplicated().any():
+        changed_raw = pd.concat(changed_parts)
+        text_cols = {c for c in store.columns if _is_text(store[c])}
+        delta = normalize(_parse_rows(changed_raw, text_cols)) if len(changed_raw) else store.iloc[0:0]
+        aligned = _align_dtypes(delta, store)
+
+        if aligned is not None:
+            delta, store = aligned
+            kept = store.iloc[np.concatenate(kept_pos)]
+            kept.index = pd.Index(np.concatenate(kept_at))
+            df = pd.concat([kept, delta]).sort_index()
+            for col in _cat_columns(df):
+                df[col] = df[col].cat.remove_unused_categories()
+            stats = {
+                "mode": "incremental",
+                "new": n_new,
+                "changed": len(changed_raw) - n_new,
+                "removed": int((~prev_keys.isin(keys)).sum()),
+            }
+
+    if df is None:
+        df = read(source) if read else normalize(pd.read_csv(source))
+
+    stats["rows"] = len(df)
+    write_snapshot(df, source, tag, key, source_fp)
+    write_snapshot(_build_index(keys, hashes, df.index), source, index_tag, key, source_fp)
+    return df, stats
+
+
+if __name__ == "__main__":
+    from data.claims import available_sources, ingest_claims
+
+    for name in available_sources():
+        _, ingest_stats = ingest_claims(name)
+        print(f"{name}: " + ", ".join(f"{k}={v}" for k, v in ingest_stats.items()))
@@ -17,8 +17,31 @@ import pandas as pd
 import streamlit as st
 
 from config.settings import INSIGHT_FILE
+from data.dates import parse_dates, sort_by_date
+from data.xlsx import cached_sheet, read_sheet, sheet_fingerprint
 
 _SHEET = "CCRX Providers Break Down "
+_PRESCRIBER = "Prescriber Full Name Last then First"
+# Only the columns load_insight uses are read from the sheet.
+_COLUMNS = [
+    _PRESCRIBER,
+    "Date Filled",
+    "Dispensed Item Name",
+    "Dispensed Item Inventory Group",
+    "Dispensed Quantity",
+    "Acquisition Cost",
+    "Primary Remit Amount",
+    "Secondary Remit Amount",
+    "Patient Paid Amount",
+    "Net Profit",
+]
+# Bump when _build_insight's output changes so cached results are rebuilt.
+_SNAPSHOT_KEY = {"version": 1}
+_OUTPUT_COLUMNS = [
+    "Doctor", "Date", "Month", "Drug", "Inventory", "Qty",
+    "Drug Cost", "Revenue", "Net Profit",
+    "Primary Remit", "Secondary Remit", "Patient Paid",
+]
 
 # Embedded header strings that appear as data rows in the sheet
 _JUNK_LABELS = {
@@ -27,56 +50,12 @@ _JUNK_LABELS = {
 }
 
 
-def _normalize_name(name: str) -> set:
-    """Return a lowercase word-set for fuzzy name matching.
-
-    Handles 'Last, First', 'Last, First, MD', and 'First Last' formats.
-    Credentials (MD, DPM, PA, etc.) are stripped so they don't pollute matching.
-    """
-    _credentials = {"md", "dpm", "pa", "np", "do", "phd", "rn", "dds", "dmd"}
-    name = str(name).strip().lower()
-    if "," in name:
-        parts = name.split(",", 1)
-        name = parts[1].strip() + " " + parts[0].strip()
-    words = {w.strip(".,") for w in name.split()}
-    return words - _credentials
-
-
-@st.cache_data(show_spinner=False)
-def load_insight() -> pd.DataFrame:
-    """Load the Insight CCRX Providers Detail sheet into a clean DataFrame.
-
-    Returns columns:
-        Doctor        – normalized 'Last, First' name string
-        Date          – pd.Timestamp of fill date
-        Month         – 'YYYY-MM' period string
-        Drug          – dispensed item name
-        Inventory     – 340B / Rx / etc.
-        Qty           – dispensed quantity
-        Drug Cost     – acquisition cost
-        Revenue       – Primary + Secondary + Patient remit
-        Net Profit    – as reported
-        Primary Remit – primary insurance paid
-        Secondary Remit – secondary insurance paid
-        Patient Paid  – patient copay
+def _build_insight() -> pd.DataFrame:
+    # Blank spacer rows (no prescriber) are skipped while streaming
+    df = read_sheet(INSIGHT_FILE, _SHEET, _COLUMNS, required=[_PRESCRIBER])
 
-    Returns an empty DataFrame if the file is unavailable.
-    """
-    try:
-        df = pd.read_excel(INSIGHT_FILE, sheet_name=_SHEET)
-    except Exception:
-        return pd.DataFrame(
-            columns=[
-                "Doctor", "Date", "Month", "Drug", "Inventory", "Qty",
-                "Drug Cost", "Revenue", "Net Profit",
-                "Primary Remit", "Secondary Remit", "Patient Paid",
-            ]
-        )
-
-    # Drop rows with no prescriber (the vast majority are blank spacer rows)
-    df = df[df["Prescriber Full Name Last then First"].notna()]
     # Drop embedded header rows
-    df = df[~df["Prescriber Full Name Last then First"].isin(_JUNK_LABELS)]
+    df = df[~df[_PRESCRIBER].isin(_JUNK_LABELS)]
 
     # Normalize doctor name to "Last, First" title-case, stripping credentials
     # so duplicates like "BRANDT, FREDERICK" and "Brandt, Frederick, MD" merge
@@ -88,10 +67,15 @@ def load_insight() -> pd.DataFrame:
         first = parts[1].title() if len(parts) > 1 else ""
         return f"{last}, {first}" if first else last
 
-    df["Doctor"] = df["Prescriber Full Name Last then First"].apply(_normalize_doctor)
+    df["Doctor"] = df[_PRESCRIBER].apply(_normalize_doctor)
+
+    # The inventory group column also holds stray NDC numbers; keep it text
+    df["Dispensed Item Inventory Group"] = df["Dispensed Item Inventory Group"].map(
+        str, na_action="ignore"
+    )
 
     # Dates
-    df["Date"] = pd.to_datetime(df["Date Filled"], errors="coerce")
+    df["Date"] = parse_dates(df["Date Filled"])[0]
     df["Month"] = df["Date"].dt.to_period("M").astype(str)
 
     # Numeric remit / cost columns
@@ -121,28 +105,61 @@ def load_insight() -> pd.DataFrame:
             "Secondary Remit Amount": "Secondary Remit",
             "Patient Paid Amount": "Patient Paid",
         }
-    )[
-        [
-            "Doctor", "Date", "Month", "Drug", "Inventory", "Qty",
-            "Drug Cost", "Revenue", "Net Profit",
-            "Primary Remit", "Secondary Remit", "Patient Paid",
-        ]
-    ].copy()
+    )[_OUTPUT_COLUMNS].copy()
 
 
-def filter_insight_by_doctors(df: pd.DataFrame, doctor_list: list) -> pd.DataFrame:
-    """Return only rows whose Doctor name matches one of the names in doctor_list.
+@st.cache_data(show_spinner=False)
+def _load_insight(fingerprint: dict) -> pd.DataFrame:
+    # fingerprint is only the cache key: a new one means the sheet changed
+    df = cached_sheet(
+        INSIGHT_FILE, _SHEET, "providers", _build_insight, _SNAPSHOT_KEY, fingerprint
+    )
+    # Sorted by date for data.dates.date_slice
+    return sort_by_date(df)
+
+
+def load_insight() -> pd.DataFrame:
+    """Load the Insight CCRX Providers Detail sheet into a clean DataFrame.
+
+    Returns columns:
+        Doctor        – normalized 'Last, First' name string
+        Date          – pd.Timestamp of fill date
+        Month         – 'YYYY-MM' period string
+        Drug          – dispensed item name
+        Inventory     – 340B / Rx / etc.
+        Qty           – dispensed quantity
+        Drug Cost     – acquisition cost
+        Revenue       – Primary + Secondary + Patient remit
+        Net Profit    – as reported
+        Primary Remit – primary insurance paid
+        Secondary Remit – secondary insurance paid
+        Patient Paid  – patient copay
 
-    Matching is case-insensitive, credential-agnostic, and handles
-    'Last, First' vs 'First Last' formats via 2-word intersection.
+    The sheet is only re-parsed when it changed; edits to the workbook's other
+    tabs reuse the last result (see data.xlsx.cached_sheet).  Returns an empty
+    DataFrame if the file is unavailable.
     """
-    if not doctor_list:
-        return df.iloc[0:0]
+    try:
+        return _load_insight(sheet_fingerprint(INSIGHT_FILE, _SHEET))
+    except Exception:
+        return pd.DataFrame(columns=_OUTPUT_COLUMNS)
+
 
-    target_sets = [_normalize_name(d) for d in doctor_list]
+def insight_version() -> dict | None:
+    """Fingerprint of the Insight sheet (None if unavailable), to key caches
+    derived from load_insight."""
+    try:
+        return sheet_fingerprint(INSIGHT_FILE, _SHEET)
+    except Exception:
+        return None
 
-    def matches(doctor_name: str) -> bool:
-        name_words = _normalize_name(doctor_name)
-        return any(len(name_words & target) >= 2 for target in target_sets)
 
-    return df[df["Doctor"].apply(matches)].copy()
+def filter_insight_by_doctors(df: pd.DataFrame, doctor_list: list, providers) -> pd.DataFrame:
+    """Return only rows whose Doctor name matches one of the names in doctor_list.
+
+    A Doctor matches a list entry sharing at least two of its name words,
+    ignoring case, credentials and 'Last, First' vs 'First Last' order; the
+    *providers* crosswalk (data.providers) indexes the names by token once
+    and memoizes the matches per doctor list.
+    """
+    return df[providers.mask(df, "insight", doctor_list)].copy()
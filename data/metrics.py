@@ -0,0 +1,41 @@
+"""
+Monthly financial metrics shared by the Analysis page and
+data_files/financial_analysis.py.
+
+  Total Price Paid  – sum over paid claims (Total Price Paid > 0)
+  340B Value        – 340B acquisition cost of the paid claims
+  Spread            – Total Price Paid - 340B Value
+  WAC (Unfilled)    – WAC Value of unfilled claims (Total Price Paid = 0)
+
+Each measure is masked to the claims it counts and all of them are summed
+in one groupby over Month plus any extra dimensions (Biz Dev Name,
+Inventory_Type, Source, ...), so the cost is one pass over the rows however
+many months the history spans.  Only pandas is imported, so the CLI script
+can use it without Streamlit.
+"""
+
+import pandas as pd
+
+METRICS = ["Total Price Paid", "340B Value", "Spread", "WAC (Unfilled)"]
+
+
+def monthly_metrics(df: pd.DataFrame, by: list | tuple = (), month: str = "Month") -> pd.DataFrame:
+    """One row per month (and combination of *by* values, when given) with
+    METRICS, ordered by month.  Columns missing from *df* count as 0."""
+    by = [c for c in by if c in df.columns]
+    paid_amount = df["Total Price Paid"]
+    paid = (paid_amount > 0).to_numpy()
+    unpaid = (paid_amount == 0).to_numpy()
+    zeros = pd.Series(0.0, index=df.index)
+    measures = pd.DataFrame({
+        month: df[month],
+        **{c: df[c] for c in by},
+        "Total Price Paid": paid_amount.where(paid, 0.0),
+        "340B Value": df.get("340B Value", zeros).where(paid, 0.0),
+        "WAC (Unfilled)": df.get("WAC Value", zeros).where(unpaid, 0.0),
+    })
+    summary = measures.groupby([month, *by], as_index=False, observed=True, dropna=False)[
+        ["Total Price Paid", "340B Value", "WAC (Unfilled)"]
+    ].sum()
+    summary["Spread"] = summary["Total Price Paid"] - summary["340B Value"]
+    return summary[[month, *by, *METRICS]]
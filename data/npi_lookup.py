@@ -1,81 +1,191 @@
+"""
+Doctor practice locations from the CMS NPI Registry, cached in data.npi_store.
+
+NPIs missing from the store (or due for a refresh, see data.npi_store) are
+fetched in the background on a small thread pool, spaced to
+NPI_REQUESTS_PER_SECOND and retried with exponential backoff on timeouts,
+429s and 5xx responses.  lookup_doctor_locations never waits for the
+registry: it returns what the store already holds, and the next rerun after
+a batch lands picks up the new entries.
+
+NPI_REGISTRY_URL selects the endpoint, e.g. a local fake registry in tests.
+"""
+
 import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 import pandas as pd
-import pgeocode
 import streamlit as st
-from pathlib import Path
 
-CACHE_FILE = Path(__file__).resolve().parent.parent / "data_files" / "npi_cache.json"
+from config.settings import NPI_REGISTRY_URL, NPI_REQUESTS_PER_SECOND, NPI_RETRIES, NPI_WORKERS
+from data import npi_store, zipgeo
 
+_BACKOFF_SECONDS = 1.0
+_LOCATION_COLUMNS = ["npi", "name", "city", "state", "zip", "lat", "lon"]
 
-def _fetch_npi(npi: str) -> dict | None:
-    """Query the CMS NPI Registry API for a single NPI."""
-    url = f"https://npiregistry.cms.hhs.gov/api/?number={npi}&version=2.1"
-    try:
-        resp = urllib.request.urlopen(url, timeout=10)
-        data = json.loads(resp.read())
-        if data.get("result_count", 0) > 0:
-            r = data["results"][0]
-            addr = r["addresses"][0]
-            basic = r.get("basic", {})
-            name = basic.get("name") or f"{basic.get('last_name', '')}, {basic.get('first_name', '')}"
-            return {
-                "npi": npi,
-                "name": name.strip(", "),
-                "address": addr.get("address_1", ""),
-                "city": addr.get("city", ""),
-                "state": addr.get("state", ""),
-                "zip": str(addr.get("postal_code", ""))[:5],
-            }
-    except Exception:
-        pass
-    return None
+_enrich_lock = threading.Lock()
+_batch_lock = threading.Lock()  # one batch at a time
+_in_flight: set = set()  # NPIs in a batch that hasn't finished yet
 
 
-def _load_cache() -> dict:
-    if CACHE_FILE.exists():
-        return json.loads(CACHE_FILE.read_text())
-    return {}
+class _RateLimiter:
+    """Space calls at least 1/rate seconds apart across threads."""
 
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
 
-def _save_cache(cache: dict):
-    CACHE_FILE.write_text(json.dumps(cache, indent=2))
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(start - now)
 
 
-@st.cache_data(ttl=86400, show_spinner="Looking up doctor locations via NPI Registry...")
-def lookup_doctor_locations(npi_series: pd.Series) -> pd.DataFrame:
-    """Look up practice addresses for a list of NPIs, with local JSON cache."""
-    cache = _load_cache()
+def _fetch_npi(npi: str, endpoint: str = NPI_REGISTRY_URL) -> dict | None:
+    """Query the NPI Registry API for a single NPI; None if it isn't registered.
+
+    Network and HTTP errors propagate so the caller can decide to retry.
+    """
+    url = f"{endpoint}?{urllib.parse.urlencode({'number': npi, 'version': '2.1'})}"
+    with urllib.request.urlopen(url, timeout=10) as resp:
+        data = json.loads(resp.read())
+    if data.get("result_count", 0) > 0:
+        r = data["results"][0]
+        addr = r["addresses"][0]
+        basic = r.get("basic", {})
+        name = basic.get("name") or f"{basic.get('last_name', '')}, {basic.get('first_name', '')}"
+        return {
+            "npi": npi,
+            "name": name.strip(", "),
+            "address": addr.get("address_1", ""),
+            "city": addr.get("city", ""),
+            "state": addr.get("state", ""),
+            "zip": str(addr.get("postal_code", ""))[:5],
+        }
+    return None
 
-    npis = npi_series.dropna().astype(float).astype(int).astype(str).unique().tolist()
-    results = []
-    new_lookups = 0
-
-    for npi in npis:
-        if npi in cache:
-            results.append(cache[npi])
-        else:
-            info = _fetch_npi(npi)
-            if info:
-                cache[npi] = info
-                results.append(info)
-                new_lookups += 1
-
-    if new_lookups > 0:
-        _save_cache(cache)
 
+def _retry_delay(err: Exception, attempt: int) -> float | None:
+    """Seconds to wait before retrying after *err*, or None if it's permanent."""
+    if isinstance(err, urllib.error.HTTPError):
+        if err.code == 429:
+            retry_after = err.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        elif err.code < 500:
+            return None
+    elif not isinstance(err, (OSError, ValueError)):
+        return None
+    return _BACKOFF_SECONDS * 2**attempt * (1 + random.random())
+
+
+def _fetch_with_retry(npi: str, endpoint: str, limiter: _RateLimiter):
+    """Return (npi, record or None, ok); ok is False if the lookup gave up."""
+    for attempt in range(NPI_RETRIES + 1):
+        limiter.wait()
+        try:
+            return npi, _fetch_npi(npi, endpoint), True
+        except Exception as err:
+            delay = _retry_delay(err, attempt)
+            if delay is None or attempt == NPI_RETRIES:
+                return npi, None, False
+            time.sleep(delay)
+
+
+def enrich_npis(npis: list, endpoint: str | None = None) -> dict:
+    """Fetch *npis* from the registry concurrently into the NPI store.
+
+    Each answer is written as it arrives: a record, or a negative entry for
+    an NPI the registry doesn't know.  Lookups that still fail after retries
+    are not recorded.  Returns {npi: record} for the NPIs that were found.
+    """
+    limiter = _RateLimiter(NPI_REQUESTS_PER_SECOND)
+    endpoint = endpoint or NPI_REGISTRY_URL
+    found = {}
+    with ThreadPoolExecutor(max_workers=NPI_WORKERS) as pool, closing(npi_store.connect()) as conn:
+        for npi, record, ok in pool.map(lambda n: _fetch_with_retry(n, endpoint, limiter), npis):
+            if record:
+                npi_store.upsert(conn, record)
+                found[npi] = record
+            elif ok:
+                npi_store.mark_missing(conn, npi)
+    return found
+
+
+def enrich_in_background(npis: list):
+    """Start enrich_npis for the *npis* not already in a running batch.
+
+    npi_store.due decides what needs fetching; an NPI leaves the in-flight
+    set when its batch ends, so refreshes, expired misses and lookups that
+    gave up are picked up again by a later rerun.
+    """
+    with _enrich_lock:
+        todo = [n for n in npis if n not in _in_flight]
+        _in_flight.update(todo)
+    if not todo:
+        return
+
+    def run():
+        try:
+            with _batch_lock:
+                enrich_npis(todo)
+        finally:
+            with _enrich_lock:
+                _in_flight.difference_update(todo)
+
+    threading.Thread(target=run, name="npi-enrich", daemon=True).start()
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _locations(npis: tuple, store_version: tuple) -> pd.DataFrame:
+    # store_version is only the cache key: it changes when new NPIs land
+    with closing(npi_store.connect()) as conn:
+        found = npi_store.get(conn, npis)
+    results = [found[npi] for npi in npis if npi in found]
     if not results:
-        return pd.DataFrame(columns=["npi", "name", "city", "state", "zip", "lat", "lon"])
+        return pd.DataFrame(columns=_LOCATION_COLUMNS)
 
     df = pd.DataFrame(results)
 
-    # Geocode zip codes
-    nomi = pgeocode.Nominatim("us")
-    unique_zips = df["zip"].unique().tolist()
-    geo = nomi.query_postal_code(unique_zips)
-    zip_to_coords = dict(zip(geo["postal_code"], zip(geo["latitude"], geo["longitude"])))
-
-    df["lat"] = df["zip"].map(lambda z: zip_to_coords.get(z, (None, None))[0])
-    df["lon"] = df["zip"].map(lambda z: zip_to_coords.get(z, (None, None))[1])
+    geo = zipgeo.lookup(df["zip"])
+    df["lat"], df["lon"] = geo["lat"], geo["lon"]
 
     return df.dropna(subset=["lat", "lon"])
+
+
+def lookup_doctor_locations(npi_series: pd.Series) -> pd.DataFrame:
+    """Practice addresses for a list of NPIs, from the NPI store.
+
+    NPIs not stored yet, or due for a refresh, are looked up in the background
+    (see enrich_npis) and show up on a later rerun.
+    """
+    npis = npi_series.dropna().astype(float).astype(int).astype(str).unique().tolist()
+    with closing(npi_store.connect()) as conn:
+        stale = npi_store.due(conn, npis)
+        store_version = npi_store.version(conn)
+    if stale:
+        enrich_in_background(stale)
+    return _locations(tuple(npis), store_version)
+
+
+def lookup_specialties(npi_series: pd.Series) -> pd.DataFrame:
+    """Primary taxonomy and specialty per NPI, from the NPPES import (data.nppes).
+
+    Covers any prescriber NPI in the import, not just doctors on the sheet.
+    """
+    npis = npi_series.dropna().astype(float).astype(int).astype(str).unique().tolist()
+    with closing(npi_store.connect()) as conn:
+        found = npi_store.specialties(conn, npis)
+    return pd.DataFrame(
+        [(npi, *found[npi]) for npi in npis if npi in found],
+        columns=["npi", "taxonomy", "specialty"],
+    )
@@ -0,0 +1,179 @@
+"""
+SQLite store for NPI Registry lookups (replaces the npi_cache.json dict).
+
+One row per NPI, upserted individually, with the time it was fetched:
+
+  found = 1  – a registry record (name / address / city / state / zip);
+               re-fetched once older than NPI_REFRESH_DAYS
+  found = 0  – a negative entry: the registry had no such NPI; retried only
+               after NPI_MISS_TTL_DAYS
+
+The legacy npi_cache.json is imported the first time the store is created.
+
+A second table, ``nppes``, holds a bulk import of the NPPES dissemination
+file (see data/nppes.py).  NPIs found there are resolved locally and never
+sent to the Registry API; an API record, where one exists, takes precedence.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config.settings import DATA_DIR, NPI_MISS_TTL_DAYS, NPI_REFRESH_DAYS, NPI_STORE_FILE
+
+LEGACY_JSON = DATA_DIR / "npi_cache.json"
+FIELDS = ["npi", "name", "address", "city", "state", "zip"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS npi (
+    npi        TEXT PRIMARY KEY,
+    found      INTEGER NOT NULL,
+    name       TEXT,
+    address    TEXT,
+    city       TEXT,
+    state      TEXT,
+    zip        TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS npi_fetched_at ON npi (fetched_at);
+"""
+_NPPES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    npi         TEXT PRIMARY KEY,
+    name        TEXT,
+    address     TEXT,
+    city        TEXT,
+    state       TEXT,
+    zip         TEXT,
+    taxonomy    TEXT,
+    specialty   TEXT,
+    imported_at REAL NOT NULL
+)
+"""
+_DAY = 86400
+_init_lock = threading.Lock()
+
+
+def import_json(conn: sqlite3.Connection, path: Path = LEGACY_JSON) -> int:
+    """Load a legacy {npi: record} JSON cache; returns the number of records.
+
+    The JSON has no timestamps, so records count as fetched at import time.
+    """
+    cache = json.loads(Path(path).read_text())
+    fetched_at = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO npi VALUES (?, 1, ?, ?, ?, ?, ?, ?)",
+            [
+                (npi, rec.get("name"), rec.get("address"), rec.get("city"),
+                 rec.get("state"), rec.get("zip"), fetched_at)
+                for npi, rec in cache.items()
+            ],
+        )
+    return len(cache)
+
+
+def create_nppes_table(conn: sqlite3.Connection, table: str = "nppes"):
+    conn.execute(_NPPES_SCHEMA.format(table=table))
+
+
+def connect(path: Path = NPI_STORE_FILE) -> sqlite3.Connection:
+    """Open the store, creating it (and importing LEGACY_JSON) on first use.
+
+    Connections are cheap; open one per thread and close it when done.
+    """
+    path = Path(path)
+    with _init_lock:
+        created = not path.exists()
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        create_nppes_table(conn)
+        if created and LEGACY_JSON.exists():
+            import_json(conn)
+    return conn
+
+
+def _chunks(npis: list, size: int = 500):
+    for i in range(0, len(npis), size):
+        yield npis[i:i + size]
+
+
+def _placeholders(chunk: list) -> str:
+    return ", ".join("?" * len(chunk))
+
+
+def get(conn: sqlite3.Connection, npis: list) -> dict:
+    """Return {npi: record} for the *npis* the API or the NPPES import knows."""
+    records = {}
+    columns = ", ".join(FIELDS)
+    for chunk in _chunks(list(npis)):
+        for query in (
+            f"SELECT {columns} FROM nppes WHERE npi IN ({_placeholders(chunk)})",
+            f"SELECT {columns} FROM npi WHERE found = 1 AND npi IN ({_placeholders(chunk)})",
+        ):
+            records.update((row["npi"], dict(row)) for row in conn.execute(query, chunk))
+    return records
+
+
+def specialties(conn: sqlite3.Connection, npis: list) -> dict:
+    """Return {npi: (taxonomy code, specialty)} from the NPPES import."""
+    result = {}
+    for chunk in _chunks(list(npis)):
+        rows = conn.execute(
+            f"SELECT npi, taxonomy, specialty FROM nppes WHERE npi IN ({_placeholders(chunk)})",
+            chunk,
+        )
+        result.update((row["npi"], (row["taxonomy"], row["specialty"])) for row in rows)
+    return result
+
+
+def due(conn: sqlite3.Connection, npis: list, now: float | None = None) -> list:
+    """The *npis* to ask the API about: not imported from NPPES and either
+    missing, an expired negative, or a stale record."""
+    now = time.time() if now is None else now
+    fresh = set()
+    for chunk in _chunks(list(npis)):
+        rows = conn.execute(
+            f"SELECT npi FROM npi WHERE npi IN ({_placeholders(chunk)}) "
+            "AND fetched_at > CASE found WHEN 1 THEN ? ELSE ? END "
+            f"UNION SELECT npi FROM nppes WHERE npi IN ({_placeholders(chunk)})",
+            [*chunk, now - NPI_REFRESH_DAYS * _DAY, now - NPI_MISS_TTL_DAYS * _DAY, *chunk],
+        )
+        fresh.update(row["npi"] for row in rows)
+    return [npi for npi in npis if npi not in fresh]
+
+
+def upsert(conn: sqlite3.Connection, record: dict, now: float | None = None):
+    """Insert or replace one registry record."""
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO npi VALUES (?, 1, ?, ?, ?, ?, ?, ?)",
+            [*(record.get(f) for f in FIELDS), time.time() if now is None else now],
+        )
+
+
+def mark_missing(conn: sqlite3.Connection, npi: str, now: float | None = None):
+    """Record that the registry has no entry for *npi*.
+
+    A previously found record is kept (the registry may just be flaky) but
+    its timestamp is renewed.
+    """
+    now = time.time() if now is None else now
+    with conn:
+        conn.execute(
+            "INSERT INTO npi (npi, found, fetched_at) VALUES (?, 0, ?) "
+            "ON CONFLICT (npi) DO UPDATE SET fetched_at = excluded.fetched_at",
+            [npi, now],
+        )
+
+
+def version(conn: sqlite3.Connection) -> tuple:
+    """Changes whenever a row is written or NPPES is re-imported; use as a cache key."""
+    row = conn.execute(
+        "SELECT COUNT(*), MAX(fetched_at), (SELECT MAX(imported_at) FROM nppes) FROM npi"
+    ).fetchone()
+    return tuple(row)
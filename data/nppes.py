@@ -0,0 +1,131 @@
+"""
+Offline import of the CMS NPPES dissemination file into the NPI store.
+
+The monthly NPPES "npidata_pfile" CSV lists every NPI with its practice
+location and taxonomies.  ``import_nppes`` streams it in chunks, keeps only
+the columns the dashboard uses and writes them to the ``nppes`` table of the
+NPI store (data/npi_store.py), replacing the previous import in one
+transaction.  Lookups then resolve any number of NPIs locally; the Registry
+API is only needed for NPIs newer than the import.
+
+    python -m data.nppes npidata_pfile_20250101-20250131.csv \\
+        [--states NJ,NY,PA] [--taxonomy nucc_taxonomy.csv]
+
+--states keeps only providers practising in those states; --taxonomy adds
+specialty names from the NUCC taxonomy CSV (Code / Classification /
+Specialization) next to the primary taxonomy code.
+"""
+
+import time
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from data import npi_store
+
+_TAXONOMY_SLOTS = range(1, 16)
+_COLUMNS = {
+    "NPI": "npi",
+    "Entity Type Code": "entity_type",
+    "Provider Organization Name (Legal Business Name)": "org_name",
+    "Provider Last Name (Legal Name)": "last_name",
+    "Provider First Name": "first_name",
+    "Provider First Line Business Practice Location Address": "address",
+    "Provider Business Practice Location Address City Name": "city",
+    "Provider Business Practice Location Address State Name": "state",
+    "Provider Business Practice Location Address Postal Code": "zip",
+}
+for _i in _TAXONOMY_SLOTS:
+    _COLUMNS[f"Healthcare Provider Taxonomy Code_{_i}"] = f"taxonomy_{_i}"
+    _COLUMNS[f"Healthcare Provider Primary Taxonomy Switch_{_i}"] = f"primary_{_i}"
+
+
+def _specialties(path) -> dict:
+    """{taxonomy code: specialty name} from the NUCC taxonomy CSV."""
+    nucc = pd.read_csv(path, dtype=str, encoding_errors="replace")
+    name = nucc["Specialization"].fillna(nucc["Classification"])
+    return dict(zip(nucc["Code"].str.strip(), name.str.strip()))
+
+
+def _primary_taxonomy(chunk: pd.DataFrame) -> pd.Series:
+    # The slot flagged "Y" as primary, else the first listed taxonomy
+    primary = pd.Series(pd.NA, index=chunk.index, dtype="object")
+    for i in reversed(_TAXONOMY_SLOTS):
+        primary = primary.mask(chunk[f"primary_{i}"] == "Y", chunk[f"taxonomy_{i}"])
+    return primary.fillna(chunk["taxonomy_1"])
+
+
+def _rows(chunk: pd.DataFrame, specialties: dict) -> pd.DataFrame:
+    person = chunk["last_name"].fillna("") + ", " + chunk["first_name"].fillna("")
+    taxonomy = _primary_taxonomy(chunk)
+    return pd.DataFrame({
+        "npi": chunk["npi"],
+        "name": chunk["org_name"].where(chunk["entity_type"] == "2", person.str.strip(", ")),
+        "address": chunk["address"],
+        "city": chunk["city"],
+        "state": chunk["state"],
+        "zip": chunk["zip"].str[:5],
+        "taxonomy": taxonomy,
+        "specialty": taxonomy.map(specialties),
+    })
+
+
+def import_nppes(
+    path,
+    states: list | None = None,
+    taxonomy_file=None,
+    chunk_rows: int = 200_000,
+) -> int:
+    """Replace the store's NPPES table with the contents of *path*.
+
+    Returns the number of NPIs imported.
+    """
+    specialties = _specialties(taxonomy_file) if taxonomy_file else {}
+    states = {s.upper() for s in states} if states else None
+    reader = pd.read_csv(
+        path, dtype=str, usecols=list(_COLUMNS), chunksize=chunk_rows,
+        encoding_errors="replace",
+    )
+    imported_at = time.time()
+    total = 0
+    with closing(npi_store.connect()) as conn:
+        # Built under another name and renamed in the same transaction, so
+        # readers see either the old import or the complete new one
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS nppes_import")
+            npi_store.create_nppes_table(conn, "nppes_import")
+            conn.execute("BEGIN")
+            for chunk in reader:
+                chunk = chunk.rename(columns=_COLUMNS)
+                if states:
+                    chunk = chunk[chunk["state"].str.upper().isin(states)]
+                rows = _rows(chunk, specialties).astype(object)
+                rows = rows.where(rows.notna(), None)
+                rows["imported_at"] = imported_at
+                conn.executemany(
+                    "INSERT OR REPLACE INTO nppes_import VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows.itertuples(index=False, name=None),
+                )
+                total += len(rows)
+            conn.execute("DROP TABLE IF EXISTS nppes")
+            conn.execute("ALTER TABLE nppes_import RENAME TO nppes")
+    return total
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("path", type=Path, help="NPPES npidata_pfile CSV")
+    parser.add_argument("--states", help="comma-separated practice states to keep")
+    parser.add_argument("--taxonomy", type=Path, help="NUCC taxonomy CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n = import_nppes(
+        args.path,
+        states=args.states.split(",") if args.states else None,
+        taxonomy_file=args.taxonomy,
+    )
+    print(f"Imported {n:,} NPIs in {time.perf_counter() - start:.1f}s")
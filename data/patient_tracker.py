@@ -38,20 +38,11 @@ def load_patient_tracker() -> pd.DataFrame:
     return df[df["Patient Name"].str.strip() != ""].copy()
 
 
-def filter_tracker_by_doctors(df: pd.DataFrame, doctor_list: list) -> pd.DataFrame:
-    """Return rows whose Provider fuzzy-matches any name in doctor_list."""
-    if df.empty or not doctor_list:
-        return df.iloc[0:0]
-
-    def _words(s: str) -> set:
-        return {w.lower().strip(".,") for w in str(s).split() if len(w) > 2}
-
-    targets = [_words(d) for d in doctor_list]
-
-    def matches(provider: str) -> bool:
-        if not provider:
-            return False
-        pwords = _words(provider)
-        return any(pwords & t for t in targets)
-
-    return df[df["Provider"].apply(matches)].copy()
+def filter_tracker_by_doctors(df: pd.DataFrame, doctor_list: list, providers) -> pd.DataFrame:
+    """Return rows whose Provider fuzzy-matches any name in doctor_list.
+
+    Tracker providers are mostly surnames ("Dr. Shah"), so a provider
+    matches a list entry sharing any word longer than two letters, through
+    the token index of the *providers* crosswalk (data.providers).
+    """
+    return df[providers.mask(df, "tracker", doctor_list)].copy()
@@ -0,0 +1,94 @@
+"""
+Daily prefix sums for cumulative charts and range totals.
+
+PrefixSums rolls a frame up to one value per group (e.g. Biz Dev Name x
+Inventory_Type) and day, and keeps for each measure a groups x days array
+of daily sums plus its running total along the days (with a leading zero
+column).  For a date window and a group selection:
+
+  * a range total is one subtraction, P[end] - P[start];
+  * a cumulative curve is P[start + 1 : end + 1] - P[start], a slice and a
+    subtraction, instead of a groupby and cumsum over the rows.
+
+Selecting groups sums their rows of the arrays, which is a vectorized
+groups x days add with no regrouping.  Days are the distinct dates in the
+frame; a selection only reports the days on which it has rows.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+class PrefixSums:
+    """Daily sums and running totals of *measures* per *by* group of *df*
+    (dates from *column*, or the index when None)."""
+
+    def __init__(self, df: pd.DataFrame, measures: list, by: list | tuple = (), column: str | None = "Date"):
+        by = list(by)
+        dates = pd.DatetimeIndex(df.index if column is None else df[column])
+        dated = ~dates.isna()
+        frame = df.loc[dated, [*by, *measures]].assign(_date=dates[dated], _rows=1)
+        if by:
+            codes, groups = pd.MultiIndex.from_frame(frame[by]).factorize()
+            self.groups = groups.to_frame(index=False, name=by)
+        else:
+            codes = np.zeros(len(frame), dtype=np.intp)
+            self.groups = pd.DataFrame(index=range(1))
+        day_codes, self.days = pd.factorize(frame["_date"], sort=True)
+        self.days = pd.DatetimeIndex(self.days)
+
+        shape = (len(self.groups), len(self.days))
+        self.daily, self.prefix = {}, {}
+        for measure in [*measures, "_rows"]:
+            values = frame[measure].to_numpy(dtype="float64", na_value=0.0)
+            daily = np.zeros(shape)
+            np.add.at(daily, (codes, day_codes), values)
+            self.daily[measure] = daily
+            self.prefix[measure] = np.concatenate([np.zeros((shape[0], 1)), daily.cumsum(axis=1)], axis=1)
+
+    def _span(self, start, end) -> tuple[int, int]:
+        """Day positions lo..hi (exclusive) of the window *start*..*end*."""
+        days = self.days.values
+        lo = 0 if start is None else int(np.searchsorted(days, np.datetime64(pd.Timestamp(start)), side="left"))
+        hi = len(days) if end is None else int(np.searchsorted(days, np.datetime64(pd.Timestamp(end)), side="right"))
+        return lo, max(lo, hi)
+
+    def _rows(self, where: dict | None) -> np.ndarray:
+        mask = np.ones(len(self.groups), dtype=bool)
+        for column, value in (where or {}).items():
+            mask &= (self.groups[column] == value).to_numpy()
+        return mask
+
+    def total(self, measure: str, start=None, end=None, where: dict | None = None) -> float:
+        """Sum of *measure* over *start*..*end* for the groups matching
+        *where* ({column: value}, None = all)."""
+        lo, hi = self._span(start, end)
+        prefix = self.prefix[measure][self._rows(where)]
+        return float((prefix[:, hi] - prefix[:, lo]).sum())
+
+    def series(self, measures: list, start=None, end=None, where: dict | None = None) -> pd.DataFrame:
+        """One row per day in *start*..*end* on which the selected groups
+        have rows: Date, each measure's daily sum and "Cumulative <measure>"
+        (running total from *start*)."""
+        lo, hi = self._span(start, end)
+        rows = self._rows(where)
+        present = self.daily["_rows"][rows, lo:hi].sum(axis=0) > 0
+        out = {"Date": self.days[lo:hi][present]}
+        for measure in measures:
+            prefix = self.prefix[measure][rows].sum(axis=0)
+            out[measure] = self.daily[measure][rows, lo:hi].sum(axis=0)[present]
+            out[f"Cumulative {measure}"] = (prefix[lo + 1:hi + 1] - prefix[lo])[present]
+        return pd.DataFrame(out)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _prefix_sums(key, measures: tuple, by: tuple, column: str | None, _df: pd.DataFrame) -> PrefixSums:
+    # key is only the cache key: it identifies _df
+    return PrefixSums(_df, list(measures), by, column)
+
+
+def prefix_sums(df: pd.DataFrame, measures: list, key, by: list | tuple = (), column: str | None = "Date") -> PrefixSums:
+    """PrefixSums(df, ...), cached on *key*, which must change whenever *df*
+    does (e.g. the claims version plus the user's scope)."""
+    return _prefix_sums(key, tuple(measures), tuple(by), column, df)
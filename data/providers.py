@@ -0,0 +1,315 @@
+"""
+Provider identity crosswalk shared by every data source.
+
+The same physician appears as Prescriber Full Name / Prescriber NPI in the
+claims, Doctor in the Insight report, Provider in the patient tracker
+("Dr. Shah"), doctor_name / npi on the doctors sheet and as hand-entered
+variants in the user settings ("Goldman, Alan" vs "Goldman, Alan Peter").
+load_crosswalk resolves them once per data refresh into integer provider
+ids:
+
+  * names are reduced to a (last name, first given name) key, ignoring
+    case, punctuation, titles, credentials and middle names;
+  * aliases sharing an NPI are one provider, and so are aliases sharing a
+    key unless that key is claimed by more than one NPI;
+  * surname-only aliases (the tracker's "Dr. Shah") stay separate providers
+    and match any doctor list entry with that surname.
+
+The result holds the alias table (source, alias, npi, provider id), one row
+per provider with its NPI, aliases and source row ids (also written to
+PROVIDER_CROSSWALK_FILE for offline use), and each source row's provider id
+and alias.  Scope filters resolve a doctor list to provider ids once and
+select rows with an integer isin instead of matching names row by row.
+
+Claims and the doctors sheet carry NPIs, so their doctor lists match on
+provider id: a hand-entered "Goldman, Alan" selects the claims filed as
+"Goldman, Alan Peter" under the same NPI.  The Insight report and the
+tracker have no NPIs and keep matching on name tokens, as they always have:
+an Insight name matches a list entry sharing at least two of its words
+(first and last name, in either order), a tracker provider one sharing any
+word longer than two letters ("Dr. Shah").  An inverted token index
+(token -> alias positions) is built with the crosswalk, and each doctor
+list is resolved by counting posting-list hits, memoized per list.
+"""
+
+import os
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config.settings import (
+    BIZDEV_USERS,
+    INSIGHT_BIZDEV_DOCTORS,
+    PROVIDER_CROSSWALK_FILE,
+    VIEWER_USERS,
+)
+
+# source -> (name column, NPI column or None)
+SOURCES = {
+    "doctors": ("doctor_name", "npi"),
+    "claims": ("Prescriber Full Name", "Prescriber NPI"),
+    "insight": ("Doctor", None),
+    "tracker": ("Provider", None),
+}
+# Preferred source for a provider's display name; "settings" holds the
+# doctor lists typed into config/settings.py and has no rows.
+_NAME_PRIORITY = ["doctors", "claims", "insight", "settings", "tracker"]
+
+_TITLES = {"dr", "doctor", "mr", "mrs", "ms"}
+_CREDENTIALS = {"md", "dpm", "pa", "np", "do", "phd", "rn", "dds", "dmd", "pac", "aprn", "fnp"}
+_SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+_FIRST_NAME = re.compile(r"[a-z][a-z'-]+")
+# Sources matched on shared name tokens (how many) instead of provider id
+_TOKEN_MATCH = {"insight": 2, "tracker": 1}
+
+
+def name_key(name) -> tuple[str, str]:
+    """(last, first) identity key of a provider name; first is "" when only
+    a surname is known.  Handles 'Last, First Middle[, MD]' and
+    '[Dr.] First Last'."""
+    drop = _TITLES | _CREDENTIALS | _SUFFIXES
+    name = str(name).strip().lower().replace("\n", " ")
+    # Comma-separated parts that are only credentials ("..., MD") don't count
+    parts = [p for p in name.split(",") if {w.strip(".") for w in p.split()} - drop]
+    if len(parts) > 1:
+        last_words, given_words = parts[0].split(), parts[1].split()
+    else:
+        words = parts[0].split() if parts else []
+        last_words, given_words = words[-1:], words[:-1]
+    last_words = [w for w in (w.strip(".") for w in last_words) if w and w not in drop]
+    given_words = [w for w in (w.strip(".") for w in given_words) if w and w not in drop]
+    last = " ".join(last_words)
+    first = next((w for w in given_words if _FIRST_NAME.fullmatch(w)), "")
+    return last, first
+
+
+def name_tokens(name) -> set:
+    """Lowercase word set of a name for token matching, credentials (MD,
+    DPM, ...) dropped, so 'Last, First, MD' and 'First Last' agree."""
+    words = {w.strip(".,") for w in str(name).strip().lower().replace(",", " ").split()}
+    return words - _CREDENTIALS - {""}
+
+
+def _token_index(aliases: pd.Series) -> dict:
+    """Inverted index: name token -> positions of the aliases that have it."""
+    postings = defaultdict(list)
+    for i, alias in enumerate(aliases):
+        for token in name_tokens(alias):
+            postings[token].append(i)
+    return {token: np.array(pos) for token, pos in postings.items()}
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _matching_aliases(key: tuple, shared: int, names: tuple, _tokens: dict) -> np.ndarray:
+    # key identifies the crosswalk _tokens was built for
+    hits = []
+    for name in names:
+        tokens = name_tokens(name)
+        if shared == 1:
+            # A single shared word must be more than an initial or a title
+            tokens = {t for t in tokens if len(t) > 2}
+        postings = [_tokens[t] for t in tokens if t in _tokens]
+        if len(postings) < shared:
+            continue
+        ids, counts = np.unique(np.concatenate(postings), return_counts=True)
+        hits.append(ids[counts >= shared])
+    return np.unique(np.concatenate(hits)) if hits else np.array([], dtype=np.int64)
+
+
+def _npi_strings(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, errors="coerce").astype("Int64").astype("string")
+
+
+def _source_columns(df: pd.DataFrame, source: str) -> tuple[pd.Series, pd.Series]:
+    name_col, npi_col = SOURCES[source]
+    if df is None or name_col not in df.columns:
+        empty = pd.Series(pd.NA, index=getattr(df, "index", pd.RangeIndex(0)), dtype="string")
+        return empty, empty
+    names = df[name_col].astype("string").str.strip().replace("", pd.NA)
+    npis = _npi_strings(df[npi_col]) if npi_col and npi_col in df.columns else pd.Series(
+        pd.NA, index=df.index, dtype="string"
+    )
+    return names, npis
+
+
+def _settings_names() -> list:
+    lists = [*INSIGHT_BIZDEV_DOCTORS.values()]
+    lists += [u.get("doctors", []) for u in BIZDEV_USERS.values()]
+    lists += [u.get("doctors", []) for u in VIEWER_USERS.values()]
+    return sorted({name.strip() for names in lists for name in names if name.strip()})
+
+
+def _assign_ids(aliases: pd.DataFrame) -> np.ndarray:
+    """Provider id for each alias row (see the module docstring for the rules)."""
+    parent = list(range(len(aliases)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(group):
+        root = find(group[0])
+        for i in group[1:]:
+            parent[find(i)] = root
+
+    for _, group in aliases.dropna(subset=["npi"]).groupby("npi").groups.items():
+        union(list(group))
+    full = aliases[aliases["first"] != ""]
+    for _, group in full.groupby(["last", "first"]).groups.items():
+        rows = aliases.loc[group]
+        npis = rows["npi"].dropna().unique()
+        if len(npis) <= 1:
+            union(list(group))
+        else:
+            # Same name, different NPIs: only the NPI-less aliases stay together
+            union(list(rows.index[rows["npi"].isna()]) or [group[0]])
+    surname = aliases[aliases["first"] == ""]
+    for _, group in surname.groupby("last").groups.items():
+        union(list(group))
+
+    roots = np.array([find(i) for i in range(len(aliases))])
+    return pd.factorize(roots)[0]
+
+
+def _providers(aliases: pd.DataFrame, row_ids: dict) -> pd.DataFrame:
+    ranked = aliases.assign(
+        _priority=aliases["source"].map(_NAME_PRIORITY.index),
+        _length=-aliases["alias"].str.len(),
+    ).sort_values(["_priority", "_length", "alias"])
+    grouped = ranked.groupby("provider_id", sort=True)
+    providers = pd.DataFrame({
+        "name": grouped["alias"].first(),
+        "npi": grouped["npi"].first(),
+        "aliases": grouped["alias"].agg(lambda a: sorted(set(a.tolist()))).astype(object),
+    })
+    for source, ids in row_ids.items():
+        positions = pd.Series(np.arange(len(ids))).groupby(ids.to_numpy()).agg(list)
+        providers[f"{source}_rows"] = positions.reindex(providers.index).apply(
+            lambda rows: rows if isinstance(rows, list) else []
+        )
+    providers.index.name = "provider_id"
+    return providers.reset_index()
+
+
+def _write_crosswalk(providers: pd.DataFrame):
+    tmp = PROVIDER_CROSSWALK_FILE.with_name(PROVIDER_CROSSWALK_FILE.name + ".tmp")
+    try:
+        providers.to_parquet(tmp, index=False)
+        os.replace(tmp, PROVIDER_CROSSWALK_FILE)
+    except OSError:
+        pass
+
+
+class Crosswalk:
+    """Resolved provider ids: the alias and provider tables plus, for each
+    source, Series of provider ids and of alias positions aligned to that
+    source frame's index (-1 for rows without a name), and the alias token
+    index.  *key* identifies the inputs it was built from, for caches
+    derived from it."""
+
+    def __init__(
+        self,
+        aliases: pd.DataFrame,
+        providers: pd.DataFrame,
+        row_ids: dict,
+        row_aliases: dict,
+        key: tuple = (),
+    ):
+        self.aliases = aliases
+        self.providers = providers
+        self.row_ids = row_ids
+        self.row_aliases = row_aliases
+        self.tokens = _token_index(aliases["alias"])
+        self.key = key
+
+    def resolve(self, names) -> np.ndarray:
+        """Provider ids matching any of *names*: same (last, first) key, or a
+        surname-only alias with the same last name."""
+        keys = [name_key(n) for n in names]
+        aliases = self.aliases
+        full = (aliases["last"] + "\x1f" + aliases["first"]).isin(["\x1f".join(k) for k in keys])
+        surname = (aliases["first"] == "") & aliases["last"].isin([last for last, _ in keys])
+        return np.unique(aliases.loc[full | surname, "provider_id"].to_numpy())
+
+    def ids(self, df: pd.DataFrame, source: str) -> pd.Series:
+        """Provider id of each row of *df*, a subset of the *source* frame."""
+        return self.row_ids[source].reindex(df.index, fill_value=-1)
+
+    def mask(self, df: pd.DataFrame, source: str, names) -> np.ndarray:
+        """Boolean row mask of *df* (a subset of the *source* frame) for the
+        providers matching *names*, or for token-matched sources the aliases
+        sharing enough name tokens with one of them."""
+        if not len(names):
+            return np.zeros(len(df), dtype=bool)
+        shared = _TOKEN_MATCH.get(source)
+        if shared is None:
+            return np.isin(self.ids(df, source).to_numpy(), self.resolve(names))
+        matched = _matching_aliases(self.key, shared, tuple(names), self.tokens)
+        rows = self.row_aliases[source].reindex(df.index, fill_value=-1).to_numpy()
+        return np.isin(rows, matched)
+
+
+@st.cache_data(show_spinner=False)
+def _crosswalk(fingerprints: tuple, _frames: dict) -> Crosswalk:
+    # fingerprints is only the cache key; _frames is not hashed
+    tables, codes, counts = [], {}, {}
+    for source in SOURCES:
+        names, npis = _source_columns(_frames.get(source), source)
+        codes[source], uniques = pd.factorize(names + "\x1f" + npis.fillna(""))
+        counts[source] = len(uniques)
+        # First row of each distinct (name, NPI) pair; code -1 = no name
+        code, first = np.unique(codes[source], return_index=True)
+        first = first[code >= 0]
+        tables.append(pd.DataFrame({
+            "source": source,
+            "alias": names.iloc[first].to_numpy(),
+            "npi": npis.iloc[first].to_numpy(),
+            "_code": code[code >= 0],
+        }))
+    tables.append(pd.DataFrame({"source": "settings", "alias": _settings_names(), "npi": pd.NA, "_code": -1}))
+
+    aliases = pd.concat(tables, ignore_index=True)
+    aliases["alias"] = aliases["alias"].astype("string")
+    aliases["npi"] = aliases["npi"].astype("string")
+    keys = aliases["alias"].map(name_key)
+    aliases["last"] = keys.str[0]
+    aliases["first"] = keys.str[1]
+    aliases = aliases[aliases["last"] != ""].reset_index(drop=True)
+    aliases["provider_id"] = _assign_ids(aliases)
+
+    row_ids, row_aliases = {}, {}
+    for source in SOURCES:
+        own = aliases[aliases["source"] == source]
+        index = _source_columns(_frames.get(source), source)[0].index
+        # One extra slot at the end for rows without a name (code -1)
+        for out, values in ((row_ids, own["provider_id"]), (row_aliases, own.index)):
+            lookup = np.full(counts[source] + 1, -1)
+            lookup[own["_code"].to_numpy()] = values.to_numpy()
+            out[source] = pd.Series(lookup[codes[source]], index=index, dtype="int64")
+
+    providers = _providers(aliases, row_ids)
+    _write_crosswalk(providers)
+    return Crosswalk(aliases.drop(columns="_code"), providers, row_ids, row_aliases, fingerprints)
+
+
+def _fingerprint(df: pd.DataFrame | None, source: str) -> tuple:
+    names, npis = _source_columns(df, source)
+    if names.empty:
+        return (0, 0)
+    hashed = pd.util.hash_pandas_object(pd.DataFrame({"n": names, "p": npis}))
+    return (len(names), int(hashed.sum()))
+
+
+def load_crosswalk(frames: dict) -> Crosswalk:
+    """Resolve the provider identities of *frames* ({source: DataFrame}, see
+    SOURCES) plus the doctor lists in the user settings.
+
+    Rebuilt only when a source's names, NPIs or row index change.
+    """
+    fingerprints = tuple((source, _fingerprint(frames.get(source), source)) for source in SOURCES)
+    return _crosswalk((fingerprints, tuple(_settings_names())), frames)
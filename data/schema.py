@@ -0,0 +1,101 @@
+"""
+Declared column dtypes for loader output, plus a memory report.
+
+A schema maps column name -> dtype.  Besides plain pandas dtypes it accepts:
+
+  "month"      – 'YYYY-MM' strings as an ordered categorical, so the column is
+                 stored as small integer codes and sorts chronologically
+  "float32?"   – float32 only if every value survives the round-trip to the
+                 cent; otherwise the column stays float64
+
+Columns missing from the frame are skipped, and a column whose values don't
+fit the declared dtype is left as it is rather than failing the load.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _fits_float32(s: pd.Series) -> bool:
+    values = s.to_numpy(dtype="float64", na_value=np.nan)
+    return np.allclose(values.astype("float32"), values, rtol=0, atol=0.005, equal_nan=True)
+
+
+def _cast(s: pd.Series, dtype: str) -> pd.Series:
+    if dtype == "month":
+        return pd.Series(
+            pd.Categorical(s, categories=sorted(s.dropna().unique()), ordered=True),
+            index=s.index,
+        )
+    if dtype == "float32?":
+        return s.astype("float32") if _fits_float32(s) else s
+    if dtype.startswith("Int"):
+        return pd.to_numeric(s, errors="coerce").astype(dtype)
+    return s.astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Cast the columns of *df* named in *schema* in place and return *df*."""
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        try:
+            df[col] = _cast(df[col], dtype)
+        except (TypeError, ValueError):
+            pass
+    return df
+
+
+def infer_numeric(df: pd.DataFrame, skip=()) -> pd.DataFrame:
+    """Convert text columns that are entirely numeric, as pd.read_csv would.
+
+    For frames read with ``dtype=str`` (e.g. in chunks, where per-chunk type
+    inference would disagree between chunks).  Columns in *skip* are left
+    alone.  Modifies *df* in place and returns it.
+    """
+    for col in df.columns:
+        if col in skip or not pd.api.types.is_string_dtype(df[col]):
+            continue
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (TypeError, ValueError):
+            pass
+    return df
+
+
+def concat_categorical(frames: list) -> pd.DataFrame:
+    """pd.concat (with a fresh index) that keeps categorical columns categorical.
+
+    Plain pd.concat falls back to object dtype when frames carry different
+    category sets; here each categorical column gets the sorted union first.
+    """
+    frames = [f.copy(deep=False) for f in frames]
+    cat_cols = {
+        c for f in frames for c in f.columns if isinstance(f[c].dtype, pd.CategoricalDtype)
+    }
+    for col in cat_cols:
+        categories, ordered = None, False
+        for f in frames:
+            if col not in f.columns:
+                continue
+            if isinstance(f[col].dtype, pd.CategoricalDtype):
+                values, ordered = f[col].cat.categories, ordered or f[col].cat.ordered
+            else:
+                values = pd.Index(f[col].dropna().unique())
+            categories = values if categories is None else categories.union(values)
+        dtype = pd.CategoricalDtype(categories, ordered=ordered)
+        for f in frames:
+            f[col] = f[col].astype(dtype) if col in f.columns else pd.Categorical([None] * len(f), dtype=dtype)
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Per-column deep memory use of *before* vs *after*, biggest saving first."""
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_before": before.memory_usage(deep=True, index=False),
+        "bytes_after": after.memory_usage(deep=True, index=False),
+    })
+    report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+    return report.sort_values("bytes_saved", ascending=False)
@@ -0,0 +1,148 @@
+"""
+Columnar on-disk snapshots of normalized loader output.
+
+A snapshot is a compressed Parquet file written next to its source file,
+plus a small JSON sidecar that records the source fingerprint (size, mtime
+and SHA-256 of the content) and a loader-defined key (e.g. a schema version).
+
+Loaders call ``read_snapshot`` first and only rebuild from the raw source
+when it returns None.  The mtime is only a fast path: a redeploy re-checks
+out every file with a fresh mtime, so on an mtime mismatch the content hash
+decides, and an unchanged file is still a hit.
+
+Parquet support needs pyarrow.  Without it, or on a read-only filesystem,
+every read is a miss and every write is a no-op, so loaders behave exactly
+as if there were no snapshot at all.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+_HASH_CHUNK = 1 << 20
+
+
+def file_sha256(path: Path) -> str:
+    """Return the hex SHA-256 of a file, read in 1 MiB chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(path: Path) -> dict:
+    """Return the size / mtime / content-hash fingerprint of a source file."""
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+    }
+
+
+def snapshot_paths(source: Path, tag: str) -> tuple[Path, Path]:
+    """Return (parquet_path, meta_path) for a snapshot of *source*."""
+    source = Path(source)
+    base = f"{source.stem}.{tag}"
+    return source.parent / f"{base}.parquet", source.parent / f"{base}.meta.json"
+
+
+def _read_meta(meta_path: Path) -> dict | None:
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: Path, meta: dict):
+    tmp = meta_path.with_name(meta_path.name + ".tmp")
+    tmp.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp, meta_path)
+
+
+def is_current(source: Path, tag: str, key: dict | None = None) -> bool:
+    """True if the snapshot of *source* matches its current fingerprint and *key*.
+
+    On an mtime-only change (same size, same content) the stored mtime is
+    refreshed so the next check takes the fast path again.
+    """
+    parquet_path, meta_path = snapshot_paths(source, tag)
+    meta = _read_meta(meta_path)
+    if meta is None or not parquet_path.exists():
+        return False
+    if meta.get("key") != (key or {}):
+        return False
+
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return False
+
+    stored = meta.get("source", {})
+    if stat.st_size != stored.get("size"):
+        return False
+    if stat.st_mtime_ns == stored.get("mtime_ns"):
+        return True
+    if file_sha256(source) != stored.get("sha256"):
+        return False
+
+    stored["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_meta(meta_path, meta)
+    except OSError:
+        pass
+    return True
+
+
+def read_snapshot(source: Path, tag: str, key: dict | None = None) -> pd.DataFrame | None:
+    """Return the snapshot DataFrame for *source*, or None if missing or stale."""
+    if not is_current(source, tag, key):
+        return None
+    parquet_path, _ = snapshot_paths(source, tag)
+    try:
+        return pd.read_parquet(parquet_path)
+    except Exception:
+        return None
+
+
+def read_previous(source: Path, tag: str, key: dict | None = None):
+    """Return (df, source_fingerprint) of the last snapshot, even if stale.
+
+    Used by incremental loaders that patch the previous result instead of
+    rebuilding it.  Returns None if there is no readable snapshot for *key*.
+    """
+    parquet_path, meta_path = snapshot_paths(source, tag)
+    meta = _read_meta(meta_path)
+    if meta is None or meta.get("key") != (key or {}):
+        return None
+    try:
+        return pd.read_parquet(parquet_path), meta.get("source", {})
+    except Exception:
+        return None
+
+
+def write_snapshot(
+    df: pd.DataFrame,
+    source: Path,
+    tag: str,
+    key: dict | None = None,
+    source_fp: dict | None = None,
+):
+    """Persist *df* as the snapshot of *source*.  Failures are silently ignored.
+
+    Pass *source_fp* (taken before the source was read) to avoid recording a
+    fingerprint of a file that changed while it was being parsed.
+    """
+    parquet_path, meta_path = snapshot_paths(source, tag)
+    tmp = parquet_path.with_name(parquet_path.name + ".tmp")
+    try:
+        df.to_parquet(tmp, compression="zstd")
+        os.replace(tmp, parquet_path)
+        meta = {"source": source_fp or fingerprint(source), "key": key or {}}
+        _write_meta(meta_path, meta)
+    except Exception:
+        tmp.unlink(missing_ok=True)
@@ -0,0 +1,102 @@
+"""
+Rule engine sorting unfilled scripts into action buckets.
+
+The rules live in config/settings.py as two editable tables:
+
+  UNFILLED_MESSAGE_BUCKETS   – Primary Claim Message regex -> bucket
+  UNFILLED_PRIORITY_BUCKETS  – Rx Priority -> bucket
+
+A message rule wins over the priority table, and rows matching neither go to
+UNFILLED_DEFAULT_BUCKET.  Both passes work on distinct values rather than
+rows: the priority table is mapped over the categories of Rx Priority, and
+the message patterns are compiled into one alternation of named groups that
+is run once over the distinct messages.  Widening the window or adding
+pharmacies therefore adds rows to a couple of array takes, not regex calls.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from config.settings import (
+    UNFILLED_BUCKETS,
+    UNFILLED_DEFAULT_BUCKET,
+    UNFILLED_MESSAGE_BUCKETS,
+    UNFILLED_PRIORITY_BUCKETS,
+)
+from data.dedup import DedupIndex
+
+
+def _message_buckets(messages: pd.Series, rules: dict) -> np.ndarray:
+    """Bucket of the first rule matching each message, or None."""
+    result = np.full(len(messages), None, dtype=object)
+    if not rules:
+        return result
+    codes, uniques = pd.factorize(messages.astype("string").fillna(""))
+    # Each alternative is a lookahead from the start of the message, so the
+    # first listed pattern found anywhere in it is the group that matches
+    combined = "|".join(f"(?=.*?(?P<r{i}>{pattern}))" for i, pattern in enumerate(rules))
+    groups = pd.Series(uniques).str.extract(re.compile(f"^(?:{combined})", re.IGNORECASE | re.DOTALL))
+    # Groups inside the user's patterns add columns of their own; skip them
+    matched = groups[[f"r{i}" for i in range(len(rules))]].notna().to_numpy()
+    first = matched.argmax(axis=1)
+    per_unique = np.where(matched.any(axis=1), np.asarray(list(rules.values()), dtype=object)[first], None)
+    valid = codes >= 0
+    result[valid] = per_unique[codes[valid]]
+    return result
+
+
+def classify_unfilled(
+    df: pd.DataFrame,
+    priority_buckets: dict = UNFILLED_PRIORITY_BUCKETS,
+    message_buckets: dict = UNFILLED_MESSAGE_BUCKETS,
+) -> pd.Series:
+    """Bucket of each row of *df* as a categorical in UNFILLED_BUCKETS order."""
+    if "Rx Priority" in df.columns:
+        priorities = df["Rx Priority"].astype("category")
+        # One extra slot at the end for missing priorities (code -1)
+        table = [priority_buckets.get(p, UNFILLED_DEFAULT_BUCKET) for p in priorities.cat.categories]
+        by_priority = np.array(table + [UNFILLED_DEFAULT_BUCKET], dtype=object)[priorities.cat.codes.to_numpy()]
+    else:
+        by_priority = np.full(len(df), UNFILLED_DEFAULT_BUCKET, dtype=object)
+
+    if "Primary Claim Message" in df.columns:
+        by_message = _message_buckets(df["Primary Claim Message"], message_buckets)
+        buckets = np.where(pd.isna(by_message), by_priority, by_message)
+    else:
+        buckets = by_priority
+
+    categories = list(dict.fromkeys([*UNFILLED_BUCKETS, *priority_buckets.values(), *message_buckets.values()]))
+    return pd.Series(pd.Categorical(buckets, categories=categories), index=df.index, name="Bucket")
+
+
+def priorities_in(bucket: str, priority_buckets: dict = UNFILLED_PRIORITY_BUCKETS) -> list:
+    """Rx Priority values the table assigns to *bucket*."""
+    return [p for p, b in priority_buckets.items() if b == bucket]
+
+
+@st.cache_resource(show_spinner=False)
+def _dedup_indexes() -> dict:
+    # scope -> DedupIndex, shared by sessions and kept across claim refreshes
+    return {}
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _dedup_unfilled(version: tuple, scope, _df: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    # version and scope are only the cache key
+    unfilled = _df[_df["Total Price Paid"] == 0]
+    index = _dedup_indexes().setdefault(scope, DedupIndex()).update(unfilled)
+    return index.select(unfilled), index.duplicates
+
+
+def dedup_unfilled(df: pd.DataFrame, version: tuple, scope) -> tuple[pd.DataFrame, int]:
+    """(deduplicated unfilled claims of *df*, number of duplicates removed).
+
+    See data.dedup.  *version* identifies the claims (e.g. claims_version())
+    and *scope* (hashable, e.g. (role, email)) the user whose slice *df* is.
+    Each scope keeps its own index, which a new claims version updates
+    instead of rebuilding.
+    """
+    return _dedup_unfilled(version, scope, df)
@@ -0,0 +1,240 @@
+"""
+Streaming reader for the sheets the loaders consume from .xlsx workbooks.
+
+pd.read_excel materialises every row and column of a sheet.  The Insight
+"CCRX Providers Break Down " sheet is mostly blank spacer rows, so here rows
+are streamed one at a time, only the requested columns are kept, and rows
+whose *required* columns are all blank are dropped before they ever reach a
+DataFrame.
+
+Two backends:
+  calamine – python-calamine (Rust), used when installed
+             (``pip install python-calamine``)
+  openpyxl – openpyxl in read-only mode, always available
+
+Set XLSX_ENGINE to force one.  ``python -m data.xlsx`` benchmarks both
+against pd.read_excel on the workbooks the dashboard ships.
+
+An .xlsx file is a zip with one XML part per sheet, so a loader can tell
+whether *its* sheet changed without parsing anything: ``sheet_fingerprint``
+reads the part's CRC and size from the zip directory.  ``cached_sheet``
+keeps the loader's parsed result as a snapshot (see data.snapshot) keyed on
+that fingerprint, so edits to other tabs don't trigger a re-parse.
+
+Text cells point into the workbook-wide shared-strings part, which changes
+whenever text is typed on any tab.  When only that part changed, the strings
+this sheet actually references are hashed and compared instead.  Styles are
+not tracked: re-formatting a column between number and date without touching
+the sheet's cells is not detected.
+"""
+
+import datetime as dt
+import hashlib
+import posixpath
+import re
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from config.settings import XLSX_ENGINE
+from data.snapshot import read_previous, write_snapshot
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+
+def _engine() -> str:
+    if XLSX_ENGINE in ("calamine", "openpyxl"):
+        return XLSX_ENGINE
+    return "calamine" if CalamineWorkbook is not None else "openpyxl"
+
+
+def _rows_calamine(path, sheet):
+    wb = CalamineWorkbook.from_path(str(path))
+    yield from wb.get_sheet_by_name(sheet).iter_rows()
+
+
+def _rows_openpyxl(path, sheet):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb[sheet].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _calamine_cell(value):
+    # calamine reports empty cells as "", whole numbers as floats and
+    # date-only cells as bare dates; match what openpyxl / pd.read_excel hand back.
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dt.date) and not isinstance(value, dt.datetime):
+        return dt.datetime.combine(value, dt.time())
+    return value
+
+
+def read_sheet(
+    path,
+    sheet: str,
+    columns: list,
+    required: list | None = None,
+    optional: list | None = None,
+    engine: str | None = None,
+) -> pd.DataFrame:
+    """Read *columns* of *sheet*, keeping rows where any *required* column is set.
+
+    Header names are matched after stripping whitespace and the result uses
+    the names as given.  Every name in *columns* must be in the header;
+    *optional* columns are added only if present.  Raises KeyError (missing
+    sheet or column) or OSError, as pd.read_excel would.
+    """
+    engine = engine or _engine()
+    if engine == "calamine":
+        rows, convert = _rows_calamine(path, sheet), _calamine_cell
+    else:
+        rows, convert = _rows_openpyxl(path, sheet), None
+
+    header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+    missing = [c for c in columns if c.strip() not in header]
+    if missing:
+        raise KeyError(f"{sheet!r} has no column(s) {missing}")
+    columns = columns + [c for c in optional or [] if c.strip() in header]
+    pick = [header.index(c.strip()) for c in columns]
+    check = [pick[columns.index(c)] for c in required or columns]
+    width = max(pick) + 1
+
+    records = []
+    for row in rows:
+        if len(row) < width:
+            row = list(row) + [None] * (width - len(row))
+        if all(row[i] is None or row[i] == "" for i in check):
+            continue
+        values = [row[i] for i in pick]
+        records.append([convert(v) for v in values] if convert else values)
+
+    df = pd.DataFrame(records, columns=columns)
+    # Blank cells in mixed-type columns come back as None; read_excel uses NaN
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+_SHARED_STRINGS = "xl/sharedStrings.xml"
+_STRING_REF = re.compile(rb'<c [^>]*?t="s"[^>]*>\s*<v>(\d+)</v>')
+_STRING_ITEM = re.compile(rb"<si>(.*?)</si>", re.S)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _sheet_part(zf: zipfile.ZipFile, sheet: str) -> str:
+    """Return the zip member holding *sheet*'s cells, e.g. 'xl/worksheets/sheet2.xml'."""
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    rel_id = None
+    for el in workbook.iter():
+        if _local(el.tag) == "sheet" and el.get("name") == sheet:
+            rel_id = next(v for k, v in el.attrib.items() if _local(k) == "id")
+            break
+    if rel_id is None:
+        raise KeyError(f"Worksheet named {sheet!r} not found")
+
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    target = next(el.get("Target") for el in rels if el.get("Id") == rel_id)
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def sheet_fingerprint(path, sheet: str) -> dict:
+    """Identify the current content of *sheet* from the zip directory alone."""
+    with zipfile.ZipFile(path) as zf:
+        part = _sheet_part(zf, sheet)
+        info = zf.getinfo(part)
+        names = set(zf.namelist())
+        strings_crc = zf.getinfo(_SHARED_STRINGS).CRC if _SHARED_STRINGS in names else None
+    return {"sheet": sheet, "part": part, "crc": info.CRC, "size": info.file_size,
+            "strings_crc": strings_crc}
+
+
+def _strings_digest(path, part: str) -> str:
+    """SHA-256 of the shared strings the sheet in *part* refers to."""
+    with zipfile.ZipFile(path) as zf:
+        refs = {int(i) for i in _STRING_REF.findall(zf.read(part))}
+        items = (
+            _STRING_ITEM.findall(zf.read(_SHARED_STRINGS))
+            if _SHARED_STRINGS in zf.namelist() else []
+        )
+    h = hashlib.sha256()
+    for i in sorted(refs):
+        h.update(b"%d\0%s\0" % (i, items[i] if i < len(items) else b""))
+    return h.hexdigest()
+
+
+def cached_sheet(
+    path,
+    sheet: str,
+    tag: str,
+    build: Callable[[], pd.DataFrame],
+    key: dict | None = None,
+    fingerprint: dict | None = None,
+) -> pd.DataFrame:
+    """Return ``build()``, reusing the last result while *sheet* is unchanged.
+
+    *build* parses the sheet into the loader's output; *tag* and *key* name
+    and version the snapshot as in data.snapshot.  Pass *fingerprint* if the
+    caller already took one.
+    """
+    fp = dict(fingerprint or sheet_fingerprint(path, sheet))
+    prev = read_previous(path, tag, key)
+    if prev is not None:
+        df, stored = prev
+        if all(stored.get(k) == fp[k] for k in ("sheet", "part", "crc", "size")):
+            if stored.get("strings_crc") == fp["strings_crc"]:
+                return df
+            fp["strings"] = _strings_digest(path, fp["part"])
+            if stored.get("strings") == fp["strings"]:
+                # Only other tabs' text changed; remember the new strings CRC
+                write_snapshot(df, path, tag, key, fp)
+                return df
+
+    df = build()
+    if "strings" not in fp:
+        fp["strings"] = _strings_digest(path, fp["part"])
+    write_snapshot(df, path, tag, key, fp)
+    return df
+
+
+if __name__ == "__main__":
+    from config.settings import GOUT_FILE, INSIGHT_FILE
+
+    def _time(fn, repeat=3):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    from data import gout, insight
+
+    cases = [
+        ("Insight", INSIGHT_FILE, insight._SHEET, insight._COLUMNS, [insight._PRESCRIBER], []),
+        ("Gout", GOUT_FILE, gout._SHEET, gout._COLUMNS, ["Patient"], gout._OPTIONAL_COLUMNS),
+    ]
+    engines = ["openpyxl"] + (["calamine"] if CalamineWorkbook is not None else [])
+    for name, path, sheet, columns, required, optional in cases:
+        base, full = _time(lambda: pd.read_excel(path, sheet_name=sheet))
+        print(f"{name}: pd.read_excel {base * 1000:8.1f} ms  ({len(full):,} rows)")
+        for eng in engines:
+            secs, df = _time(lambda: read_sheet(path, sheet, columns, required, optional, engine=eng))
+            print(f"{name}: {eng:<13} {secs * 1000:8.1f} ms  ({len(df):,} rows)  {base / secs:5.1f}x")
@@ -0,0 +1,187 @@
+"""
+Offline zip5 -> (lat, lon, city, state) lookup.
+
+The index is a dense NumPy structured array with one slot per five-digit zip
+(100,000 slots, ~4 MB) saved as ZIP_INDEX_FILE and opened memory-mapped, so
+geocoding any number of zips is a single array take: no GeoNames table to
+parse and no network at start-up.  Slots for unknown zips hold NaN.
+
+The index ships in the repository as data_files/zip_centroids.npy.  Build
+or refresh it with
+
+    python -m data.zipgeo [US.txt | zips.json.bz2]
+
+from a GeoNames postal-code dump (download.geonames.org/export/zip/US.zip),
+the zips.json.bz2 table of the zipcodes package (1.x, MIT), or, without an
+argument, through pgeocode (which downloads the GeoNames table on first
+use).  run.sh builds the index if it is missing and commits it with the
+other data files.
+
+If the file is missing anyway the loader builds it through pgeocode and
+tries to save it.  When that fails (e.g. offline) lookups return NaN
+coordinates, a warning is logged, and the build is retried on a call after
+_RETRY_SECONDS rather than never.
+"""
+
+import bz2
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config.settings import ZIP_INDEX_FILE
+
+_log = logging.getLogger(__name__)
+
+_SLOTS = 100_000
+_DTYPE = np.dtype([("lat", "f4"), ("lon", "f4"), ("city", "S28"), ("state", "S2")])
+_GEONAMES_COLUMNS = [
+    "country_code", "postal_code", "place_name", "state_name", "state_code",
+    "county_name", "county_code", "community_name", "community_code",
+    "latitude", "longitude", "accuracy",
+]
+
+
+def build_index(places: pd.DataFrame) -> np.ndarray:
+    """Dense index from a frame with postal_code / place_name / state_code /
+    latitude / longitude columns (GeoNames layout)."""
+    places = places[places["postal_code"].astype(str).str.fullmatch(r"\d{5}")]
+    places = places.groupby("postal_code", as_index=False).agg(
+        latitude=("latitude", "mean"),
+        longitude=("longitude", "mean"),
+        place_name=("place_name", "first"),
+        state_code=("state_code", "first"),
+    )
+    index = np.zeros(_SLOTS, dtype=_DTYPE)
+    index["lat"] = index["lon"] = np.nan
+    slots = places["postal_code"].astype(int).to_numpy()
+    index["lat"][slots] = places["latitude"].to_numpy(dtype="f4")
+    index["lon"][slots] = places["longitude"].to_numpy(dtype="f4")
+    index["city"][slots] = places["place_name"].fillna("").str.encode("utf-8").to_numpy()
+    index["state"][slots] = places["state_code"].fillna("").str.encode("utf-8").to_numpy()
+    return index
+
+
+def read_geonames(path) -> pd.DataFrame:
+    return pd.read_csv(
+        path, sep="\t", header=None, names=_GEONAMES_COLUMNS,
+        dtype={"postal_code": str}, keep_default_na=False, na_values={"latitude": "", "longitude": ""},
+    )
+
+
+def read_zipcodes(path) -> pd.DataFrame:
+    """The zipcodes package's zips.json.bz2, in the GeoNames layout."""
+    with bz2.open(path, "rt") as f:
+        places = pd.DataFrame(json.load(f))
+    return pd.DataFrame({
+        "postal_code": places["zip_code"],
+        "place_name": places["city"],
+        "state_code": places["state"],
+        "latitude": pd.to_numeric(places["lat"], errors="coerce"),
+        "longitude": pd.to_numeric(places["long"], errors="coerce"),
+    })
+
+
+def _from_pgeocode() -> np.ndarray:
+    import pgeocode
+
+    zips = [f"{slot:05d}" for slot in range(_SLOTS)]
+    return build_index(pgeocode.Nominatim("us").query_postal_code(zips))
+
+
+def save_index(index: np.ndarray, path: Path = ZIP_INDEX_FILE):
+    tmp = Path(path).with_name(Path(path).name + ".tmp.npy")
+    np.save(tmp, index)
+    tmp.replace(path)
+
+
+_RETRY_SECONDS = 300
+_lock = threading.Lock()
+_loaded: np.ndarray | None = None
+_retry_at = 0.0
+
+
+def _index() -> np.ndarray:
+    """The zip index; an all-NaN stand-in while it can't be loaded or built."""
+    global _loaded, _retry_at
+    if _loaded is not None:
+        return _loaded
+    with _lock:
+        if _loaded is not None:
+            return _loaded
+        try:
+            _loaded = np.load(ZIP_INDEX_FILE, mmap_mode="r")
+            return _loaded
+        except (OSError, ValueError):
+            pass
+        if time.monotonic() >= _retry_at:
+            try:
+                index = _from_pgeocode()
+            except Exception as err:  # pgeocode missing, or offline
+                _retry_at = time.monotonic() + _RETRY_SECONDS
+                _log.warning("%s missing and could not be built (%s); zips will not be "
+                             "geocoded, retrying in %ds", ZIP_INDEX_FILE, err, _RETRY_SECONDS)
+            else:
+                try:
+                    save_index(index, ZIP_INDEX_FILE)
+                except OSError:
+                    pass
+                _loaded = index
+                return _loaded
+    return _empty_index()
+
+
+@lru_cache(maxsize=1)
+def _empty_index() -> np.ndarray:
+    return build_index(pd.DataFrame(columns=_GEONAMES_COLUMNS))
+
+
+def lookup(zips: pd.Series) -> pd.DataFrame:
+    """Coordinates, city and state for each value of *zips* (index preserved).
+
+    Values are matched on their first five characters; unknown or malformed
+    zips get NaN coordinates and empty city / state.  The work is done once
+    per distinct value and expanded back with a single take.
+    """
+    zips = pd.Series(zips)
+    codes, uniques = pd.factorize(zips)
+    zip5 = pd.Series(uniques).astype(str).str[:5]
+    valid = zip5.str.fullmatch(r"\d{5}", na=False).to_numpy()
+    slots = pd.to_numeric(zip5.where(valid), errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    rows = _index()[slots]
+
+    # One extra slot at the end for missing values (code -1)
+    def expand(values, missing):
+        return np.append(values, missing)[codes]
+
+    return pd.DataFrame(
+        {
+            "zip5": expand(zip5.to_numpy(dtype=object), np.nan),
+            "lat": expand(np.where(valid, rows["lat"], np.nan).astype("float64"), np.nan),
+            "lon": expand(np.where(valid, rows["lon"], np.nan).astype("float64"), np.nan),
+            "city": expand(np.char.decode(np.where(valid, rows["city"], b""), "utf-8", "ignore"), ""),
+            "state": expand(np.char.decode(np.where(valid, rows["state"], b""), "utf-8", "ignore"), ""),
+        },
+        index=zips.index,
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    if source is None:
+        places = None
+    elif source.endswith(".json.bz2"):
+        places = read_zipcodes(source)
+    else:
+        places = read_geonames(source)
+    built = build_index(places) if places is not None else _from_pgeocode()
+    save_index(built)
+    known = int(np.isfinite(built["lat"]).sum())
+    print(f"Wrote {ZIP_INDEX_FILE} ({known:,} zips, {ZIP_INDEX_FILE.stat().st_size / 1e6:.1f} MB)")
@@ -8,9 +8,17 @@ Calculates month-by-month breakdown of:
   5) Rx Priority reasons for unfilled scripts (past 3 months, deduplicated)
 """
 
-import pandas as pd
+import sys
 from pathlib import Path
 
+import pandas as pd
+
+# Run as a script from data_files/: make the dashboard's packages importable
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data.dedup import DedupIndex  # noqa: E402
+from data.metrics import METRICS, monthly_metrics  # noqa: E402
+
 DATA_FILE = Path(__file__).parent / "claims_with_pricing_v3.csv"
 
 
@@ -31,37 +39,19 @@ def load_and_prepare(path: str | Path = DATA_FILE) -> pd.DataFrame:
 def dedup_unfilled(df: pd.DataFrame) -> pd.DataFrame:
     """Remove duplicate unfilled scripts: same patient + drug + month.
     Keeps the row with the highest WAC Value (most complete fill attempt)."""
-    unpaid = df[df["Total Price Paid"] == 0].copy()
-    unpaid = (
-        unpaid.sort_values("WAC Value", ascending=False)
-        .drop_duplicates(subset=["Patient Full Name", "Dispensed Drug", "Month"], keep="first")
-    )
+    unpaid = df[df["Total Price Paid"] == 0]
+    # Ties go to the latest, then the highest Rx / fill number (see data/dedup.py)
+    index = DedupIndex(rank=["WAC Value", "Created On", "Rx Number", "Fill Number"]).update(unpaid)
+    unpaid = index.select(unpaid)
     paid = df[df["Total Price Paid"] > 0]
     return pd.concat([paid, unpaid], ignore_index=True)
 
 
 def monthly_summary(df: pd.DataFrame) -> pd.DataFrame:
     """Build month-by-month financial summary."""
-    months = sorted(df["Month"].unique())
-    paid = df[df["Total Price Paid"] > 0]
-    unpaid = df[df["Total Price Paid"] == 0]
-
-    rows = []
-    for m in months:
-        tp = paid.loc[paid["Month"] == m, "Total Price Paid"].sum()
-        b340 = paid.loc[paid["Month"] == m, "340B Value"].sum()
-        spread = tp - b340
-        wac = unpaid.loc[unpaid["Month"] == m, "WAC Value"].sum()
-        rows.append({
-            "Month": str(m),
-            "Total Price Paid": tp,
-            "340B Value": b340,
-            "Spread": spread,
-            "WAC (Unfilled)": wac,
-        })
-
-    summary = pd.DataFrame(rows)
-    totals = summary[["Total Price Paid", "340B Value", "Spread", "WAC (Unfilled)"]].sum()
+    summary = monthly_metrics(df)
+    summary["Month"] = summary["Month"].astype(str)
+    totals = summary[METRICS].sum()
     totals["Month"] = "TOTAL"
     summary = pd.concat([summary, pd.DataFrame([totals])], ignore_index=True)
     return summary
@@ -60,6 +60,22 @@ if $COMMIT; then
         echo "  ⚠ CCRx Onboarding.xlsx not found in ~/Downloads (skip patient tracker)"
     fi
 
+    # Zip centroid index — built once from GeoNames (via pgeocode), then committed
+    if [ ! -f data_files/zip_centroids.npy ]; then
+        if python3 -m data.zipgeo; then
+            echo "  ✓ zip centroid index"
+        else
+            echo "  ⚠ zip index build failed (offline?); maps stay empty until it is built"
+        fi
+    fi
+
+    # Claims store — normalize only new/changed claim rows into the local snapshot
+    if python3 -m data.ingest; then
+        echo "  ✓ claims store"
+    else
+        echo "  ⚠ claims ingest failed (dashboard will rebuild on start)"
+    fi
+
     echo ""
     echo "── Pulling latest from GitHub ──"
     git stash --include-untracked -q 2>/dev/null || true
@@ -74,6 +90,7 @@ if $COMMIT; then
         "data_files/340 B.xlsx" \
         "data_files/Insight - CCRX Report All.xlsx" \
         data_files/im2_tracker.csv \
+        data_files/zip_centroids.npy \
         data_files/claims_with_pricing_v3.csv \
         "data_files/HUMC 340b Gout Payment Summary.xlsx" \
         app.py \
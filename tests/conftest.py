@@ -0,0 +1,14 @@
+import functools
+
+import pytest
+
+from data import npi_store
+
+
+@pytest.fixture
+def npi_db(tmp_path, monkeypatch):
+    """Point npi_store.connect at an empty store under tmp_path."""
+    path = tmp_path / "npi.sqlite"
+    monkeypatch.setattr(npi_store, "LEGACY_JSON", tmp_path / "missing.json")
+    monkeypatch.setattr(npi_store, "connect", functools.partial(npi_store.connect, path))
+    return path
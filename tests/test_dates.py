@@ -0,0 +1,58 @@
+import pandas as pd
+
+from data.dates import date_slice, parse_dates, sort_by_date
+
+
+def test_parse_dates_layouts():
+    values = pd.Series([
+        "5/13/2025",            # US date
+        "03-17-2026",           # dashed US date
+        "2025-05-13",           # ISO
+        "5/15/2025-5/31/2025",  # range -> end date
+        "7/1/2025 7/15 7/29",   # list -> last date, first one's year
+        " 6/2/2025 ",           # surrounding blanks
+    ], index=[10, 11, 12, 13, 14, 15])
+    dates, unparsed = parse_dates(values)
+    assert dates.tolist() == [
+        pd.Timestamp("2025-05-13"), pd.Timestamp("2026-03-17"), pd.Timestamp("2025-05-13"),
+        pd.Timestamp("2025-05-31"), pd.Timestamp("2025-07-29"), pd.Timestamp("2025-06-02"),
+    ]
+    assert dates.index.tolist() == values.index.tolist()
+    assert unparsed.empty
+
+
+def test_parse_dates_accepts_two_digit_years():
+    values = pd.Series(["5/13/25", "5/15/25-5/31/25", "5/15/25 - 6/2/2025", "7/1/25 7/15 7/29"])
+    dates, unparsed = parse_dates(values)
+    assert dates.tolist() == [
+        pd.Timestamp("2025-05-13"), pd.Timestamp("2025-05-31"),
+        pd.Timestamp("2025-06-02"), pd.Timestamp("2025-07-29"),
+    ]
+    assert unparsed.empty
+
+
+def test_parse_dates_reports_unparsed_but_not_blank():
+    values = pd.Series(["5/13/2025", "", None, "nan", "soon", "13/45/2025"])
+    dates, unparsed = parse_dates(values)
+    assert dates.isna().tolist() == [False, True, True, True, True, True]
+    assert unparsed.tolist() == ["soon", "13/45/2025"]
+
+
+def test_parse_dates_falls_back_to_mixed_formats():
+    values = pd.Series(["2025-05-13 14:30:00", "May 13, 2025"])
+    dates, unparsed = parse_dates(values)
+    assert dates.dt.normalize().tolist() == [pd.Timestamp("2025-05-13")] * 2
+    assert unparsed.empty
+
+
+def test_parse_dates_passes_datetimes_through():
+    values = pd.Series(pd.to_datetime(["2025-01-01", None]))
+    dates, unparsed = parse_dates(values)
+    assert dates is values and unparsed.empty
+
+
+def test_date_slice_is_inclusive_and_skips_undated_rows():
+    df = sort_by_date(pd.DataFrame({"Date": pd.to_datetime(["2025-01-03", None, "2025-01-01", "2025-01-02"])}))
+    assert date_slice(df, "2025-01-02", "2025-01-03")["Date"].dt.day.tolist() == [2, 3]
+    assert len(date_slice(df)) == 3
+    assert date_slice(df, "2025-02-01").empty
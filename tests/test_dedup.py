@@ -0,0 +1,70 @@
+import pandas as pd
+
+from data.dedup import DedupIndex
+
+
+def _claims(rows):
+    return pd.DataFrame(rows, columns=[
+        "Patient Full Name", "Dispensed Drug", "Month", "WAC Value", "Date", "Rx Number", "Fill Number",
+    ]).astype({"Date": "datetime64[ns]"})
+
+
+BASE = _claims([
+    ("Doe, Jane", "Krystexxa", "2025-05", 100.0, "2025-05-02", 1, 0),
+    ("Doe, Jane", "Krystexxa", "2025-05", 300.0, "2025-05-09", 2, 0),   # highest WAC
+    ("Doe, Jane", "Krystexxa", "2025-06", 300.0, "2025-06-01", 3, 0),
+    ("Roe, Rick", "Humira", "2025-05", 50.0, "2025-05-03", 4, 0),
+    ("Roe, Rick", "Humira", "2025-05", 50.0, "2025-05-20", 5, 0),       # WAC tie: latest
+])
+
+
+def _picked(index, df):
+    return sorted(index.select(df)["Rx Number"])
+
+
+def test_picks_one_row_per_group():
+    index = DedupIndex().update(BASE)
+    assert _picked(index, BASE) == [2, 3, 5]
+    assert index.duplicates == 2
+
+
+def test_update_with_added_and_removed_rows_matches_a_rebuild():
+    index = DedupIndex().update(BASE)
+    changed = pd.concat([
+        BASE[BASE["Rx Number"] != 2],  # Jane's May representative is gone
+        _claims([
+            ("Roe, Rick", "Humira", "2025-05", 80.0, "2025-05-25", 6, 0),   # beats Rick's rows
+            ("Poe, Ann", "Otezla", "2025-07", 10.0, "2025-07-01", 7, 0),    # new group
+        ]),
+    ], ignore_index=True)
+
+    index.update(changed)
+    assert _picked(index, changed) == _picked(DedupIndex().update(changed), changed) == [1, 3, 6, 7]
+    assert index.duplicates == 2
+
+
+def test_update_is_stable_when_nothing_changes():
+    index = DedupIndex().update(BASE)
+    best = index.best.copy()
+    index.update(BASE.sample(frac=1, random_state=0))
+    assert index.best.sort_index().equals(best.sort_index())
+
+
+def test_removing_a_whole_group():
+    index = DedupIndex().update(BASE)
+    remaining = BASE[BASE["Patient Full Name"] != "Roe, Rick"]
+    index.update(remaining)
+    assert _picked(index, remaining) == [2, 3]
+    assert len(index.best) == 2
+
+
+def test_exact_duplicate_rows_keep_one():
+    doubled = pd.concat([BASE, BASE.iloc[[0]]], ignore_index=True)
+    index = DedupIndex().update(doubled)
+    assert _picked(index, doubled) == [2, 3, 5]
+    assert index.duplicates == 3
+
+
+def test_rank_columns_missing_from_the_frame_are_skipped():
+    index = DedupIndex(rank=["WAC Value", "Created On", "Rx Number"]).update(BASE)
+    assert _picked(index, BASE) == [2, 3, 5]
@@ -0,0 +1,78 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from data import doctors
+
+
+@pytest.fixture
+def sheet(tmp_path, monkeypatch):
+    """A local doctors sheet served through a file:// URL."""
+    source = tmp_path / "sheet.csv"
+    source.write_text("Doctor Name,NPI,BizDev\nShah Amit,1111111111,Jaffe\n")
+    cache = tmp_path / "cache" / "doctors.csv"
+    monkeypatch.setattr(doctors, "DOCTORS_SHEET_CSV", source.as_uri())
+    monkeypatch.setattr(doctors, "DOCTORS_CACHE_FILE", cache)
+    monkeypatch.setattr(doctors, "_META_FILE", cache.with_name("doctors.csv.meta.json"))
+    doctors._read_doctors.clear()
+    return source
+
+
+def test_first_load_copies_the_sheet(sheet):
+    df = doctors.load_doctors()
+    assert list(df.columns) == ["doctor_name", "npi", "bizdev"]
+    assert df["doctor_name"].tolist() == ["Shah Amit"]
+    assert doctors.DOCTORS_CACHE_FILE.read_bytes() == sheet.read_bytes()
+
+
+def test_refresh_swaps_in_a_changed_sheet_only(sheet):
+    assert doctors.refresh_doctors()
+    assert not doctors.refresh_doctors()
+
+    sheet.write_text("Doctor Name,NPI,BizDev\nPatel Neil,2222222222,Jaffe\n")
+    assert doctors.refresh_doctors()
+    assert doctors.DOCTORS_CACHE_FILE.read_bytes() == sheet.read_bytes()
+
+
+def test_stale_copy_is_served_while_refreshing(sheet, monkeypatch):
+    doctors.refresh_doctors()
+    sheet.write_text("Doctor Name,NPI,BizDev\nPatel Neil,2222222222,Jaffe\n")
+    monkeypatch.setattr(doctors, "DOCTORS_REFRESH_SECONDS", -1)
+    started = []
+    monkeypatch.setattr(doctors, "_refresh_in_background", lambda: started.append(True))
+
+    assert doctors.load_doctors()["doctor_name"].tolist() == ["Shah Amit"]
+    assert started == [True]
+
+
+def test_conditional_request_keeps_copy_on_304(sheet, monkeypatch):
+    body = sheet.read_bytes()
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append(self.headers.get("If-None-Match"))
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        monkeypatch.setattr(doctors, "DOCTORS_SHEET_CSV", f"http://127.0.0.1:{server.server_port}/sheet.csv")
+        assert doctors.refresh_doctors()
+        assert not doctors.refresh_doctors()
+    finally:
+        server.shutdown()
+    assert seen == [None, '"v1"']
+    assert doctors.DOCTORS_CACHE_FILE.read_bytes() == body
@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+from data import frozen
+from data.frozen import monthly_aggregate, open_from
+
+TODAY = pd.Timestamp("2025-04-20")
+
+
+@pytest.fixture(autouse=True)
+def _empty_store():
+    frozen._frozen.clear()
+    frozen._digests.clear()
+
+
+def _frame(dates):
+    df = pd.DataFrame({"Date": pd.to_datetime(dates), "Value": 1.0})
+    return df.assign(Month=df["Date"].dt.to_period("M").astype(str)).sort_values("Date", ignore_index=True)
+
+
+DAYS = ["2025-01-05", "2025-01-31", "2025-02-10", "2025-03-03", "2025-03-31", "2025-04-02"]
+
+
+class Compute:
+    """Monthly sum that records which months each call covered."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, rows):
+        self.calls.append(sorted(rows["Month"].unique()))
+        return rows.groupby("Month", as_index=False)["Value"].sum()
+
+
+def _totals(result):
+    return dict(zip(result["Month"], result["Value"]))
+
+
+def test_open_from_applies_the_grace_period():
+    assert open_from("2025-04-20", grace_days=10) == pd.Timestamp("2025-04-01")
+    assert open_from("2025-04-05", grace_days=10) == pd.Timestamp("2025-03-01")
+
+
+def test_closed_months_are_computed_once():
+    df, compute = _frame(DAYS), Compute()
+    first = monthly_aggregate("t", df, compute, "v1", today=TODAY)
+    assert _totals(first) == {"2025-01": 2, "2025-02": 1, "2025-03": 2, "2025-04": 1}
+
+    compute.calls.clear()
+    again = monthly_aggregate("t", df, compute, "v1", today=TODAY)
+    assert again.equals(first)
+    assert compute.calls == [["2025-04"]]  # only the open month
+
+
+def test_late_row_in_a_frozen_month_is_picked_up():
+    compute = Compute()
+    monthly_aggregate("t", _frame(DAYS), compute, "v1", today=TODAY)
+
+    compute.calls.clear()
+    late = _frame(DAYS + ["2025-02-27"])
+    result = monthly_aggregate("t", late, compute, "v2", today=TODAY)
+    assert _totals(result)["2025-02"] == 2
+    assert sorted(compute.calls) == [["2025-02"], ["2025-04"]]
+
+
+def test_partly_covered_months_are_computed_live():
+    df, compute = _frame(DAYS), Compute()
+    monthly_aggregate("t", df, compute, "v1", today=TODAY)
+
+    compute.calls.clear()
+    result = monthly_aggregate("t", df, compute, "v1", start="2025-01-10", end="2025-03-15", today=TODAY)
+    assert _totals(result) == {"2025-01": 1, "2025-02": 1, "2025-03": 1}
+    assert compute.calls == [["2025-01", "2025-03"]]
+
+
+def test_range_ending_at_midnight_of_a_month_end_freezes_that_month():
+    df, compute = _frame(DAYS), Compute()
+    monthly_aggregate("t", df, compute, "v1", today=TODAY)
+
+    compute.calls.clear()
+    result = monthly_aggregate("t", df, compute, "v1", start="2025-01-01", end=pd.Timestamp("2025-03-31"), today=TODAY)
+    assert _totals(result) == {"2025-01": 2, "2025-02": 1, "2025-03": 2}
+    assert compute.calls == []
+
+
+def test_scopes_are_stored_separately():
+    df, compute = _frame(DAYS), Compute()
+    monthly_aggregate("t", df, compute, "v1", scope="a", today=TODAY)
+    scoped = df[df["Date"] != pd.Timestamp("2025-01-31")].reset_index(drop=True)
+    result = monthly_aggregate("t", scoped, compute, "v1", scope="b", today=TODAY)
+    assert _totals(result)["2025-01"] == 1
+
+
+def test_views_over_the_same_version_and_scope_keep_their_own_digests():
+    compute = Compute()
+    monthly_aggregate("a", _frame(DAYS), compute, "v1", today=TODAY)
+
+    # In v2 view "b" is computed first over a frame without the late row
+    monthly_aggregate("b", _frame(DAYS), compute, "v2", today=TODAY)
+    late = monthly_aggregate("a", _frame(DAYS + ["2025-02-27"]), compute, "v2", today=TODAY)
+    assert _totals(late)["2025-02"] == 2
@@ -0,0 +1,90 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from data.claims import CLAIM_KEY, normalize_claims, read_claims
+from data.ingest import ingest
+
+CLAIMS_CSV = Path(__file__).resolve().parent.parent / "data_files" / "claims_with_pricing_v3.csv"
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = tmp_path / "claims.csv"
+    shutil.copy(CLAIMS_CSV, path)
+    assert _ingest(path)[1]["mode"] == "full"
+    return path
+
+
+def _ingest(path):
+    return ingest(path, normalize_claims, CLAIM_KEY, "normalized", {"version": "test"}, read=read_claims)
+
+
+def _raw(path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def _rewrite(path, raw: pd.DataFrame):
+    raw.to_csv(path, index=False)
+
+
+def _assert_rebuilt(path, mode):
+    df, stats = _ingest(path)
+    assert stats["mode"] == mode
+    pd.testing.assert_frame_equal(df, read_claims(path))
+    return stats
+
+
+def test_unchanged_feed_is_served_from_the_snapshot(feed):
+    _assert_rebuilt(feed, "snapshot")
+
+
+def test_changed_cell_is_ingested_incrementally(feed):
+    raw = _raw(feed)
+    raw.loc[3, "Total Price Paid"] = "1234.56"
+    _rewrite(feed, raw)
+    stats = _assert_rebuilt(feed, "incremental")
+    assert (stats["new"], stats["changed"], stats["removed"]) == (0, 1, 0)
+
+
+def test_dropped_rows_are_removed(feed):
+    raw = _raw(feed)
+    _rewrite(feed, raw.drop(index=[0, 5, 17]))
+    stats = _assert_rebuilt(feed, "incremental")
+    assert (stats["new"], stats["changed"], stats["removed"]) == (0, 0, 3)
+
+
+def test_added_row_with_new_categories(feed):
+    raw = _raw(feed)
+    row = raw.iloc[[0]].assign(**{
+        "Rx Number": "999999",
+        "Dispensed Drug": "Brand New Drug 5 Mg Tablet",
+        "Marketer Name": "Newcomer, Pat",
+        "Primary Claim Status": "Pending Review",
+    })
+    _rewrite(feed, pd.concat([raw, row], ignore_index=True))
+    stats = _assert_rebuilt(feed, "incremental")
+    assert (stats["new"], stats["changed"], stats["removed"]) == (1, 0, 0)
+
+
+def test_duplicate_keys_fall_back_to_a_full_rebuild(feed):
+    raw = _raw(feed)
+    dupe = raw.iloc[[0]].assign(**{"Total Price Paid": "1.00"})
+    _rewrite(feed, pd.concat([raw, dupe], ignore_index=True))
+    _assert_rebuilt(feed, "full")
+
+
+def test_added_column_falls_back_to_a_full_rebuild(feed):
+    raw = _raw(feed)
+    raw.loc[2, "Total Price Paid"] = "1.00"
+    _rewrite(feed, raw.assign(Notes="n/a"))
+    _assert_rebuilt(feed, "full")
+
+
+def test_uncastable_delta_falls_back_to_a_full_rebuild(feed):
+    raw = _raw(feed)
+    raw.loc[2, "Qty"] = "two boxes"  # Qty is int64 in the store
+    _rewrite(feed, raw)
+    _assert_rebuilt(feed, "full")
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.claims import read_claims
+from data.metrics import METRICS, monthly_metrics
+
+CLAIMS_CSV = Path(__file__).resolve().parent.parent / "data_files" / "claims_with_pricing_v3.csv"
+
+
+def _reference(df):
+    """financial_analysis.monthly_summary before data.metrics, without the
+    TOTAL row: one filtered sum per month and measure."""
+    paid = df[df["Total Price Paid"] > 0]
+    unpaid = df[df["Total Price Paid"] == 0]
+    rows = []
+    for m in sorted(df["Month"].unique()):
+        tp = paid.loc[paid["Month"] == m, "Total Price Paid"].sum()
+        b340 = paid.loc[paid["Month"] == m, "340B Value"].sum() if "340B Value" in df.columns else 0
+        wac = unpaid.loc[unpaid["Month"] == m, "WAC Value"].sum()
+        rows.append({"Month": str(m), "Total Price Paid": tp, "340B Value": b340, "Spread": tp - b340, "WAC (Unfilled)": wac})
+    return pd.DataFrame(rows, columns=["Month", *METRICS])
+
+
+@pytest.fixture
+def claims():
+    rng = np.random.default_rng(3)
+    n = 300
+    df = pd.DataFrame({
+        "Month": rng.choice(["2025-01", "2025-02", "2025-03", "2025-05"], n),
+        "Biz Dev Name": rng.choice(["Jaffe, Asiya", "Lee, Sam"], n),
+        "Total Price Paid": rng.choice([0.0, 0.0, 88.1, 1033.0, -25.0], n),
+        "340B Value": rng.choice([0.0, 795.0, 61.4], n),
+        "WAC Value": rng.choice([0.0, 1742.0, 310.5], n),
+    })
+    df["Month"] = df["Month"].astype("category")
+    return df
+
+
+def _check(result, expected):
+    result = result.assign(Month=result["Month"].astype(str)).reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_monthly_metrics_matches_the_per_month_sums(claims):
+    _check(monthly_metrics(claims), _reference(claims))
+
+
+def test_monthly_metrics_matches_per_group(claims):
+    result = monthly_metrics(claims, by=["Biz Dev Name"])
+    for name, rows in claims.groupby("Biz Dev Name"):
+        group = result[result["Biz Dev Name"] == name].drop(columns="Biz Dev Name")
+        _check(group, _reference(rows))
+
+
+def test_missing_340b_value_counts_as_zero(claims):
+    claims = claims.drop(columns="340B Value")
+    _check(monthly_metrics(claims), _reference(claims))
+
+
+def test_monthly_metrics_matches_on_the_claims_file():
+    claims = read_claims(CLAIMS_CSV)
+    _check(monthly_metrics(claims), _reference(claims))
@@ -0,0 +1,85 @@
+import json
+import threading
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from data import npi_lookup, npi_store
+
+
+def _record(npi):
+    return {
+        "result_count": 1,
+        "results": [{
+            "basic": {"first_name": "Amit", "last_name": "Shah"},
+            "addresses": [{"address_1": "1 Main St", "city": "Hoboken", "state": "NJ", "postal_code": "070301234"}],
+        }],
+    }
+
+
+class FakeRegistry(BaseHTTPRequestHandler):
+    """NPI 1... is found, 2... is unknown, 3... fails once with a 503,
+    4... is rate-limited once, 5... always fails."""
+
+    calls: dict = {}
+
+    def do_GET(self):
+        npi = parse_qs(urlparse(self.path).query)["number"][0]
+        n = self.calls[npi] = self.calls.get(npi, 0) + 1
+        kind = npi[0]
+        if kind == "5" or (kind == "3" and n == 1):
+            self.send_error(503)
+        elif kind == "4" and n == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+        else:
+            body = json.dumps(_record(npi) if kind != "2" else {"result_count": 0}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def registry(npi_db, monkeypatch):
+    monkeypatch.setattr(npi_lookup, "NPI_REQUESTS_PER_SECOND", 1000)
+    monkeypatch.setattr(npi_lookup, "NPI_RETRIES", 2)
+    monkeypatch.setattr(npi_lookup, "_BACKOFF_SECONDS", 0.01)
+    FakeRegistry.calls = {}
+    server = HTTPServer(("127.0.0.1", 0), FakeRegistry)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api/"
+    server.shutdown()
+
+
+def test_enrich_npis_against_fake_registry(registry):
+    npis = ["1000000001", "2000000002", "3000000003", "4000000004", "5000000005"]
+    found = npi_lookup.enrich_npis(npis, endpoint=registry)
+
+    assert sorted(found) == ["1000000001", "3000000003", "4000000004"]
+    assert found["1000000001"]["name"] == "Shah, Amit"
+    assert found["1000000001"]["zip"] == "07030"
+    # Transient errors are retried; a lookup that keeps failing gives up
+    assert FakeRegistry.calls == {
+        "1000000001": 1, "2000000002": 1, "3000000003": 2, "4000000004": 2, "5000000005": 3,
+    }
+
+    with closing(npi_store.connect()) as conn:
+        assert sorted(npi_store.get(conn, npis)) == sorted(found)
+        # The unknown NPI is cached as a negative; the failed one is not recorded
+        assert npi_store.due(conn, npis) == ["5000000005"]
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = npi_lookup._RateLimiter(50)
+    times = []
+    for _ in range(5):
+        limiter.wait()
+        times.append(npi_lookup.time.monotonic())
+    assert times[-1] - times[0] >= 4 / 50 * 0.9
@@ -0,0 +1,48 @@
+import threading
+from contextlib import closing
+
+from config.settings import NPI_MISS_TTL_DAYS, NPI_REFRESH_DAYS
+from data import npi_lookup, npi_store
+
+DAY = 86400
+
+
+def test_due_follows_refresh_and_miss_ttls(npi_db):
+    now = 1_000 * DAY
+    with closing(npi_store.connect()) as conn:
+        npi_store.upsert(conn, {"npi": "1", "name": "Shah, Amit"}, now=now)
+        npi_store.mark_missing(conn, "2", now=now)
+        assert npi_store.due(conn, ["1", "2", "3"], now=now) == ["3"]
+        assert npi_store.due(conn, ["1", "2"], now=now + (NPI_MISS_TTL_DAYS + 1) * DAY) == ["2"]
+        assert npi_store.due(conn, ["1"], now=now + (NPI_REFRESH_DAYS + 1) * DAY) == ["1"]
+
+
+def test_mark_missing_keeps_a_found_record(npi_db):
+    with closing(npi_store.connect()) as conn:
+        npi_store.upsert(conn, {"npi": "1", "name": "Shah, Amit"})
+        npi_store.mark_missing(conn, "1")
+        assert npi_store.get(conn, ["1"])["1"]["name"] == "Shah, Amit"
+
+
+def test_background_enrichment_only_skips_npis_in_flight(monkeypatch):
+    release, batches = threading.Event(), []
+
+    def enrich(npis):
+        batches.append(list(npis))
+        release.wait(5)
+
+    monkeypatch.setattr(npi_lookup, "enrich_npis", enrich)
+    npi_lookup.enrich_in_background(["1", "2"])
+    npi_lookup.enrich_in_background(["2", "3"])  # 2 is still in flight
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "npi-enrich":
+            thread.join(5)
+
+    # Once its batch is done an NPI can be sent again (e.g. when due to refresh)
+    npi_lookup.enrich_in_background(["1"])
+    for thread in threading.enumerate():
+        if thread.name == "npi-enrich":
+            thread.join(5)
+    assert sorted(map(sorted, batches)) == [["1"], ["1", "2"], ["3"]]
+    assert not npi_lookup._in_flight
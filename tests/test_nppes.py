@@ -0,0 +1,102 @@
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+from data import npi_store, nppes
+
+
+def _write_pfile(path, rows):
+    """An npidata_pfile CSV with every column import_nppes reads."""
+    frame = pd.DataFrame([{column: "" for column in nppes._COLUMNS} | row for row in rows])
+    frame.to_csv(path, index=False)
+    return path
+
+
+def _person(npi, state="NJ", **taxonomies):
+    row = {
+        "NPI": npi,
+        "Entity Type Code": "1",
+        "Provider Last Name (Legal Name)": "Shah",
+        "Provider First Name": "Amit",
+        "Provider First Line Business Practice Location Address": "1 Main St",
+        "Provider Business Practice Location Address City Name": "Hoboken",
+        "Provider Business Practice Location Address State Name": state,
+        "Provider Business Practice Location Address Postal Code": "070301234",
+    }
+    for slot, (code, primary) in taxonomies.items():
+        i = slot.removeprefix("slot")
+        row[f"Healthcare Provider Taxonomy Code_{i}"] = code
+        row[f"Healthcare Provider Primary Taxonomy Switch_{i}"] = primary
+    return row
+
+
+@pytest.fixture
+def pfile(tmp_path):
+    return _write_pfile(tmp_path / "npidata.csv", [
+        _person("1", slot1=("207Q00000X", "N"), slot2=("207RR0500X", "Y")),
+        _person("2", slot1=("207Q00000X", ""), slot3=("207RR0500X", "")),
+        _person("3", slot2=("207RR0500X", "Y"), slot4=("207Q00000X", "Y")),
+        _person("4", state="CA", slot1=("207Q00000X", "Y")),
+        {
+            "NPI": "5", "Entity Type Code": "2",
+            "Provider Organization Name (Legal Business Name)": "Hudson Clinic",
+            "Provider Business Practice Location Address State Name": "NJ",
+        },
+    ])
+
+
+def _table(name="nppes"):
+    with closing(npi_store.connect()) as conn:
+        return {row["npi"]: dict(row) for row in conn.execute(f"SELECT * FROM {name}")}
+
+
+def test_import_selects_primary_taxonomy(npi_db, pfile, tmp_path):
+    taxonomy = tmp_path / "nucc.csv"
+    pd.DataFrame({
+        "Code": ["207Q00000X", "207RR0500X"],
+        "Classification": ["Family Medicine", "Internal Medicine"],
+        "Specialization": [None, "Rheumatology"],
+    }).to_csv(taxonomy, index=False)
+
+    assert nppes.import_nppes(pfile, states=["nj"], taxonomy_file=taxonomy, chunk_rows=2) == 4
+    table = _table()
+
+    assert sorted(table) == ["1", "2", "3", "5"]  # CA filtered out
+    assert table["1"]["taxonomy"] == "207RR0500X"  # the slot flagged primary
+    assert table["2"]["taxonomy"] == "207Q00000X"  # none flagged: first listed
+    assert table["3"]["taxonomy"] == "207RR0500X"  # several flagged: first of them
+    assert table["1"]["specialty"] == "Rheumatology"
+    assert table["2"]["specialty"] == "Family Medicine"
+    assert table["1"]["name"] == "Shah, Amit" and table["1"]["zip"] == "07030"
+    assert table["5"]["name"] == "Hudson Clinic"
+
+
+def test_failed_import_keeps_the_previous_table(npi_db, pfile, tmp_path, monkeypatch):
+    nppes.import_nppes(pfile)
+    before = _table()
+
+    rows = nppes._rows
+    calls = []
+
+    def fail_on_second_chunk(chunk, specialties):
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise RuntimeError("disk full")
+        return rows(chunk, specialties)
+
+    monkeypatch.setattr(nppes, "_rows", fail_on_second_chunk)
+    replacement = _write_pfile(tmp_path / "next.csv", [_person("7"), _person("8"), _person("9")])
+    with pytest.raises(RuntimeError):
+        nppes.import_nppes(replacement, chunk_rows=2)
+
+    assert _table() == before
+
+
+def test_reimport_replaces_the_table(npi_db, pfile, tmp_path):
+    nppes.import_nppes(pfile)
+    nppes.import_nppes(_write_pfile(tmp_path / "next.csv", [_person("7")]))
+    assert sorted(_table()) == ["7"]
+    with closing(npi_store.connect()) as conn:
+        assert npi_store.get(conn, ["7", "1"]).keys() == {"7"}
+        assert npi_store.due(conn, ["7", "1"]) == ["1"]
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.prefix import PrefixSums
+
+
+@pytest.fixture
+def cells():
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        "Date": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D"),
+        "Biz Dev Name": rng.choice(["Jaffe", "Lee", "Ortiz"], n),
+        "Inventory_Type": rng.choice(["340B", "Retail"], n),
+        "Revenue": rng.integers(0, 1000, n).astype(float),
+    })
+    df.loc[::37, "Date"] = pd.NaT  # undated rows never count
+    return df
+
+
+def _expected(df, start, end, where):
+    rows = df[(df["Date"] >= start) & (df["Date"] <= end)]
+    for column, value in (where or {}).items():
+        rows = rows[rows[column] == value]
+    daily = rows.groupby("Date", as_index=False)["Revenue"].sum().sort_values("Date")
+    daily["Cumulative Revenue"] = daily["Revenue"].cumsum()
+    return daily.reset_index(drop=True)
+
+
+WINDOWS = [
+    ("2024-12-01", "2025-12-31"),           # wider than the data
+    ("2025-01-10", "2025-01-10"),           # a single day
+    ("2025-01-10 12:00", "2025-02-03"),     # start between days
+    ("2025-02-03", "2025-01-10"),           # start after end
+    ("2026-01-01", "2026-02-01"),           # after the data
+]
+WHERE = [None, {"Biz Dev Name": "Lee"}, {"Biz Dev Name": "Lee", "Inventory_Type": "340B"}, {"Biz Dev Name": "Nobody"}]
+
+
+@pytest.mark.parametrize("start, end", WINDOWS)
+@pytest.mark.parametrize("where", WHERE)
+def test_series_and_total_match_groupby_cumsum(cells, start, end, where):
+    prefix = PrefixSums(cells, ["Revenue"], by=["Biz Dev Name", "Inventory_Type"])
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    expected = _expected(cells, start, end, where)
+
+    series = prefix.series(["Revenue"], start, end, where)
+    assert series["Date"].tolist() == expected["Date"].tolist()
+    np.testing.assert_allclose(series["Revenue"], expected["Revenue"])
+    np.testing.assert_allclose(series["Cumulative Revenue"], expected["Cumulative Revenue"])
+    assert prefix.total("Revenue", start, end, where) == pytest.approx(expected["Revenue"].sum())
+
+
+def test_open_window_covers_every_dated_row(cells):
+    prefix = PrefixSums(cells, ["Revenue"], by=["Biz Dev Name"])
+    assert prefix.total("Revenue") == pytest.approx(cells.loc[cells["Date"].notna(), "Revenue"].sum())
+    assert len(prefix.series(["Revenue"])) == cells["Date"].nunique()
+
+
+def test_days_without_rows_for_the_selection_are_left_out():
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-03"]),
+        "Biz Dev Name": ["Lee", "Ortiz", "Lee"],
+        "Revenue": [1.0, 2.0, 0.0],
+    })
+    series = PrefixSums(df, ["Revenue"], by=["Biz Dev Name"]).series(["Revenue"], where={"Biz Dev Name": "Lee"})
+    # A zero-valued day with rows is kept, a day with no Lee rows is not
+    assert series["Date"].dt.day.tolist() == [1, 3]
+    assert series["Cumulative Revenue"].tolist() == [1.0, 1.0]
+
+
+def test_index_dates_without_groups():
+    daily = pd.DataFrame(
+        {"Paid": [10.0, 0.0, 5.0], "Infusions": [1, 2, np.nan]},
+        index=pd.to_datetime(["2025-03-01", "2025-03-02", "2025-03-05"]),
+    )
+    prefix = PrefixSums(daily, ["Paid", "Infusions"], column=None)
+    assert prefix.total("Infusions") == 3.0  # missing values count as 0
+    series = prefix.series(["Paid"], "2025-03-02", "2025-03-31")
+    assert series["Cumulative Paid"].tolist() == [0.0, 5.0]
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from data import providers as providers_module
+from data.insight import filter_insight_by_doctors
+from data.patient_tracker import filter_tracker_by_doctors
+from data.providers import load_crosswalk, name_key
+
+
+@pytest.fixture(autouse=True)
+def _crosswalk_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(providers_module, "PROVIDER_CROSSWALK_FILE", tmp_path / "crosswalk.parquet")
+
+
+def _crosswalk(claims=(), insight=(), tracker=(), doctors=()):
+    frames = {
+        "claims": pd.DataFrame(list(claims), columns=["Prescriber Full Name", "Prescriber NPI"]),
+        "insight": pd.DataFrame({"Doctor": list(insight)}),
+        "tracker": pd.DataFrame({"Provider": list(tracker)}),
+        "doctors": pd.DataFrame(list(doctors), columns=["doctor_name", "npi"]),
+    }
+    return frames, load_crosswalk(frames)
+
+
+def test_name_key_reads_both_orders():
+    assert name_key("Goldman, Alan, MD") == name_key("Dr. Alan Goldman") == ("goldman", "alan")
+    assert name_key("Goldman, Alan Peter") == ("goldman", "alan")
+
+
+def test_insight_same_surname_other_first_name_does_not_match():
+    frames, cw = _crosswalk(insight=["Shah, Amit", "Shah, Neil", "Patel, Amit"])
+    matched = filter_insight_by_doctors(frames["insight"], ["Shah, Amit"], cw)
+    assert matched["Doctor"].tolist() == ["Shah, Amit"]
+
+
+def test_insight_first_last_matches_last_first_md():
+    frames, cw = _crosswalk(insight=["Alan Goldman", "Goldman, Alan, MD", "Goldman, Ruth"])
+    matched = filter_insight_by_doctors(frames["insight"], ["Goldman, Alan"], cw)
+    assert matched["Doctor"].tolist() == ["Alan Goldman", "Goldman, Alan, MD"]
+
+
+def test_tracker_matches_any_shared_word():
+    frames, cw = _crosswalk(tracker=["Dr. Shah", "Dr. Neil Shah", "Dr. Patel", "Dr. Al"])
+    matched = filter_tracker_by_doctors(frames["tracker"], ["Shah, Amit", "Smith, Al"], cw)
+    # Words of two letters or fewer ("Al", "Dr") never match on their own
+    assert matched["Provider"].tolist() == ["Dr. Shah", "Dr. Neil Shah"]
+
+
+def test_claims_same_surname_other_first_name_does_not_match():
+    frames, cw = _crosswalk(claims=[("Shah, Amit", 1111111111), ("Shah, Neil", 2222222222)])
+    mask = cw.mask(frames["claims"], "claims", ["Shah, Amit"])
+    assert mask.tolist() == [True, False]
+
+
+def test_claims_first_last_matches_last_first_md():
+    frames, cw = _crosswalk(claims=[("Alan Goldman", None), ("Goldman, Alan, MD", None), ("Goldman, Ruth", None)])
+    mask = cw.mask(frames["claims"], "claims", ["Goldman, Alan"])
+    assert mask.tolist() == [True, True, False]
+
+
+def test_names_sharing_an_npi_are_one_provider():
+    frames, cw = _crosswalk(
+        claims=[("Goldman, Alan Peter", 1111111111), ("Goldman, A.", 1111111111), ("Goldman, Ruth", 2222222222)],
+        doctors=[("Dr. Alan Goldman", 1111111111)],
+    )
+    assert cw.mask(frames["claims"], "claims", ["Goldman, Alan"]).tolist() == [True, True, False]
+    ids = cw.ids(frames["claims"], "claims")
+    assert ids.iloc[0] == ids.iloc[1] == cw.ids(frames["doctors"], "doctors").iloc[0]
+    assert ids.iloc[2] != ids.iloc[0]
+
+
+def test_one_name_under_two_npis_stays_two_providers():
+    frames, cw = _crosswalk(claims=[("Smith, John", 1111111111), ("Smith, John", 2222222222)])
+    ids = cw.ids(frames["claims"], "claims")
+    assert ids.iloc[0] != ids.iloc[1]
+
+
+def test_empty_doctor_list_matches_nothing():
+    frames, cw = _crosswalk(insight=["Shah, Amit"], tracker=["Dr. Shah"])
+    assert filter_insight_by_doctors(frames["insight"], [], cw).empty
+    assert filter_tracker_by_doctors(frames["tracker"], [], cw).empty
@@ -0,0 +1,61 @@
+import pandas as pd
+
+from data.unfilled import classify_unfilled, priorities_in
+
+PRIORITIES = {"New Fill": "Actionable NOW", "PA Denied": "Likely Lost", "Transfer": "Transfer Out (Rare Not In-Network)"}
+MESSAGES = {r"M/I PHARMACY NUMBER": "Transfer Out (Rare Not In-Network)", r"REFILL TOO SOON": "Waiting on External"}
+
+
+def _classify(rows, priorities=PRIORITIES, messages=MESSAGES):
+    df = pd.DataFrame(rows, columns=["Rx Priority", "Primary Claim Message"])
+    return classify_unfilled(df, priorities, messages).tolist()
+
+
+def test_message_rule_wins_over_priority():
+    assert _classify([
+        ("New Fill", "70 - M/I Pharmacy Number"),
+        ("New Fill", "Approved"),
+    ]) == ["Transfer Out (Rare Not In-Network)", "Actionable NOW"]
+
+
+def test_missing_priority_and_message():
+    assert _classify([
+        (None, None),
+        (None, "refill too soon"),
+        ("PA Denied", None),
+    ]) == ["Other", "Waiting on External", "Likely Lost"]
+
+
+def test_unknown_values_go_to_the_default_bucket():
+    assert _classify([("Something New", "No match here")]) == ["Other"]
+
+
+def test_first_listed_rule_wins():
+    messages = {r"TOO SOON": "Waiting on External", r"REFILL": "Likely Lost"}
+    assert _classify([("New Fill", "Refill too soon")], messages=messages) == ["Waiting on External"]
+    reordered = {r"REFILL": "Likely Lost", r"TOO SOON": "Waiting on External"}
+    assert _classify([("New Fill", "Refill too soon")], messages=reordered) == ["Likely Lost"]
+
+
+def test_patterns_with_their_own_groups():
+    messages = {r"M/I (PHARMACY|PRESCRIBER) NUMBER": "Transfer Out (Rare Not In-Network)", r"REFILL TOO SOON": "Waiting on External"}
+    assert _classify([
+        ("New Fill", "M/I Prescriber Number"),
+        ("New Fill", "Refill too soon"),
+        ("New Fill", "Paid"),
+    ], messages=messages) == ["Transfer Out (Rare Not In-Network)", "Waiting on External", "Actionable NOW"]
+    # A grouped pattern listed second must not shift the bucket of the first
+    swapped = {r"REFILL TOO SOON": "Waiting on External", r"M/I (PHARMACY|PRESCRIBER) NUMBER": "Likely Lost"}
+    assert _classify([("New Fill", "Refill too soon"), ("New Fill", "M/I Pharmacy Number")], messages=swapped) == [
+        "Waiting on External", "Likely Lost",
+    ]
+
+
+def test_without_message_or_priority_columns():
+    df = pd.DataFrame({"Rx Priority": ["Transfer", "New Fill"]})
+    assert classify_unfilled(df, PRIORITIES, MESSAGES).tolist() == ["Transfer Out (Rare Not In-Network)", "Actionable NOW"]
+    assert classify_unfilled(pd.DataFrame(index=range(2)), PRIORITIES, MESSAGES).tolist() == ["Other", "Other"]
+
+
+def test_priorities_in():
+    assert priorities_in("Likely Lost", PRIORITIES) == ["PA Denied"]
@@ -0,0 +1,87 @@
+import bz2
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import zipgeo
+
+
+@pytest.fixture
+def index_file(tmp_path, monkeypatch):
+    path = tmp_path / "zip_centroids.npy"
+    monkeypatch.setattr(zipgeo, "ZIP_INDEX_FILE", path)
+    monkeypatch.setattr(zipgeo, "_loaded", None)
+    monkeypatch.setattr(zipgeo, "_retry_at", 0.0)
+    return path
+
+
+def _places():
+    return pd.DataFrame({
+        "postal_code": ["07030", "07030", "10001", "ABC"],
+        "place_name": ["Hoboken", "Hoboken", "New York", "X"],
+        "state_code": ["NJ", "NJ", "NY", "XX"],
+        "latitude": [40.0, 40.2, 40.75, 1.0],
+        "longitude": [-74.0, -74.2, -73.99, 1.0],
+    })
+
+
+def test_lookup_from_saved_index(index_file):
+    zipgeo.save_index(zipgeo.build_index(_places()), index_file)
+    geo = zipgeo.lookup(pd.Series(["07030-1234", "10001", "99999", None, "bad"], index=[5, 6, 7, 8, 9]))
+    assert geo.index.tolist() == [5, 6, 7, 8, 9]
+    assert geo["lat"].iloc[0] == pytest.approx(40.1)
+    assert geo[["city", "state"]].iloc[1].tolist() == ["New York", "NY"]
+    assert geo["lat"].iloc[2:].isna().all()
+
+
+def test_missing_index_offline_gives_nan(index_file, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pgeocode", None)  # import fails
+    geo = zipgeo.lookup(pd.Series(["07030"]))
+    assert np.isnan(geo["lat"].iloc[0]) and geo["city"].iloc[0] == ""
+    assert not index_file.exists()
+
+
+class Nominatim:
+    def __init__(self, country):
+        pass
+
+    def query_postal_code(self, codes):
+        places = _places().drop_duplicates("postal_code")
+        return pd.DataFrame({"postal_code": codes}).merge(places, on="postal_code", how="left")
+
+
+def _fake_pgeocode(monkeypatch):
+    module = type(sys)("pgeocode")
+    module.Nominatim = Nominatim
+    monkeypatch.setitem(sys.modules, "pgeocode", module)
+
+
+def test_missing_index_is_built_through_pgeocode(index_file, monkeypatch):
+    _fake_pgeocode(monkeypatch)
+    assert zipgeo.lookup(pd.Series(["07030"]))["state"].iloc[0] == "NJ"
+    assert index_file.exists()
+
+
+def test_failed_build_is_retried_after_a_backoff(index_file, monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "pgeocode", None)
+    assert np.isnan(zipgeo.lookup(pd.Series(["07030"]))["lat"].iloc[0])
+    assert "will not be geocoded" in caplog.text
+
+    # Back online, but still inside the backoff: no new attempt yet
+    _fake_pgeocode(monkeypatch)
+    assert np.isnan(zipgeo.lookup(pd.Series(["07030"]))["lat"].iloc[0])
+
+    monkeypatch.setattr(zipgeo, "_retry_at", 0.0)
+    assert zipgeo.lookup(pd.Series(["07030"]))["state"].iloc[0] == "NJ"
+
+
+def test_read_zipcodes_table(tmp_path):
+    path = tmp_path / "zips.json.bz2"
+    with bz2.open(path, "wt") as f:
+        json.dump([{"zip_code": "07030", "city": "Hoboken", "state": "NJ", "lat": "40.7448", "long": "-74.0324"}], f)
+    index = zipgeo.build_index(zipgeo.read_zipcodes(path))
+    assert index["lat"][7030] == pytest.approx(40.7448)
+    assert index["state"][7030] == b"NJ"
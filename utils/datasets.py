@@ -0,0 +1,46 @@
+class Datasets:
+    """
+    Named, lazily evaluated datasets for one script run.
+
+    Each dataset is a function of the datasets it names as dependencies:
+
+        data = Datasets()
+        data.define("claims")(load_claims)
+
+        @data.define("cube", "claims")
+        def _cube(claims):
+            ...
+
+    ``data["cube"]`` computes "claims" and then "cube" on first access and
+    reuses both for the rest of the run, so a page only pays for the
+    datasets it actually reads.  Values known up front (widget selections,
+    filtered frames) are added with ``provide``.  Caching across reruns is
+    left to the functions themselves (st.cache_data on the loaders).
+    """
+
+    def __init__(self):
+        self._recipes = {}
+        self._values = {}
+
+    def define(self, name: str, *deps: str):
+        """Decorator registering a function that builds *name* from *deps*."""
+        def register(fn):
+            self._recipes[name] = (fn, deps)
+            self._values.pop(name, None)
+            return fn
+        return register
+
+    def provide(self, name: str, value):
+        """Register an already computed dataset."""
+        self._recipes.pop(name, None)
+        self._values[name] = value
+
+    def __getitem__(self, name: str):
+        if name not in self._values:
+            fn, deps = self._recipes[name]
+            self._values[name] = fn(*(self[dep] for dep in deps))
+        return self._values[name]
+
+    def computed(self) -> list:
+        """Names of the datasets evaluated so far (for debugging)."""
+        return list(self._values)